@@ -0,0 +1,64 @@
+"""对比 score_match 线性扫描与 KeywordTable 批量打分的耗时
+
+用法: python benchmarks/bench_matcher.py
+"""
+
+import random
+import string
+import time
+
+from memory_mcp.backend.core import matcher
+
+SIZES = [1_000, 10_000, 100_000]
+QUERIES = 20
+
+
+def _random_keys(rng: random.Random, count: int) -> list[frozenset[str]]:
+    vocab = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        for _ in range(max(count // 5, 100))
+    ]
+    return [frozenset(rng.sample(vocab, rng.randint(2, 5))) for _ in range(count)]
+
+
+def _linear(keys: list[frozenset[str]], query: list[str]) -> list[frozenset[str]]:
+    scored = []
+    for key in keys:
+        score = matcher.score_match(query, key)
+        if score > 0:
+            scored.append((key, score))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [key for key, _ in scored]
+
+
+def main():
+    rng = random.Random(0)
+    for size in SIZES:
+        keys = _random_keys(rng, size)
+        queries = [
+            ["".join(rng.choices(string.ascii_lowercase, k=3)) for _ in range(3)]
+            for _ in range(QUERIES)
+        ]
+
+        start = time.perf_counter()
+        for query in queries:
+            _linear(keys, query)
+        linear_ms = (time.perf_counter() - start) / QUERIES * 1000
+
+        start = time.perf_counter()
+        table = matcher.KeywordTable(keys)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for query in queries:
+            table.rank(query)
+        table_ms = (time.perf_counter() - start) / QUERIES * 1000
+
+        print(
+            f"{size:>7} memories | score_match {linear_ms:8.2f} ms/query | "
+            f"KeywordTable {table_ms:8.2f} ms/query (build {build_ms:.0f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
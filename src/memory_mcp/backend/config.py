@@ -5,12 +5,72 @@ import os
 # API 配置
 DEFAULT_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-5-20250929")
 SMALL_FAST_MODEL = os.getenv("ANTHROPIC_SMALL_FAST_MODEL", "claude-haiku-20251001")
+# 各类 LLM 请求使用的模型：small（SMALL_FAST_MODEL）、default（DEFAULT_MODEL）或具体模型名，
+# 可用 MEMORY_MCP_MODEL_ROUTES 覆盖，如 "validation=small,memorize=claude-sonnet-4-5"
+MODEL_ROUTES = {
+    "validation": "small",
+    "fast_recall": "small",
+    "deep_recall": "default",
+    "memorize": "default",
+    **{
+        name.strip(): route.strip()
+        for name, _, route in (
+            item.partition("=")
+            for item in os.getenv("MEMORY_MCP_MODEL_ROUTES", "").split(",")
+            if "=" in item
+        )
+    },
+}
+# LLM 请求调度：同时进行的请求数、每分钟输入 token 预算（0 表示不限制）与重试退避
+LLM_MAX_IN_FLIGHT = int(os.getenv("MEMORY_MCP_LLM_MAX_IN_FLIGHT", "4"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("MEMORY_MCP_LLM_TOKENS_PER_MINUTE", "0"))
+LLM_MAX_RETRIES = 5
+LLM_BACKOFF_BASE_SECONDS = 1.0
+LLM_BACKOFF_MAX_SECONDS = 60.0
+# small_agent 的提示词缓存：system 与工具列表保持不变，每轮只为新增的消息付费（1/true/on 开启）
+PROMPT_CACHING = os.getenv("MEMORY_MCP_PROMPT_CACHE", "on").lower() in ("1", "true", "on")
+# small_agent 流式接收响应：tool_use 块一生成完就开始执行（1/true/on 开启）
+STREAMING = os.getenv("MEMORY_MCP_STREAMING", "on").lower() in ("1", "true", "on")
 
 # 文件配置
 MAX_FILE_SIZE = 1000  # 字数限制
 MEMORIES_DIR_NAME = ".memories"
+MEMORIES_DB_NAME = "memories.db"  # sqlite 存储后端的数据库文件（位于 .memories 下）
 
 FUZZY_MATCH_THRESHOLD = 0.8  # 关键字模糊匹配阈值
+LIST_CACHE_SIZE = 256  # list 查询结果缓存条数
+LIST_PAGE_SIZE = 10  # list_memories 每页条数
+# 已加载 memory 内容的内存预算（字节），超出后按 LRU 淘汰
+CONTENT_CACHE_MAX_BYTES = int(
+    os.getenv("MEMORY_MCP_CONTENT_CACHE_BYTES", str(64 * 1024 * 1024))
+)
+# memory 文件写入的持久化级别：none / batch（组提交，共享目录 fsync）/ per-write
+WRITE_DURABILITY = os.getenv("MEMORY_MCP_DURABILITY", "batch")
+# memory 存储后端：file（每个 memory 一个 Markdown 文件）或 sqlite
+STORAGE_BACKEND = os.getenv("MEMORY_MCP_STORAGE", "file")
+# 监视 .memories 中的外部修改：off / auto（inotify，不可用时轮询）/ inotify / poll
+WATCH_MODE = os.getenv("MEMORY_MCP_WATCH", "off")
+WATCH_DEBOUNCE_SECONDS = 0.1  # 合并这段时间内的文件事件
+WATCH_POLL_INTERVAL_SECONDS = 2.0  # 轮询模式的扫描间隔
+# 启动后在后台预热：按访问次数加载内容并建立全文索引（1/true/on 开启）
+WARMUP_ENABLED = os.getenv("MEMORY_MCP_WARMUP", "off").lower() in ("1", "true", "on")
+WARMUP_BATCH_SIZE = 32  # 预热时每批并发加载的 memory 数
+# 语义验证结果缓存：相同关键词组 + 内容的判定在有效期内直接复用
+VALIDATION_CACHE_TTL_SECONDS = 30 * 24 * 3600
+VALIDATION_CACHE_MAX_ENTRIES = 4096
+# 语义验证批处理：已有判定在进行时，这段时间内到达的验证请求合并为一次 LLM 判定（每批至多若干项）
+VALIDATION_BATCH_WINDOW_SECONDS = 0.05
+VALIDATION_BATCH_MAX_ITEMS = 8
+# 本地预验证：明显不合格的内容直接拒绝，不调用 LLM（1/true/on 开启）
+PREVALIDATE_ENABLED = os.getenv("MEMORY_MCP_PREVALIDATE", "on").lower() in ("1", "true", "on")
+PREVALIDATE_MAX_CODE_LINES = 15  # 超过该行数的代码块与源码位置/URL 同时出现时直接拒绝
+PREVALIDATE_REJECT_OVERLAP = 0.0  # 关键词覆盖率 ≤ 该值时直接拒绝（仅限以非中文为主的内容）
+PREVALIDATE_MAX_CJK_RATIO = 0.2  # 中文字符占比低于该值才视为以非中文为主
+# 部分更新只验证修改处及前后若干字符；修改量超过全文的该比例时退回全文验证
+EDIT_VALIDATION_CONTEXT_CHARS = 300
+EDIT_VALIDATION_MAX_RATIO = 0.3
+# list 的打分方式：substring（所有命中等权，默认）或 idf（常见关键词降权）
+MATCH_SCORER = os.getenv("MEMORY_MCP_MATCH_SCORER", "substring")
 
 AUTO_SHUTDOWN_IDLE_SECONDS = 10  # 10秒 无活动后自动退出
 AUTO_SHUTDOWN_CHECK_INTERVAL_SECONDS = 5  # 每 5 秒检查一次
@@ -0,0 +1,50 @@
+"""访问统计 - 持久化在缓存目录中的 memory 读取次数，用于预热排序"""
+
+from collections import Counter
+from pathlib import Path
+
+from ... import file_manager
+
+
+class AccessStats:
+    """各 memory（按存储名）被读取的累计次数
+
+    - 文件丢失或损坏时从零开始计数；修改后由 save() 写回
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._counts: Counter[str] = Counter()
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        counts = file_manager.load_json_cache(
+            self._path, lambda data: Counter({str(k): int(v) for k, v in data.items()})
+        )
+        if counts is not None:
+            self._counts = counts
+
+    def count(self, name: str) -> int:
+        return self._counts[name]
+
+    def hit(self, name: str) -> None:
+        self._counts[name] += 1
+        self._dirty = True
+
+    def rename(self, old_name: str, new_name: str) -> None:
+        count = self._counts.pop(old_name, 0)
+        if count:
+            self._counts[new_name] += count
+            self._dirty = True
+
+    def discard(self, name: str) -> None:
+        if self._counts.pop(name, None) is not None:
+            self._dirty = True
+
+    def save(self) -> None:
+        """写回统计（无修改时跳过）"""
+        if not self._dirty:
+            return
+        file_manager.save_json_cache(self._path, dict(self._counts))
+        self._dirty = False
@@ -0,0 +1,92 @@
+"""Memory 内容缓存 - 按字节预算淘汰已加载的 memory 内容"""
+
+import sys
+import asyncio
+from collections import OrderedDict
+from typing import Protocol
+
+
+class Evictable(Protocol):
+    lock: asyncio.Lock
+
+    @property
+    def is_loaded(self) -> bool: ...
+
+    @property
+    def content(self) -> str: ...
+
+    async def load(self) -> str: ...
+
+    def unload(self) -> None: ...
+
+
+class ContentCache:
+    """已加载内容的 LRU 记账
+
+    - 内容本身仍保存在各 Memory 对象上，这里只记录访问顺序和占用字节数
+    - 超出预算时按 LRU 顺序调用 unload() 丢弃内容，下次访问时再从文件加载
+    - 最近访问的一项永远保留（即使单项超过预算）
+    - 锁被持有的项正在写入，不会被淘汰（否则读取会从文件加载到写入前的旧内容）
+    """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._sizes: OrderedDict[Evictable, int] = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, memory: Evictable) -> str:
+        """读取内容（必要时从文件加载），并记为最近使用"""
+        if memory.is_loaded:
+            self.hits += 1
+        else:
+            self.misses += 1
+        content = await memory.load()
+        self._touch(memory, content)
+        return content
+
+    def put(self, memory: Evictable) -> None:
+        """记录刚写入的内容（不计入命中统计）"""
+        if memory.is_loaded:
+            self._touch(memory, memory.content)
+
+    def __contains__(self, memory: Evictable) -> bool:
+        return memory in self._sizes
+
+    @property
+    def is_full(self) -> bool:
+        return self._total_bytes >= self._max_bytes
+
+    def discard(self, memory: Evictable) -> None:
+        """memory 已从 registry 移除时调用（不会 unload）"""
+        size = self._sizes.pop(memory, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _touch(self, memory: Evictable, content: str) -> None:
+        self.discard(memory)
+        size = sys.getsizeof(content)
+        self._sizes[memory] = size
+        self._total_bytes += size
+
+        while self._total_bytes > self._max_bytes:
+            victim = next(
+                (m for m in self._sizes if m is not memory and not m.lock.locked()), None
+            )
+            if victim is None:
+                break
+            self._total_bytes -= self._sizes.pop(victim)
+            victim.unload()
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._sizes),
+            "bytes": self._total_bytes,
+            "max_bytes": self._max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,114 @@
+"""记忆内容全文索引 - 增量维护的 BM25 倒排索引"""
+
+import math
+import re
+from typing import NamedTuple
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+SNIPPET_WIDTH = 80
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """分词：英文/数字按单词（小写），中文按相邻字符二元组（单字保留原字）"""
+    tokens = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if "\u4e00" <= run[0] <= "\u9fff" and len(run) > 1:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def make_snippet(text: str, terms: list[str], width: int = SNIPPET_WIDTH) -> str:
+    """截取第一个命中词附近的一小段内容作为摘要"""
+    lowered = text.lower()
+    positions = [pos for term in terms if (pos := lowered.find(term)) >= 0]
+    center = min(positions) if positions else 0
+
+    start = max(center - width // 2, 0)
+    end = min(start + width, len(text))
+    snippet = " ".join(text[start:end].split())
+    if start > 0:
+        snippet = "…" + snippet
+    if end < len(text):
+        snippet += "…"
+    return snippet
+
+
+class ContentHit(NamedTuple):
+    keywords: frozenset[str]
+    score: float
+    snippet: str
+
+
+class ContentIndex:
+    """BM25 全文索引（以 memory 的关键词组为文档主键）
+
+    - add/remove 增量维护 posting、文档长度和总长度
+    - search 只访问包含查询词的文档
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self._k1 = k1
+        self._b = b
+        self._postings: dict[str, dict[frozenset[str], int]] = {}
+        self._doc_terms: dict[frozenset[str], dict[str, int]] = {}
+        self._doc_len: dict[frozenset[str], int] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, key: frozenset[str]) -> bool:
+        return key in self._doc_len
+
+    def add(self, key: frozenset[str], content: str) -> None:
+        """加入或替换一个文档"""
+        self.remove(key)
+
+        term_freqs: dict[str, int] = {}
+        tokens = tokenize(content)
+        for token in tokens:
+            term_freqs[token] = term_freqs.get(token, 0) + 1
+
+        for term, tf in term_freqs.items():
+            self._postings.setdefault(term, {})[key] = tf
+        self._doc_terms[key] = term_freqs
+        self._doc_len[key] = len(tokens)
+        self._total_len += len(tokens)
+
+    def remove(self, key: frozenset[str]) -> None:
+        term_freqs = self._doc_terms.pop(key, None)
+        if term_freqs is None:
+            return
+
+        for term in term_freqs:
+            posting = self._postings[term]
+            del posting[key]
+            if not posting:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(key)
+
+    def search(self, query: str, limit: int) -> list[tuple[frozenset[str], float]]:
+        """返回按 BM25 得分降序排列的 (关键词组, 得分)"""
+        doc_count = len(self._doc_len)
+        if doc_count == 0:
+            return []
+        avg_len = self._total_len / doc_count or 1.0
+
+        scores: dict[frozenset[str], float] = {}
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for key, tf in posting.items():
+                norm = self._k1 * (1 - self._b + self._b * self._doc_len[key] / avg_len)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (self._k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        return ranked[:limit]
@@ -0,0 +1,160 @@
+"""文件存储后端 - 一个 memory 一个 Markdown 文件"""
+
+import asyncio
+from collections.abc import Hashable
+from pathlib import Path
+
+from rusty_results.prelude import Err, Ok
+
+from ... import file_manager
+from ..config import MEMORIES_DIR_NAME, WRITE_DURABILITY
+from ..logger import logger
+from .manifest import FileIdentity, Manifest
+from .storage import Storage, StoredMemory, memory_name
+from .validators import validate_keywords
+
+
+def extract_keywords_from_filename(name: str) -> frozenset:
+    """从文件名提取 keywords set
+
+    Args:
+        filename: 文件名（例如 "api-design-patterns"）
+
+    Returns:
+        keywords 的 frozenset（无顺序）
+    """
+
+    # 按连字符分割
+    keywords = name.split("-")
+    # 返回 frozenset（无顺序，可哈希）
+    return frozenset(keywords)
+
+
+class FileStorage(Storage):
+    """文件存储：<project>/.memories/<排序后的关键词用 - 连接>.md
+
+    - revision 为文件身份（size, mtime_ns, ino）
+    - _manifest 缓存文件名对应的关键词组、文件身份和版本号，启动时只解析新文件
+    - 写入按 durability 原子替换（见 file_manager.DURABILITY_MODES）
+    """
+
+    def __init__(self, project_root: Path, durability: str = WRITE_DURABILITY):
+        self._memories_dir = project_root / MEMORIES_DIR_NAME
+        self._durability = durability
+        self._manifest = Manifest(file_manager.get_manifest_file(project_root))
+
+    def _path(self, keywords: frozenset[str]) -> Path:
+        return self._memories_dir / f"{memory_name(keywords)}.md"
+
+    def scan(self) -> list[StoredMemory]:
+        """单次 scandir 列出文件名；已记录在清单中的文件名直接复用其关键词组，
+        只有新出现的文件才需要解析和验证。
+        """
+        names = file_manager.list_markdown_names(self._memories_dir)
+        stored = []
+        parsed = 0
+        for name in names:
+            entry = self._manifest.get(name)
+            if entry is not None:
+                stored.append(StoredMemory(entry.keywords, entry.version, entry.identity))
+                continue
+
+            match validate_keywords(extract_keywords_from_filename(name)):
+                case Ok(keywords):
+                    pass
+                case Err(_):
+                    continue
+            stat = (self._memories_dir / f"{name}.md").stat()
+            self._manifest.record(name, keywords, FileIdentity.of(stat))
+            stored.append(StoredMemory(keywords, None, None))
+            parsed += 1
+
+        self._manifest.retain(set(names))
+        self._manifest.save()
+        logger.debug(f"[FileStorage] Parsed {parsed} new files")
+        return stored
+
+    async def read(self, keywords: frozenset[str]) -> tuple[str, Hashable]:
+        file_path = self._path(keywords)
+        # 先 stat 再读取：读取期间文件若被修改，下次检查身份时会重新加载
+        identity = FileIdentity.of(await file_manager.astat(file_path))
+        content = await file_manager.aread_file(file_path)
+        return content, identity
+
+    async def write(
+        self, keywords: frozenset[str], content: str, version: str
+    ) -> Hashable:
+        file_path = self._path(keywords)
+        await file_manager.awrite_file(file_path, content, self._durability)
+        identity = FileIdentity.of(await file_manager.astat(file_path))
+        self._manifest.record(memory_name(keywords), keywords, identity, version)
+        return identity
+
+    async def write_many(self, items: list[tuple[frozenset[str], str, str]]) -> None:
+        """并发写入，batch 模式下同一窗口内的写入合并为一次组提交
+
+        同一关键词组出现多次时只写入最后一次（并发写入不保证先后）
+        """
+        latest = {keywords: (content, version) for keywords, content, version in items}
+        await asyncio.gather(
+            *(
+                self.write(keywords, content, version)
+                for keywords, (content, version) in latest.items()
+            )
+        )
+
+    async def delete(self, keywords: frozenset[str]) -> None:
+        await file_manager.aunlink(self._path(keywords))
+        self._manifest.discard(memory_name(keywords))
+
+    async def revision(self, keywords: frozenset[str]) -> Hashable | None:
+        try:
+            stat = await file_manager.astat(self._path(keywords))
+        except FileNotFoundError:
+            return None
+        return FileIdentity.of(stat)
+
+    @property
+    def watch_directory(self) -> Path | None:
+        return self._memories_dir
+
+    async def refresh(
+        self, names: set[str] | None
+    ) -> list[tuple[frozenset[str], StoredMemory | None]]:
+        if names is None:
+            listed = await asyncio.to_thread(
+                file_manager.list_markdown_names, self._memories_dir
+            )
+            names = set(listed) | self._manifest.entries.keys()
+
+        changes = []
+        for name in names:
+            match validate_keywords(extract_keywords_from_filename(name)):
+                case Ok(keywords):
+                    pass
+                case Err(_):
+                    continue
+            if memory_name(keywords) != name:  # 非规范文件名无法按关键词组读取
+                continue
+
+            try:
+                stat = await file_manager.astat(self._memories_dir / f"{name}.md")
+            except FileNotFoundError:
+                self._manifest.discard(name)
+                changes.append((keywords, None))
+                continue
+
+            identity = FileIdentity.of(stat)
+            entry = self._manifest.get(name)
+            version = entry.version if entry and entry.identity == identity else None
+            self._manifest.record(name, keywords, identity, version)
+            changes.append((keywords, StoredMemory(keywords, version, identity)))
+        return changes
+
+    def record_version(
+        self, keywords: frozenset[str], version: str, revision: Hashable
+    ) -> None:
+        self._manifest.record(memory_name(keywords), keywords, revision, version)  # type: ignore
+
+    def flush(self) -> None:
+        self._manifest.save()
@@ -0,0 +1,101 @@
+"""关键词模糊匹配 - 编辑距离与 BK-tree"""
+
+
+def levenshtein(a: str, b: str) -> int:
+    """计算两个字符串的编辑距离"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        previous = current
+    return previous[-1]
+
+
+def similarity(a: str, b: str) -> float:
+    """基于编辑距离的相似度（1.0 表示完全相同）"""
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 1.0
+    return 1 - levenshtein(a, b) / longest
+
+
+class _Node:
+    __slots__ = ("word", "alive", "children")
+
+    def __init__(self, word: str):
+        self.word = word
+        self.alive = True
+        self.children: dict[int, _Node] = {}
+
+
+class BKTree:
+    """编辑距离上的 BK-tree
+
+    - 删除采用惰性标记（节点保留用于导航），再次加入时恢复
+    - search 利用三角不等式只访问距离区间内的子树
+    """
+
+    def __init__(self):
+        self._root: _Node | None = None
+        self._nodes: dict[str, _Node] = {}
+
+    def add(self, word: str) -> None:
+        node = self._nodes.get(word)
+        if node is not None:
+            node.alive = True
+            return
+
+        new_node = _Node(word)
+        self._nodes[word] = new_node
+        if self._root is None:
+            self._root = new_node
+            return
+
+        node = self._root
+        while True:
+            dist = levenshtein(word, node.word)
+            child = node.children.get(dist)
+            if child is None:
+                node.children[dist] = new_node
+                return
+            node = child
+
+    def remove(self, word: str) -> None:
+        node = self._nodes.get(word)
+        if node is not None:
+            node.alive = False
+
+    def search(self, word: str, radius: int) -> list[tuple[int, str]]:
+        """返回编辑距离 ≤ radius 的所有 (距离, 词)"""
+        if self._root is None:
+            return []
+
+        result = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            dist = levenshtein(word, node.word)
+            if dist <= radius and node.alive:
+                result.append((dist, node.word))
+            for child_dist, child in node.children.items():
+                if dist - radius <= child_dist <= dist + radius:
+                    stack.append(child)
+        return result
+
+    def closest(self, word: str, threshold: float) -> str | None:
+        """返回相似度 ≥ threshold 的最相似词（不存在时返回 None）"""
+        if not word or threshold <= 0:
+            return None
+        # similarity ≥ t 且 dist ≥ |len(a) - len(b)| 可推出 dist ≤ (1 - t) * len(word) / t
+        radius = int((1 - threshold) * len(word) / threshold + 1e-9)
+        best = None
+        for _, candidate in self.search(word, radius):
+            score = similarity(word, candidate)
+            if score >= threshold and (best is None or (-score, candidate) < best):
+                best = (-score, candidate)
+        return best[1] if best else None
@@ -0,0 +1,123 @@
+"""关键词倒排索引 - 基于字符 n-gram 的子串候选检索"""
+
+from collections.abc import Iterable
+
+from .fuzzy import BKTree
+
+NGRAM_SIZE = 3
+
+
+def _grams(text: str, size: int) -> set[str]:
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+class KeywordIndex:
+    """memory 关键词的字符 n-gram 倒排索引
+
+    - 关键词驻留：相同关键词只索引一次，同时记录包含它的 memory 集合
+    - 每个关键词按长度 1..n 的所有子串建立 posting；长度 >= n 的查询词取其
+      n-gram posting 的交集，更短的查询词直接查对应长度的 gram
+    - 候选关键词最后做一次真实的子串检查，与 matcher.score_match 语义一致
+    - 记录 memory 的加入顺序，用于复现字典遍历顺序下的稳定排序
+    - 驻留关键词同时存入 BK-tree，用于拼写纠错
+    """
+
+    def __init__(self, ngram_size: int = NGRAM_SIZE):
+        self._n = ngram_size
+        self._postings: dict[str, set[str]] = {}
+        self._members: dict[str, set[frozenset[str]]] = {}
+        self._order: dict[frozenset[str], int] = {}
+        self._seq = 0
+        self._fuzzy = BKTree()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, key: frozenset[str]) -> bool:
+        return key in self._order
+
+    def add(self, key: frozenset[str]) -> None:
+        """加入一个 memory（以其关键词组为主键）"""
+        if key in self._order:
+            return
+        self._order[key] = self._seq
+        self._seq += 1
+
+        for kw in key:
+            members = self._members.get(kw)
+            if members is None:
+                members = self._members[kw] = set()
+                self._fuzzy.add(kw)
+                for size in range(1, self._n + 1):
+                    for gram in _grams(kw, size):
+                        self._postings.setdefault(gram, set()).add(kw)
+            members.add(key)
+
+    def remove(self, key: frozenset[str]) -> None:
+        """移除一个 memory，不再被任何 memory 使用的关键词同时移出索引"""
+        if self._order.pop(key, None) is None:
+            return
+
+        for kw in key:
+            members = self._members[kw]
+            members.discard(key)
+            if members:
+                continue
+            del self._members[kw]
+            self._fuzzy.remove(kw)
+            for size in range(1, self._n + 1):
+                for gram in _grams(kw, size):
+                    posting = self._postings[gram]
+                    posting.discard(kw)
+                    if not posting:
+                        del self._postings[gram]
+
+    def matching_keywords(self, query_kw: str) -> set[str]:
+        """返回所有包含 query_kw 作为子串的已索引关键词"""
+        if not query_kw:
+            return set()
+
+        if len(query_kw) <= self._n:
+            return set(self._postings.get(query_kw, ()))
+
+        postings = []
+        for gram in _grams(query_kw, self._n):
+            posting = self._postings.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                return result
+        return {kw for kw in result if query_kw in kw}
+
+    def correct(self, keyword: str, threshold: float) -> str | None:
+        """已索引的关键词原样返回；否则返回相似度 ≥ threshold 的最接近关键词"""
+        if keyword in self._members:
+            return keyword
+        return self._fuzzy.closest(keyword, threshold)
+
+    def document_frequency(self, keyword: str) -> int:
+        """使用该关键词的 memory 数（随 add/remove 增量维护）"""
+        members = self._members.get(keyword)
+        return len(members) if members else 0
+
+    def members(self, keyword: str) -> set[frozenset[str]]:
+        """返回使用该关键词的 memory 集合"""
+        return self._members.get(keyword, set())
+
+    def candidates(self, query_keywords: Iterable[str]) -> set[frozenset[str]]:
+        """返回至少有一个关键词包含某个查询词的 memory 集合"""
+        result: set[frozenset[str]] = set()
+        for query_kw in set(query_keywords):
+            for kw in self.matching_keywords(query_kw):
+                result |= self._members[kw]
+        return result
+
+    def order(self, key: frozenset[str]) -> int:
+        """memory 的加入序号（越小越早）"""
+        return self._order[key]
@@ -0,0 +1,116 @@
+"""Memory 清单 - 持久化在缓存目录中的元数据，加速后端启动"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import NamedTuple
+
+from ... import file_manager
+from ..logger import logger
+
+MANIFEST_FORMAT = 2
+
+
+class FileIdentity(NamedTuple):
+    """文件身份：三者都不变时认为内容未变"""
+
+    size: int
+    mtime_ns: int
+    ino: int
+
+    @classmethod
+    def of(cls, stat: os.stat_result) -> "FileIdentity":
+        return cls(stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+@dataclass
+class ManifestEntry:
+    """单个 memory 文件的元数据（以文件名去掉 .md 为键）"""
+
+    keywords: frozenset[str]
+    identity: FileIdentity
+    version: str | None = None  # 该文件身份对应的内容版本号，未知时为 None
+
+
+def _parse_entries(data: dict) -> dict[str, ManifestEntry]:
+    if data.get("format") != MANIFEST_FORMAT:
+        return {}
+    return {
+        name: ManifestEntry(
+            keywords=frozenset(item["keywords"]),
+            identity=FileIdentity(item["size"], item["mtime_ns"], item["ino"]),
+            version=item.get("version"),
+        )
+        for name, item in data["entries"].items()
+    }
+
+
+class Manifest:
+    """memory 文件清单
+
+    - 只记录通过 keywords 验证的文件，命中清单的文件名无需重新解析和验证
+    - 同时记录内容版本号及其对应的文件身份，版本检查只需一次 stat
+    - 文件系统永远是真相来源：清单丢失、损坏或格式过期时退化为全量解析
+    - 修改后由 save() 写回
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self.entries: dict[str, ManifestEntry] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        entries = file_manager.load_json_cache(self._path, _parse_entries)
+        if entries is not None:
+            self.entries = entries
+
+    def get(self, name: str) -> ManifestEntry | None:
+        return self.entries.get(name)
+
+    def record(
+        self,
+        name: str,
+        keywords: frozenset[str],
+        identity: FileIdentity,
+        version: str | None = None,
+    ) -> None:
+        """记录（或刷新）一个文件的元数据"""
+        entry = ManifestEntry(keywords=keywords, identity=identity, version=version)
+        if self.entries.get(name) != entry:
+            self.entries[name] = entry
+            self._dirty = True
+
+    def discard(self, name: str) -> None:
+        if self.entries.pop(name, None) is not None:
+            self._dirty = True
+
+    def retain(self, names: set[str]) -> None:
+        """移除不在 names 中的条目（文件已被外部删除）"""
+        stale = self.entries.keys() - names
+        for name in stale:
+            del self.entries[name]
+        if stale:
+            self._dirty = True
+
+    def save(self) -> None:
+        """写回清单（无修改时跳过）"""
+        if not self._dirty:
+            return
+
+        data = {
+            "format": MANIFEST_FORMAT,
+            "entries": {
+                name: {
+                    "keywords": sorted(entry.keywords),
+                    "size": entry.identity.size,
+                    "mtime_ns": entry.identity.mtime_ns,
+                    "ino": entry.identity.ino,
+                    "version": entry.version,
+                }
+                for name, entry in self.entries.items()
+            },
+        }
+        file_manager.save_json_cache(self._path, data)
+        self._dirty = False
+        logger.debug(f"[Manifest] Saved {len(self.entries)} entries")
@@ -1,3 +1,12 @@
+import math
+from collections.abc import Callable, Iterable
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖（pip install memory-mcp[fast]）
+    np = None
+
+
 def score_match(query_keywords: list[str], mem_keywords: frozenset) -> float:
     score = 0.0
     mem_keywords_list = list(mem_keywords)
@@ -8,3 +17,106 @@ def score_match(query_keywords: list[str], mem_keywords: frozenset) -> float:
                 score += len(query_kw) / len(mem_kw)
 
     return score
+
+
+def idf(df: int, total: int) -> float:
+    """关键词的逆文档频率（BM25 形式，恒为正）"""
+    return math.log(1 + (total - df + 0.5) / (df + 0.5))
+
+
+def score_match_idf(
+    query_keywords: list[str],
+    mem_keywords: frozenset,
+    keyword_idf: Callable[[str], float],
+) -> float:
+    """score_match 的 IDF 加权版本：命中越常见的关键词，贡献越小"""
+    score = 0.0
+
+    for query_kw in query_keywords:
+        for mem_kw in mem_keywords:
+            if query_kw in mem_kw:
+                score += len(query_kw) / len(mem_kw) * keyword_idf(mem_kw)
+
+    return score
+
+
+def _score_substring(
+    query_keywords: list[str],
+    mem_keywords: frozenset,
+    keyword_idf: Callable[[str], float],
+) -> float:
+    return score_match(query_keywords, mem_keywords)
+
+
+Scorer = Callable[[list[str], frozenset, Callable[[str], float]], float]
+
+SCORERS: dict[str, Scorer] = {
+    "substring": _score_substring,
+    "idf": score_match_idf,
+}
+
+
+def select_scorer(name: str) -> Scorer:
+    """按名称选择打分函数（substring 或 idf）"""
+    try:
+        return SCORERS[name]
+    except KeyError:
+        raise ValueError(
+            f"未知的打分方式 '{name}'，可选: {', '.join(SCORERS)}"
+        ) from None
+
+
+class KeywordTable:
+    """批量打分引擎：把所有 memory 的关键词打包成数组，一次向量化计算整个查询
+
+    - 关键词驻留为 id，_lengths[id] 为其长度
+    - memory → 关键词采用 CSR 布局：_indices[_offsets[i]:_offsets[i + 1]]
+    - 每个查询词只在去重后的词表上做一次子串匹配，再按 id 汇总到各 memory
+
+    结果与逐个调用 score_match 相同（浮点求和顺序不同，仅有舍入误差）。
+    """
+
+    def __init__(self, keys: Iterable[frozenset[str]]):
+        if np is None:
+            raise RuntimeError("KeywordTable 需要 numpy，请安装 memory-mcp[fast]")
+
+        self.keys: list[frozenset[str]] = list(keys)
+
+        kw_ids: dict[str, int] = {}
+        offsets = [0]
+        indices: list[int] = []
+        for key in self.keys:
+            for kw in key:
+                indices.append(kw_ids.setdefault(kw, len(kw_ids)))
+            offsets.append(len(indices))
+
+        self._vocab = np.array(list(kw_ids), dtype=str)
+        self._lengths = np.array([len(kw) for kw in kw_ids], dtype=np.float64)
+        self._offsets = np.array(offsets, dtype=np.int64)
+        self._indices = np.array(indices, dtype=np.int64)
+        self._rows = np.repeat(
+            np.arange(len(self.keys), dtype=np.int64), np.diff(self._offsets)
+        )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def scores(self, query_keywords: Iterable[str]):
+        """返回每个 memory 的得分数组（与 self.keys 一一对应）"""
+        weights = np.zeros(len(self._vocab), dtype=np.float64)
+        for query_kw in query_keywords:
+            if not query_kw or len(self._vocab) == 0:
+                continue
+            hit = np.char.find(self._vocab, query_kw) >= 0
+            weights[hit] += len(query_kw) / self._lengths[hit]
+
+        return np.bincount(
+            self._rows, weights=weights[self._indices], minlength=len(self.keys)
+        )
+
+    def rank(self, query_keywords: Iterable[str]) -> list[frozenset[str]]:
+        """按得分降序返回匹配的 memory（同分保持原顺序）"""
+        scores = self.scores(query_keywords)
+        matched = np.flatnonzero(scores > 0)
+        order = matched[np.argsort(-scores[matched], kind="stable")]
+        return [self.keys[i] for i in order]
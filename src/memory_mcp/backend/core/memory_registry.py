@@ -1,87 +1,213 @@
 """记忆注册表 - 数据访问层（Repository Pattern）"""
 
 import asyncio
+import base64
+import contextlib
 import hashlib
-from collections.abc import Iterable
+import heapq
+import itertools
+import json
+from collections import Counter
+from collections.abc import Hashable, Iterable
 from pathlib import Path
 from typing import NamedTuple
 
 from rusty_results.prelude import Err, Ok, Result
 
 from ... import file_manager
-from ..config import MEMORIES_DIR_NAME
+from ..config import (
+    CONTENT_CACHE_MAX_BYTES,
+    FUZZY_MATCH_THRESHOLD,
+    LIST_CACHE_SIZE,
+    MATCH_SCORER,
+    STORAGE_BACKEND,
+    WARMUP_BATCH_SIZE,
+)
 from ..logger import logger
 from . import matcher
+from .access_stats import AccessStats
+from .content_cache import ContentCache
+from .content_index import ContentHit, ContentIndex, make_snippet, tokenize
+from .keyword_index import KeywordIndex
+from .query_cache import QueryCache
+from .storage import Storage, StoredMemory, memory_name, open_storage
 from .validators import (
+    ContentEdit,
     FailureHint,
+    splice_word_count,
     validate_content_size,
     validate_keywords,
     validate_semantics,
+    validate_semantics_edit,
 )
+from .watcher import MemoryWatcher
 
 
 class Memory:
     """Memory 状态封装：keywords(不可变主键), content(可变), version(自动维护), lock(异步锁)
 
-    - 文件 I/O 由 Memory 自己管理
-    - 延迟加载：首次访问 content/version 时才从文件读取
+    - 持久化通过 Storage 后端完成，I/O 全部在后台线程中异步执行
+    - 延迟加载：首次 await load() 时才从存储读取；并发的 load() 合并为一次读取
+    - version 与其对应的存储 revision 一起记录；已知版本号且 revision 未变时，
+      get_version() 只需查询一次 revision（文件后端为一次 stat），无需读取内容
+    - content/version 属性不做 I/O，使用前需先 await load()/get_version()
     """
 
-    def __init__(self, keywords: frozenset[str], project_root: Path):
+    def __init__(
+        self,
+        keywords: frozenset[str],
+        storage: Storage,
+        version: str | None = None,
+        revision: Hashable | None = None,
+    ):
         """创建 Memory 对象（不做验证，只设置字段）
 
         验证应在工厂方法 Memory.create() 中完成。
+
+        Args:
+            version: 已持久化的版本号，需与 revision 一起提供
+            revision: version 对应的存储修订标记
         """
         self._keywords = keywords
-        self._project_root = project_root
+        self._storage = storage
         self._loaded = False
         self._content: str | None = None
-        self._version: str | None = None
+        self._version = version if revision is not None else None
+        self._revision = revision if version is not None else None
+        self._load_task: asyncio.Task[str] | None = None
+        self._word_count: tuple[str, int] | None = None  # (version, 该版本内容的字数)
         self.lock = asyncio.Lock()
 
     @property
     def keywords(self) -> frozenset[str]:
         return self._keywords
 
+    @property
+    def name(self) -> str:
+        """文件名（不含 .md）：排序后的 keywords 用连字符连接"""
+        return memory_name(self._keywords)
+
     @property
     def content(self) -> str:
+        """已加载的内容（未加载时抛出 RuntimeError）"""
         if not self._loaded:
-            self._load_from_file()
+            raise RuntimeError(f"Memory {self.name} 的内容尚未加载")
         return self._content  # type: ignore
 
-    async def set_content(self, new_content: str) -> Result[None, FailureHint]:
-        """设置新内容，自动验证大小、相关性并写入文件"""
-        match validate_content_size(new_content):
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    async def load(self) -> str:
+        """加载并返回内容（已加载时直接返回，并发调用共享同一次读取）"""
+        if self._loaded:
+            return self._content  # type: ignore
+
+        if self._load_task is None:
+            self._load_task = asyncio.create_task(self._load_from_storage())
+            self._load_task.add_done_callback(self._clear_load_task)
+        return await asyncio.shield(self._load_task)
+
+    async def peek(self) -> str:
+        """读取内容但不改变加载状态：已加载或正在加载时复用，否则直接读取存储"""
+        if self._loaded:
+            return self._content  # type: ignore
+        if self._load_task is not None:
+            return await asyncio.shield(self._load_task)
+        content, _ = await self._storage.read(self._keywords)
+        return content
+
+    def _clear_load_task(self, task: asyncio.Task) -> None:
+        if self._load_task is task:
+            self._load_task = None
+
+    def invalidate(self, version: str | None, revision: Hashable | None) -> None:
+        """存储中的内容已在外部改变：丢弃内容，改用存储给出的版本信息"""
+        self.unload()
+        self._version = version if revision is not None else None
+        self._revision = revision if version is not None else None
+
+    def unload(self) -> None:
+        """丢弃已加载的内容（保留 version 及其 revision），下次访问时重新加载"""
+        self._content = None
+        self._loaded = False
+
+    async def set_content(
+        self, new_content: str, edit: ContentEdit | None = None
+    ) -> Result[None, FailureHint]:
+        """设置新内容，自动验证大小、相关性并写入存储
+
+        edit 为产生新内容的那次替换时，字数由当前字数增量得出，
+        语义验证也只检查修改处附近的片段
+        """
+        word_count = self._spliced_word_count(edit) if edit is not None else None
+        match validate_content_size(new_content, word_count):
             case Err(e):
                 return Err(e)
+            case Ok(word_count):
+                pass
 
-        match await validate_semantics(new_content, self._keywords):
+        if edit is None:
+            semantics = await validate_semantics(new_content, self._keywords)
+        else:
+            semantics = await validate_semantics_edit(new_content, self._keywords, edit)
+        match semantics:
             case Err(e):
                 return Err(e)
 
         self._content = new_content
         self._version = self._generate_version()
+        self._word_count = (self._version, word_count)
         self._loaded = True
-        self._save_to_file()
+        await self._save_to_storage()
 
         return Ok(None)
 
+    def _spliced_word_count(self, edit: ContentEdit) -> int | None:
+        """当前内容的字数已知时，增量计算应用 edit 后的字数"""
+        if not self._loaded or self._word_count is None:
+            return None
+        version, word_count = self._word_count
+        if version != self._version:
+            return None
+        return splice_word_count(self._content, word_count, edit)  # type: ignore
+
     @property
     def version(self) -> str:
-        if not self._loaded:
-            self._load_from_file()
+        """已知的版本号（未知时抛出 RuntimeError）"""
+        if self._version is None:
+            raise RuntimeError(f"Memory {self.name} 的版本号尚未加载")
+        return self._version
+
+    async def get_version(self) -> str:
+        """获取当前版本号：持久化的版本号仍有效时只查询 revision，否则加载内容"""
+        if not self._loaded and not await self._stored_version_valid():
+            await self.load()
         return self._version  # type: ignore
 
+    @property
+    def version_record(self) -> tuple[str, Hashable] | None:
+        """已知的 (version, revision)，不触发任何 I/O"""
+        if self._version is None or self._revision is None:
+            return None
+        return self._version, self._revision
+
+    async def _stored_version_valid(self) -> bool:
+        """未加载内容时，检查持久化的版本号是否仍对应存储中的内容"""
+        if self._version is None or self._revision is None:
+            return False
+        return await self._storage.revision(self._keywords) == self._revision
+
     def snapshot(self) -> "MemorySnapShot":
-        """获取 Memory 的快照对象"""
+        """获取 Memory 的快照对象（内容需已加载）"""
         return MemorySnapShot(
             keywords=self.keywords,
             content=self.content,
             version=self.version,
         )
 
-    def check_version(self, version: str) -> Result[None, FailureHint]:
-        if self.version == version:
+    async def check_version(self, version: str) -> Result[None, FailureHint]:
+        if await self.get_version() == version:
             return Ok(None)
         else:
             return Err(
@@ -99,34 +225,32 @@ class Memory:
         hash_obj = hashlib.sha256(combined.encode("utf-8"))
         return hash_obj.hexdigest()[:8]
 
-    def _get_file_path(self) -> Path:
-        sorted_keywords = sorted(self._keywords)
-        filename = "-".join(sorted_keywords) + ".md"
-        return self._project_root / MEMORIES_DIR_NAME / filename
-
-    def _load_from_file(self) -> None:
-        file_path = self._get_file_path()
-        self._content = file_manager.read_file(file_path)
-        self._version = self._generate_version()
-        self._loaded = True
+    async def _load_from_storage(self) -> str:
+        content, revision = await self._storage.read(self._keywords)
+        if not self._loaded:  # 读取期间可能已写入了新内容
+            self._content = content
+            self._version = self._generate_version()
+            self._revision = revision
+            self._loaded = True
+        return self._content  # type: ignore
 
-    def _save_to_file(self) -> None:
+    async def _save_to_storage(self) -> None:
         if not self._loaded:
             return
-        file_path = self._get_file_path()
-        file_manager.write_file(file_path, self._content)  # type: ignore
+        self._revision = await self._storage.write(
+            self._keywords, self._content, self._version  # type: ignore
+        )
 
-    def delete_file(self) -> None:
-        file_path = self._get_file_path()
-        file_path.unlink(missing_ok=True)
+    async def delete_from_storage(self) -> None:
+        await self._storage.delete(self._keywords)
 
     @classmethod
     async def create(
-        cls, keywords: Iterable[str], content: str, project_root: Path
+        cls, keywords: Iterable[str], content: str, storage: Storage
     ) -> Result["Memory", FailureHint]:
         """创建新 Memory 的工厂方法（包含完整验证：keywords, content 大小, LLM 相关性）"""
 
-        match Memory.create_lazy(keywords, project_root):
+        match Memory.create_lazy(keywords, storage):
             case Err(e):
                 return Err(e)
             case Ok(memory):
@@ -135,6 +259,8 @@ class Memory:
         match validate_content_size(content):
             case Err(e):
                 return Err(e)
+            case Ok(word_count):
+                pass
 
         match await validate_semantics(content, memory.keywords):
             case Err(e):
@@ -142,14 +268,15 @@ class Memory:
 
         memory._content = content
         memory._version = memory._generate_version()
+        memory._word_count = (memory._version, word_count)
         memory._loaded = True
-        memory._save_to_file()
+        await memory._save_to_storage()
 
         return Ok(memory)
 
     @classmethod
     def create_lazy(
-        cls, keywords: Iterable[str], project_root: Path
+        cls, keywords: Iterable[str], storage: Storage
     ) -> Result["Memory", FailureHint]:
         """创建新 Memory 的工厂方法（仅验证 keywords）"""
 
@@ -159,7 +286,7 @@ class Memory:
             case Ok(key):
                 pass
 
-        memory = cls(key, project_root)
+        memory = cls(key, storage)
         return Ok(memory)
 
 
@@ -169,20 +296,44 @@ class MemorySnapShot(NamedTuple):
     version: str
 
 
-def extract_keywords_from_filename(name: str) -> frozenset:
-    """从文件名提取 keywords set
-
-    Args:
-        filename: 文件名（例如 "api-design-patterns"）
-
-    Returns:
-        keywords 的 frozenset（无顺序）
-    """
-
-    # 按连字符分割
-    keywords = name.split("-")
-    # 返回 frozenset（无顺序，可哈希）
-    return frozenset(keywords)
+class ListPage(NamedTuple):
+    items: list[frozenset[str]]
+    offset: int  # 本页第一项在完整结果中的位置
+    total: int  # 完整结果的条数
+    next_cursor: str | None  # 下一页游标，已是最后一页时为 None
+
+
+def _build_content_index(
+    entries: Iterable[tuple[frozenset[str], str]],
+) -> ContentIndex:
+    index = ContentIndex()
+    for key, content in entries:
+        index.add(key, content)
+    return index
+
+
+def _encode_cursor(query: tuple[str, ...] | None, offset: int) -> str:
+    payload = json.dumps({"q": query, "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(
+    cursor: str,
+) -> Result[tuple[tuple[str, ...] | None, int], FailureHint]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        query = payload["q"]
+        offset = payload["o"]
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError(offset)
+        return Ok((None if query is None else tuple(query), offset))
+    except Exception:
+        return Err(
+            FailureHint(
+                "无效的分页游标",
+                suggestion="使用上一页结果中给出的 cursor，或者不带 cursor 重新查询",
+            )
+        )
 
 
 class MemoryRegistry:
@@ -193,70 +344,460 @@ class MemoryRegistry:
     - _registry_lock 保护 _memories 字典的增删改
     - 写入立即持久化
     - keywords 用于定位 memory（主键），version 用于乐观锁检查
+    - _keyword_index 与 _memories 同步维护，list 只对候选 memory 打分
+    - _content_index 在首次内容检索时构建，之后随写操作增量更新
+    - _generation 在 keywords 集合变化（create/reassign/delete）时递增，
+      _list_cache 中的查询结果随之失效
+    - list 的打分方式由 scorer 选择；idf 所需的文档频率由 _keyword_index 维护
+    - 持久化委托给 _storage（file 或 sqlite，见 storage.open_storage）
+    - 内容访问经过 _content_cache，超出字节预算时淘汰最久未用的内容
+    - refresh 增量应用存储之外的修改；_pending_writes 记录本进程正在写入的
+      关键词组，避免把自身写入误当作外部修改
+    - _access 记录各 memory 的读取次数（持久化），warm_up 按此顺序预热
     """
 
-    def __init__(self, project_root: Path):
-        self._project_root = project_root
+    def __init__(
+        self,
+        project_root: Path,
+        scorer: str = MATCH_SCORER,
+        storage: Storage | None = None,
+    ):
+        self._storage = storage or open_storage(project_root, STORAGE_BACKEND)
+        self._scorer = matcher.select_scorer(scorer)
         self._memories: dict[frozenset[str], Memory] = {}
+        self._keyword_index = KeywordIndex()
+        self._content_index: ContentIndex | None = None
+        self._generation = 0
+        self._list_cache = QueryCache(LIST_CACHE_SIZE)
         self._registry_lock = asyncio.Lock()
+        self._content_cache = ContentCache(CONTENT_CACHE_MAX_BYTES)
+        self._pending_writes: Counter[frozenset[str]] = Counter()
+        self._access = AccessStats(file_manager.get_access_stats_file(project_root))
+        self._index_task: asyncio.Task[None] | None = None
+        self._index_dirty: set[frozenset[str]] | None = None  # 构建全文索引期间的写入
+        self._warmup = {"state": "off", "loaded": 0, "total": 0}
         self._load_metadata()
 
     def _load_metadata(self) -> None:
-        """从文件系统加载元数据并创建 Memory 对象（延迟加载）"""
-        names = file_manager.list_markdown_names(self._project_root / MEMORIES_DIR_NAME)
-        for name in names:
-            keywords = extract_keywords_from_filename(name)
-            match Memory.create_lazy(keywords, self._project_root):
-                case Ok(memory):
-                    self._memories[keywords] = memory
-                case Err(_):
+        """从存储加载元数据并创建 Memory 对象（延迟加载）"""
+        for stored in self._storage.scan():
+            self._register(
+                Memory(stored.keywords, self._storage, stored.version, stored.revision)
+            )
+
+        logger.info(f"[Registry] Loaded {len(self._memories)} memories")
+
+    def flush(self) -> None:
+        """把内存中的元数据（已知的版本号）写回存储"""
+        for memory in self._memories.values():
+            record = memory.version_record
+            if record is not None:
+                version, revision = record
+                self._storage.record_version(memory.keywords, version, revision)
+        self._storage.flush()
+        self._access.save()
+
+    def close(self) -> None:
+        self.flush()
+        self._storage.close()
+
+    def _register(self, memory: Memory) -> None:
+        self._memories[memory.keywords] = memory
+        self._keyword_index.add(memory.keywords)
+        self._generation += 1
+
+    def _unregister(self, memory: Memory) -> None:
+        del self._memories[memory.keywords]
+        self._keyword_index.remove(memory.keywords)
+        self._unindex_content(memory.keywords)
+        self._generation += 1
+        self._content_cache.discard(memory)
+
+    @contextlib.contextmanager
+    def _writing(self, *keys: frozenset[str]):
+        """标记本进程正在写入的关键词组（期间 refresh 跳过它们）"""
+        self._pending_writes.update(keys)
+        try:
+            yield
+        finally:
+            self._pending_writes.subtract(keys)
+
+    def watch(self, mode: str) -> MemoryWatcher | None:
+        """开始监视存储中的外部修改（需在事件循环中调用）"""
+        directory = self._storage.watch_directory
+        if directory is None:
+            logger.info("[Watch] Storage backend does not support watching")
+            return None
+        watcher = MemoryWatcher(directory, self.refresh, mode)
+        watcher.start()
+        return watcher
+
+    async def refresh(self, names: set[str] | None = None) -> None:
+        """应用存储之外的修改（外部编辑、切换 git 分支等），只更新受影响的 memory
+
+        Args:
+            names: 发生变化的存储名；None 表示全部重新检查
+
+        本进程的写入同样会被监视到：revision 与已记录的一致时保持不变。
+        元数据的变化只留在内存中，由 flush() 写回（不在事件循环中同步写清单）。
+        """
+        for keywords, stored in await self._storage.refresh(names):
+            if self._pending_writes[keywords] > 0:
+                continue
+
+            memory = self._memories.get(keywords)
+            if memory is None:
+                if stored is not None:
+                    await self._add_external(stored)
+                continue
+
+            async with memory.lock:
+                if self._memories.get(keywords) is not memory:
                     continue
+                if stored is None:
+                    self._unregister(memory)
+                    logger.info(f"[Refresh] Removed: {sorted(keywords)}")
+                    continue
+
+                record = memory.version_record
+                if record is not None and record[1] == stored.revision:
+                    continue
+                memory.invalidate(stored.version, stored.revision)
+                self._content_cache.discard(memory)
+                await self._reindex_content(memory)
+                logger.info(f"[Refresh] Modified: {sorted(keywords)}")
+
+    async def _add_external(self, stored: StoredMemory) -> None:
+        memory = Memory(stored.keywords, self._storage, stored.version, stored.revision)
+        async with self._registry_lock:
+            if stored.keywords in self._memories:
+                return
+            self._register(memory)
+        await self._reindex_content(memory)
+        logger.info(f"[Refresh] Added: {sorted(stored.keywords)}")
+
+    async def _reindex_content(self, memory: Memory) -> None:
+        """全文索引已建立时，重新加载内容并更新索引"""
+        if self._content_index is not None:
+            content = await self._content_cache.get(memory)
+            self._content_index.add(memory.keywords, content)
+        elif self._index_dirty is not None:
+            self._index_dirty.add(memory.keywords)
+
+    async def warm_up(self) -> None:
+        """预热：按历史读取次数从高到低加载内容（直到内容缓存占满），再建立全文索引"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        ranked = sorted(
+            self._memories.values(),
+            key=lambda memory: self._access.count(memory.name),
+            reverse=True,
+        )
+        self._warmup.update(state="loading", loaded=0, total=len(ranked))
+        try:
+            for start in range(0, len(ranked), WARMUP_BATCH_SIZE):
+                if self._content_cache.is_full:
+                    break
+                batch = ranked[start : start + WARMUP_BATCH_SIZE]
+                await asyncio.gather(*(self._warm(memory) for memory in batch))
+                self._warmup["loaded"] += len(batch)
+
+            self._warmup["state"] = "indexing"
+            await self._ensure_content_index()
+        except BaseException:  # 包括预热被取消
+            self._warmup["state"] = "failed"
+            raise
+
+        self._warmup["state"] = "done"
+        logger.info(
+            f"[Warmup] Loaded {self._warmup['loaded']}/{len(ranked)} memories "
+            f"and built content index in {loop.time() - started:.2f}s"
+        )
+
+    async def _warm(self, memory: Memory) -> None:
+        if memory.is_loaded or self._content_cache.is_full:
+            return
+        try:
+            await memory.load()
+        except (OSError, KeyError):  # 预热期间已被删除
+            return
+        self._content_cache.put(memory)
+
+    @property
+    def warmup_stats(self) -> dict:
+        """预热进度（state: off / loading / indexing / done / failed）"""
+        return dict(self._warmup)
+
+    async def _check_version(
+        self, memory: Memory, version: str
+    ) -> Result[None, FailureHint]:
+        """检查版本号；为此加载的内容计入内容缓存，使其可以被淘汰"""
+        result = await memory.check_version(version)
+        if memory.is_loaded and memory not in self._content_cache:
+            self._content_cache.put(memory)
+        return result
+
+    def _recheck_memory(
+        self, key: frozenset[str], memory: Memory
+    ) -> Result[None, FailureHint]:
+        """取得 memory.lock 后再次确认它仍以 key 注册（等待锁期间可能已被删除或重命名）"""
+        match self._find_memory(key):
+            case Err(e):
+                return Err(e)
+            case Ok((_, current)) if current is not memory:
+                return Err(
+                    FailureHint(
+                        "version 不匹配或者已过期",
+                        suggestion="检查 version 是否正确或者重新读取该记忆获取最新版本号",
+                    )
+                )
+        return Ok(None)
 
     def _find_memory(
-        self, keywords: Iterable[str]
+        self, keywords: Iterable[str], fuzzy: bool = False
     ) -> Result[tuple[frozenset[str], Memory], FailureHint]:
-        """查找 memory（不验证 keywords 格式，用于 read/update/reassign/delete）"""
+        """查找 memory（不验证 keywords 格式，用于 read/update/reassign/delete）
+
+        Args:
+            keywords: 关键词组
+            fuzzy: 找不到时是否自动纠正拼写错误的关键词（只用于读取）。
+                不纠正时，若存在相近的关键词组，会在建议中给出
+        """
         key = frozenset(keywords)
-        if key not in self._memories:
-            return Err(
-                FailureHint(
-                    "Memory 不存在",
-                    suggestion="确认提供的关键词组是否正确且完整。可以先列出记忆来查看它们的关键词组。",
-                )
-            )
-        return Ok((key, self._memories[key]))
+        if key in self._memories:
+            return Ok((key, self._memories[key]))
 
-    def read(self, keywords: Iterable[str]) -> Result[MemorySnapShot, FailureHint]:
+        corrected = self._correct_keywords(key)
+        if corrected is not None and fuzzy:
+            logger.info(f"[Fuzzy] Corrected: {sorted(key)} -> {sorted(corrected)}")
+            return Ok((corrected, self._memories[corrected]))
+
+        if corrected is not None:
+            suggestion = f"你是否想找关键词组 ({', '.join(sorted(corrected))})？"
+        else:
+            suggestion = "确认提供的关键词组是否正确且完整。可以先列出记忆来查看它们的关键词组。"
+        return Err(FailureHint("Memory 不存在", suggestion=suggestion))
+
+    def _correct_keywords(self, key: frozenset[str]) -> frozenset[str] | None:
+        """逐个纠正关键词，纠正后的关键词组存在时返回它"""
+        corrected = set()
+        for kw in key:
+            match = self._keyword_index.correct(kw, FUZZY_MATCH_THRESHOLD)
+            if match is None:
+                return None
+            corrected.add(match)
+
+        result = frozenset(corrected)
+        return result if result in self._memories else None
+
+    async def read(
+        self, keywords: Iterable[str]
+    ) -> Result[MemorySnapShot, FailureHint]:
         """读取 memory 的 content 和 version"""
-        match self._find_memory(keywords):
+        match self._find_memory(keywords, fuzzy=True):
             case Err(e):
                 logger.warning(f"[Read] Not found: {sorted(keywords)}")
                 return Err(e)
             case Ok((key, memory)):
                 pass
 
-        logger.info(f"[Read] Success: {sorted(keywords)}")
-        return Ok(memory.snapshot())
+        self._access.hit(memory.name)
+        logger.info(f"[Read] Success: {sorted(key)}")
+        return Ok(await self._snapshot(memory))
 
-    def list(self, keywords: Iterable[str] | None = None) -> list[frozenset[str]]:
-        """列出所有或匹配指定关键词的 memory（按匹配度排序）"""
-        if keywords is None:
-            result = list(self._memories.keys())
-            logger.info(f"[List] All memories: {len(result)} found")
-            return result
+    async def _snapshot(self, memory: Memory) -> MemorySnapShot:
+        """经过内容缓存获取快照"""
+        content = await self._content_cache.get(memory)
+        return MemorySnapShot(
+            keywords=memory.keywords,
+            content=content,
+            version=memory.version,
+        )
+
+    @property
+    def content_cache_stats(self) -> dict:
+        """内容缓存的占用和命中统计"""
+        return self._content_cache.stats()
+
+    async def search_content(self, query: str, limit: int = 10) -> list[ContentHit]:
+        """按内容全文检索 memory（BM25 排序，附带命中位置附近的摘要）"""
+        index = await self._ensure_content_index()
+        terms = tokenize(query)
+        hits = []
+        for key, score in index.search(query, limit):
+            content = await self._content_cache.get(self._memories[key])
+            hits.append(ContentHit(key, score, make_snippet(content, terms)))
+        logger.info(f"[Search] Query: {query!r}, matched: {len(hits)}")
+        return hits
+
+    async def _ensure_content_index(self) -> ContentIndex:
+        """首次使用时建立全文索引（并发调用共享同一次构建）"""
+        if self._content_index is None:
+            if self._index_task is None:
+                self._index_task = asyncio.create_task(self._build_content_index())
+                self._index_task.add_done_callback(self._clear_index_task)
+            await asyncio.shield(self._index_task)
+        return self._content_index  # type: ignore
+
+    def _clear_index_task(self, task: asyncio.Task) -> None:
+        if self._index_task is task:
+            self._index_task = None
+
+    async def _build_content_index(self) -> None:
+        """分批并发加载所有内容，在后台线程中建立全文索引
+
+        加载不经过内容缓存，避免挤出常用内容；构建期间发生的写入记在
+        _index_dirty 中，建好后补上。
+        """
+        self._index_dirty = set()
+        try:
+            memories = list(self._memories.values())
+            entries = []
+            for start in range(0, len(memories), WARMUP_BATCH_SIZE):
+                batch = memories[start : start + WARMUP_BATCH_SIZE]
+                contents = await asyncio.gather(
+                    *(self._load_uncached(memory) for memory in batch)
+                )
+                entries.extend(
+                    (memory.keywords, content)
+                    for memory, content in zip(batch, contents)
+                    if content is not None
+                )
+            index = await asyncio.to_thread(_build_content_index, entries)
+
+            while self._index_dirty:
+                key = self._index_dirty.pop()
+                memory = self._memories.get(key)
+                if memory is None:
+                    index.remove(key)
+                else:
+                    index.add(key, await self._content_cache.get(memory))
+            self._content_index = index
+        finally:
+            self._index_dirty = None
+        logger.info(f"[Search] Content index built: {len(index)} memories")
+
+    async def _load_uncached(self, memory: Memory) -> str | None:
+        """读取内容用于建索引，不经过内容缓存，也不改变 memory 的加载状态"""
+        try:
+            return await memory.peek()
+        except (OSError, KeyError):  # 已被删除（删除会记入 _index_dirty）
+            return None
+
+    def _index_content(self, key: frozenset[str], content: str) -> None:
+        if self._content_index is not None:
+            self._content_index.add(key, content)
+        elif self._index_dirty is not None:
+            self._index_dirty.add(key)
+
+    def _unindex_content(self, key: frozenset[str]) -> None:
+        if self._content_index is not None:
+            self._content_index.remove(key)
+        elif self._index_dirty is not None:
+            self._index_dirty.add(key)
+
+    def list(
+        self,
+        keywords: Iterable[str] | None = None,
+        limit: int | None = None,
+        cursor: str | None = None,
+    ) -> Result[ListPage, FailureHint]:
+        """列出所有或匹配指定关键词的 memory（按匹配度排序，支持分页）
+
+        Args:
+            keywords: 查询关键词；None 表示列出所有 memory
+            limit: 本页最多返回的条数；None 表示返回全部剩余结果
+            cursor: 上一页返回的 next_cursor（已包含查询关键词，可不再提供 keywords）
+
+        只对前 offset + limit 个结果做部分选择，不对全部匹配结果排序。
+        """
+        query = None if keywords is None else tuple(sorted(keywords))
+        offset = 0
+        if cursor is not None:
+            match _decode_cursor(cursor):
+                case Err(e):
+                    logger.warning(f"[List] Invalid cursor: {cursor}")
+                    return Err(e)
+                case Ok((cursor_query, offset)):
+                    pass
+            if query is not None and query != cursor_query:
+                return Err(
+                    FailureHint(
+                        "分页游标与查询关键词不匹配",
+                        suggestion="翻页时使用与上一页相同的关键词，或者只提供 cursor",
+                    )
+                )
+            query = cursor_query
+
+        end = None if limit is None else offset + limit
+        if query is None:
+            total = len(self._memories)
+            items = list(itertools.islice(self._memories, offset, end))
+        else:
+            ranked, total = self._ranked(query, end)
+            items = list(ranked[offset:end])
+
+        next_cursor = (
+            _encode_cursor(query, end) if end is not None and end < total else None
+        )
+        logger.info(
+            f"[List] Query: {list(query) if query else 'all'}, matched: {total}, "
+            f"page: {offset}+{len(items)}"
+        )
+        return Ok(ListPage(items, offset, total, next_cursor))
+
+    def _ranked(
+        self, query: tuple[str, ...], k: int | None
+    ) -> tuple[tuple[frozenset[str], ...], int]:
+        """返回 (前 k 个结果, 总匹配数)，优先使用缓存中足够长的前缀"""
+        cached = self._list_cache.get(query, self._generation)
+        if cached is not None:
+            ranked, total = cached
+            if len(ranked) == total or (k is not None and len(ranked) >= k):
+                return cached
+
+        result = self._rank(query, k)
+        self._list_cache.put(query, self._generation, result)
+        return result
 
-        query_keywords = list(keywords)
+    def _rank(
+        self, keywords: tuple[str, ...], k: int | None
+    ) -> tuple[tuple[frozenset[str], ...], int]:
+        """对候选 memory 打分，用堆选出前 k 个（k 为 None 时完整排序）"""
+        query_keywords = []
+        for kw in keywords:
+            # 没有任何关键词包含该查询词时，尝试纠正拼写
+            if kw and not self._keyword_index.matching_keywords(kw):
+                corrected = self._keyword_index.correct(kw, FUZZY_MATCH_THRESHOLD)
+                if corrected is not None:
+                    logger.info(f"[List] Fuzzy corrected: {kw} -> {corrected}")
+                    kw = corrected
+            query_keywords.append(kw)
         scored_keywords = []
 
-        for file_keywords in self._memories.keys():
-            score = matcher.score_match(query_keywords, file_keywords)
+        # 只对索引给出的候选打分；同分时按加入顺序，与遍历 _memories 的结果一致
+        for file_keywords in self._keyword_index.candidates(query_keywords):
+            score = self._scorer(query_keywords, file_keywords, self._keyword_idf)
             if score > 0:
-                scored_keywords.append((file_keywords, score))
+                order = self._keyword_index.order(file_keywords)
+                scored_keywords.append((-score, order, file_keywords))
 
-        scored_keywords.sort(key=lambda x: x[1], reverse=True)
-        result = [kw for kw, _ in scored_keywords]
-        logger.info(f"[List] Query: {sorted(query_keywords)}, matched: {len(result)}")
-        return result
+        total = len(scored_keywords)
+        if k is None or k >= total:
+            scored_keywords.sort()
+        else:
+            scored_keywords = heapq.nsmallest(k, scored_keywords)
+        return tuple(kw for _, _, kw in scored_keywords), total
+
+    def _keyword_idf(self, keyword: str) -> float:
+        return matcher.idf(
+            self._keyword_index.document_frequency(keyword), len(self._keyword_index)
+        )
+
+    @property
+    def list_cache_stats(self) -> dict:
+        """list 查询缓存的命中统计"""
+        return self._list_cache.stats()
 
     def has_memory(self, keywords: Iterable[str]) -> bool:
         """检查指定关键词组的记忆是否存在
@@ -277,29 +818,30 @@ class MemoryRegistry:
     ) -> Result[MemorySnapShot, FailureHint]:
         """创建新 memory（返回 version）"""
 
-        match await Memory.create(keywords, content, self._project_root):
-            case Err(e):
-                logger.warning(f"[Create] Validation failed: {e.message}")
-                return Err(e)
-            case Ok(memory):
-                pass
+        key = frozenset(keywords)
+        with self._writing(key):
+            match await Memory.create(key, content, self._storage):
+                case Err(e):
+                    logger.warning(f"[Create] Validation failed: {e.message}")
+                    return Err(e)
+                case Ok(memory):
+                    pass
 
-        keywords = memory.keywords
-        async with self._registry_lock:
-            if keywords in self._memories:
-                logger.warning(f"[Create] Keywords already exist: {sorted(keywords)}")
-                return Err(
-                    FailureHint(
-                        "Memory 已存在",
-                        suggestion="使用不同的关键词组或者直接更新现有记忆（更新记忆之前需要先读取它）",
+            async with self._registry_lock:
+                if key in self._memories:
+                    logger.warning(f"[Create] Keywords already exist: {sorted(key)}")
+                    return Err(
+                        FailureHint(
+                            "Memory 已存在",
+                            suggestion="使用不同的关键词组或者直接更新现有记忆（更新记忆之前需要先读取它）",
+                        )
                     )
-                )
-            self._memories[keywords] = memory
-            logger.info(
-                f"[Create] Success: {sorted(keywords)}, version={memory.version}"
-            )
+                self._register(memory)
+                self._index_content(key, content)
+                self._content_cache.put(memory)
+                logger.info(f"[Create] Success: {sorted(key)}, version={memory.version}")
 
-            return Ok(memory.snapshot())
+                return Ok(memory.snapshot())
 
     async def update(
         self,
@@ -317,7 +859,12 @@ class MemoryRegistry:
                 pass
 
         async with memory.lock:
-            match memory.check_version(version):
+            match self._recheck_memory(key, memory):
+                case Err(e):
+                    logger.warning(f"[Update] Gone while waiting: {sorted(keywords)}")
+                    return Err(e)
+
+            match await self._check_version(memory, version):
                 case Err(e):
                     logger.warning(
                         f"[Update] Version mismatch: {sorted(keywords)}, "
@@ -325,7 +872,7 @@ class MemoryRegistry:
                     )
                     return Err(e)
 
-            current_content = memory.content
+            current_content = await self._content_cache.get(memory)
             count = current_content.count(old_content)
             if count == 0:
                 logger.warning(f"[Update] Content not found: {sorted(keywords)}")
@@ -346,17 +893,24 @@ class MemoryRegistry:
                     )
                 )
 
+            start = current_content.index(old_content)
             updated_content = current_content.replace(old_content, new_content, 1)
+            edit = ContentEdit(start, old_content, new_content)
 
-            match await memory.set_content(updated_content):
+            match await memory.set_content(updated_content, edit):
                 case Err(e):
                     logger.warning(f"[Update] Content validation failed: {e.message}")
                     return Err(e)
 
+            # 写入期间内容可能已被缓存淘汰（unload），这里不再读取 memory.content
+            snapshot = MemorySnapShot(key, updated_content, memory.version)
+            self._index_content(key, updated_content)
+            self._content_cache.put(memory)
+
             logger.info(
-                f"[Update] Success: {sorted(keywords)}, version {version} -> {memory.version}"
+                f"[Update] Success: {sorted(keywords)}, version {version} -> {snapshot.version}"
             )
-            return Ok(memory.snapshot())
+            return Ok(snapshot)
 
     async def reassign(
         self, keywords: Iterable[str], new_keywords: Iterable[str], version: str
@@ -370,41 +924,50 @@ class MemoryRegistry:
                 pass
 
         async with old_memory.lock:
-            match old_memory.check_version(version):
+            match self._recheck_memory(old_key, old_memory):
                 case Err(e):
-                    logger.warning(
-                        f"[Reassign] Version mismatch: {sorted(keywords)}, "
-                        f"expected={version}, actual={old_memory.version}"
-                    )
+                    logger.warning(f"[Reassign] Gone while waiting: {sorted(keywords)}")
                     return Err(e)
 
-            match await Memory.create(
-                new_keywords, old_memory.content, self._project_root
-            ):
+            match await self._check_version(old_memory, version):
                 case Err(e):
                     logger.warning(
-                        f"[Reassign] New keywords validation failed: {e.message}"
+                        f"[Reassign] Version mismatch: {sorted(keywords)}, "
+                        f"expected={version}, actual={old_memory.version}"
                     )
                     return Err(e)
-                case Ok(new_memory):
-                    pass
 
-            async with self._registry_lock:
-                if new_memory.keywords in self._memories:
-                    logger.warning(
-                        f"[Reassign] New keywords conflict: {sorted(new_memory.keywords)}"
-                    )
-                    return Err(
-                        FailureHint(
-                            "新 Keywords 对应的 Memory 已存在",
-                            suggestion="选择其他关键词组或先删除已存在的记忆",
+            old_content = await self._content_cache.get(old_memory)
+            new_key = frozenset(new_keywords)
+            with self._writing(old_key, new_key):
+                match await Memory.create(new_key, old_content, self._storage):
+                    case Err(e):
+                        logger.warning(
+                            f"[Reassign] New keywords validation failed: {e.message}"
+                        )
+                        return Err(e)
+                    case Ok(new_memory):
+                        pass
+
+                async with self._registry_lock:
+                    if new_memory.keywords in self._memories:
+                        logger.warning(
+                            f"[Reassign] New keywords conflict: {sorted(new_memory.keywords)}"
+                        )
+                        return Err(
+                            FailureHint(
+                                "新 Keywords 对应的 Memory 已存在",
+                                suggestion="选择其他关键词组或先删除已存在的记忆",
+                            )
                         )
-                    )
 
-                del self._memories[old_key]
-                self._memories[new_memory.keywords] = new_memory
+                    self._unregister(old_memory)
+                    self._register(new_memory)
+                    self._index_content(new_key, old_content)
 
-            old_memory.delete_file()
+                await old_memory.delete_from_storage()
+            self._content_cache.put(new_memory)
+            self._access.rename(old_memory.name, new_memory.name)
 
             logger.info(
                 f"[Reassign] Success: {sorted(keywords)} -> {sorted(new_memory.keywords)}, "
@@ -412,7 +975,7 @@ class MemoryRegistry:
             )
             return Ok(new_memory.snapshot())
 
-    def delete(
+    async def delete(
         self, keywords: Iterable[str], version: str
     ) -> Result[None, FailureHint]:
         """删除 memory"""
@@ -423,13 +986,21 @@ class MemoryRegistry:
             case Ok((key, memory)):
                 pass
 
-        match memory.check_version(version):
-            case Err(e):
-                logger.warning(f"[Delete] Version mismatch: {sorted(keywords)}")
-                return Err(e)
+        async with memory.lock:
+            match self._recheck_memory(key, memory):
+                case Err(e):
+                    logger.warning(f"[Delete] Gone while waiting: {sorted(keywords)}")
+                    return Err(e)
+
+            match await self._check_version(memory, version):
+                case Err(e):
+                    logger.warning(f"[Delete] Version mismatch: {sorted(keywords)}")
+                    return Err(e)
 
-        memory.delete_file()
-        del self._memories[key]
+            with self._writing(key):
+                await memory.delete_from_storage()
+                self._unregister(memory)
+            self._access.discard(memory.name)
 
         logger.info(f"[Delete] Success: {sorted(keywords)}")
         return Ok(None)
@@ -0,0 +1,50 @@
+"""查询结果缓存 - 按 registry generation 失效的有界 LRU"""
+
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class QueryCache:
+    """有界 LRU 缓存
+
+    - 每次读写都带上调用方的 generation；generation 变化时整体失效
+    - 记录 hits/misses 供监控
+    """
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._generation: int | None = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _sync(self, generation: int) -> None:
+        if generation != self._generation:
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, key: Hashable, generation: int) -> Any | None:
+        self._sync(generation)
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, generation: int, value: Any) -> None:
+        if self._max_entries <= 0:
+            return
+        self._sync(generation)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
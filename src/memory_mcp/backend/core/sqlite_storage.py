@@ -0,0 +1,153 @@
+"""SQLite 存储后端 - 所有 memory 存放在一个 WAL 模式的数据库中"""
+
+import asyncio
+import itertools
+import sqlite3
+from collections.abc import Hashable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from ..config import MEMORIES_DB_NAME, MEMORIES_DIR_NAME, WRITE_DURABILITY
+from ..logger import logger
+from .storage import Storage, StoredMemory, memory_name
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    version TEXT,
+    revision INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS keywords (
+    memory_id INTEGER NOT NULL REFERENCES memories(id) ON DELETE CASCADE,
+    keyword TEXT NOT NULL,
+    PRIMARY KEY (memory_id, keyword)
+);
+CREATE INDEX IF NOT EXISTS keywords_by_keyword ON keywords(keyword);
+CREATE TABLE IF NOT EXISTS contents (
+    memory_id INTEGER PRIMARY KEY REFERENCES memories(id) ON DELETE CASCADE,
+    content TEXT NOT NULL
+);
+"""
+
+# 语句都是模块常量：sqlite3 按 SQL 文本缓存预编译结果，重复执行不再解析
+SELECT_ALL = """
+SELECT m.id, m.version, m.revision, k.keyword
+FROM memories m JOIN keywords k ON k.memory_id = m.id
+"""
+SELECT_CONTENT = """
+SELECT c.content, m.revision
+FROM memories m JOIN contents c ON c.memory_id = m.id
+WHERE m.name = ?
+"""
+SELECT_REVISION = "SELECT revision FROM memories WHERE name = ?"
+SELECT_MAX_REVISION = "SELECT coalesce(max(revision), 0) FROM memories"
+SELECT_ID = "SELECT id FROM memories WHERE name = ?"
+UPSERT_MEMORY = """
+INSERT INTO memories (name, version, revision) VALUES (?, ?, ?)
+ON CONFLICT (name) DO UPDATE SET version = excluded.version, revision = excluded.revision
+"""
+UPSERT_CONTENT = "INSERT OR REPLACE INTO contents (memory_id, content) VALUES (?, ?)"
+INSERT_KEYWORD = "INSERT OR IGNORE INTO keywords (memory_id, keyword) VALUES (?, ?)"
+DELETE_MEMORY = "DELETE FROM memories WHERE name = ?"
+
+# 与文件后端的 durability 对应的 synchronous 级别
+SYNCHRONOUS = {"none": "OFF", "batch": "NORMAL", "per-write": "FULL"}
+
+
+class SQLiteStorage(Storage):
+    """SQLite 存储：<project>/.memories/memories.db
+
+    - memories 表保存名称、版本号和修订号；keywords 与 contents 分表，
+      启动时只读 keywords，不读内容
+    - revision 为进程内单调递增的修订号，每次写入分配一个新值
+    - WAL 模式，读不阻塞写；synchronous 级别由 durability 决定
+    - 所有语句在一个专用线程中串行执行；批量写入共用一个事务
+    """
+
+    def __init__(self, project_root: Path, durability: str = WRITE_DURABILITY):
+        db_path = project_root / MEMORIES_DIR_NAME / MEMORIES_DB_NAME
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="memory-sqlite"
+        )
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS[durability]}")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(SCHEMA)
+        (max_revision,) = self._conn.execute(SELECT_MAX_REVISION).fetchone()
+        self._revisions = itertools.count(max_revision + 1)
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, func, *args
+        )
+
+    def scan(self) -> list[StoredMemory]:
+        rows: dict[int, tuple[list[str], str | None, int]] = {}
+        for memory_id, version, revision, keyword in self._conn.execute(SELECT_ALL):
+            rows.setdefault(memory_id, ([], version, revision))[0].append(keyword)
+        logger.debug(f"[SQLiteStorage] Scanned {len(rows)} memories")
+        return [
+            StoredMemory(frozenset(keywords), version, revision)
+            for keywords, version, revision in rows.values()
+        ]
+
+    async def read(self, keywords: frozenset[str]) -> tuple[str, Hashable]:
+        return await self._run(self._read, memory_name(keywords))
+
+    def _read(self, name: str) -> tuple[str, int]:
+        row = self._conn.execute(SELECT_CONTENT, (name,)).fetchone()
+        if row is None:
+            raise KeyError(f"memory 不存在: {name}")
+        return row
+
+    async def write(
+        self, keywords: frozenset[str], content: str, version: str
+    ) -> Hashable:
+        return (await self.write_many([(keywords, content, version)]))[0]
+
+    async def write_many(  # type: ignore[override]
+        self, items: list[tuple[frozenset[str], str, str]]
+    ) -> list[int]:
+        return await self._run(self._write_many, items)
+
+    def _write_many(self, items: list[tuple[frozenset[str], str, str]]) -> list[int]:
+        revisions = []
+        with self._conn:  # 单个事务
+            for keywords, content, version in items:
+                name = memory_name(keywords)
+                revision = next(self._revisions)
+                self._conn.execute(UPSERT_MEMORY, (name, version, revision))
+                (memory_id,) = self._conn.execute(SELECT_ID, (name,)).fetchone()
+                self._conn.execute(UPSERT_CONTENT, (memory_id, content))
+                self._conn.executemany(
+                    INSERT_KEYWORD, [(memory_id, kw) for kw in keywords]
+                )
+                revisions.append(revision)
+        return revisions
+
+    async def delete(self, keywords: frozenset[str]) -> None:
+        await self._run(self._delete, memory_name(keywords))
+
+    def _delete(self, name: str) -> None:
+        with self._conn:
+            self._conn.execute(DELETE_MEMORY, (name,))
+
+    async def revision(self, keywords: frozenset[str]) -> Hashable | None:
+        return await self._run(self._revision, memory_name(keywords))
+
+    def _revision(self, name: str) -> int | None:
+        row = self._conn.execute(SELECT_REVISION, (name,)).fetchone()
+        return None if row is None else row[0]
+
+    def record_version(
+        self, keywords: frozenset[str], version: str, revision: Hashable
+    ) -> None:
+        # 版本号随内容一起写入，行中的 version 总是最新的
+        pass
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._conn.close()
@@ -0,0 +1,103 @@
+"""Memory 存储后端接口"""
+
+from abc import ABC, abstractmethod
+from collections.abc import Hashable, Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+STORAGE_BACKENDS = ("file", "sqlite")
+
+
+def memory_name(keywords: Iterable[str]) -> str:
+    """memory 的存储名：排序后的 keywords 用连字符连接"""
+    return "-".join(sorted(keywords))
+
+
+class StoredMemory(NamedTuple):
+    """启动时从存储中列出的 memory 元数据（不含内容）"""
+
+    keywords: frozenset[str]
+    version: str | None  # 已持久化的版本号，未知时为 None
+    revision: Hashable | None  # version 对应的存储修订标记
+
+
+class Storage(ABC):
+    """memory 持久化后端
+
+    - 以关键词组为键存取内容
+    - revision 是后端定义的修订标记（文件身份 / 行修订号）：内容变化时
+      revision 必然变化，用来判断已持久化的 version 是否仍然有效
+    - 读写删都是协程，在后台线程中执行，不阻塞事件循环
+    """
+
+    @abstractmethod
+    def scan(self) -> list[StoredMemory]:
+        """列出全部 memory（启动时调用，不读取内容）"""
+
+    @abstractmethod
+    async def read(self, keywords: frozenset[str]) -> tuple[str, Hashable]:
+        """读取内容及其 revision"""
+
+    @abstractmethod
+    async def write(
+        self, keywords: frozenset[str], content: str, version: str
+    ) -> Hashable:
+        """写入内容（连同版本号一起持久化），返回新的 revision"""
+
+    async def write_many(self, items: list[tuple[frozenset[str], str, str]]) -> None:
+        """批量写入 (keywords, content, version)，用于迁移"""
+        for keywords, content, version in items:
+            await self.write(keywords, content, version)
+
+    @abstractmethod
+    async def delete(self, keywords: frozenset[str]) -> None: ...
+
+    @abstractmethod
+    async def revision(self, keywords: frozenset[str]) -> Hashable | None:
+        """当前的 revision（memory 已不存在时为 None）"""
+
+    @abstractmethod
+    def record_version(
+        self, keywords: frozenset[str], version: str, revision: Hashable
+    ) -> None:
+        """记录加载内容后算出的版本号，供下次启动复用"""
+
+    @property
+    def watch_directory(self) -> Path | None:
+        """可被外部修改、需要监视的目录（不支持外部修改的后端为 None）"""
+        return None
+
+    async def refresh(
+        self, names: set[str] | None
+    ) -> list[tuple[frozenset[str], StoredMemory | None]]:
+        """重新检查外部修改过的 memory
+
+        Args:
+            names: 发生变化的存储名；None 表示全部重新检查
+
+        Returns:
+            每个有效名称的 (keywords, 当前元数据)，已被删除时元数据为 None
+        """
+        return []
+
+    def flush(self) -> None:
+        """把缓冲的元数据写回存储"""
+
+    def close(self) -> None:
+        """释放存储占用的资源"""
+
+
+def open_storage(project_root: Path, backend: str) -> Storage:
+    """按名称打开存储后端（file 或 sqlite）"""
+    # 延迟导入：具体后端依赖本模块的 Storage 基类
+    if backend == "file":
+        from .file_storage import FileStorage
+
+        return FileStorage(project_root)
+    if backend == "sqlite":
+        from .sqlite_storage import SQLiteStorage
+
+        return SQLiteStorage(project_root)
+    raise ValueError(
+        f"未知的存储后端 '{backend}'，可选: {', '.join(STORAGE_BACKENDS)}"
+    )
@@ -0,0 +1,117 @@
+"""语义验证批处理 - 把并发的验证请求合并为一次 LLM 判定"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+
+from ..logger import logger
+
+Verdict = tuple[bool, str | None]  # (是否合格, 拒绝原因)
+Item = tuple[str, frozenset[str]]  # (content, keywords)
+
+JudgeOne = Callable[[str, frozenset[str]], Awaitable[Verdict | None]]
+JudgeMany = Callable[[list[Item]], Awaitable[dict[int, Verdict]]]
+
+
+class ValidationBatcher:
+    """验证批处理器
+
+    - 没有批次在判定中时，请求只等到本轮事件循环结束（同时到达的请求仍合并为一批）；
+      有批次在判定中时，第一个请求到达后等待 window 秒，期间到达的请求（最多 max_items 个）合并为一批
+    - 只有一项时走单项判定；多项时一次请求判定全部，按序号把结果交还各调用方
+    - 批量判定缺失的项（或批量请求失败时的全部项）退回单项判定
+    - 同一批中相同的 (keywords, content) 只判定一次
+    """
+
+    def __init__(
+        self,
+        judge_one: JudgeOne,
+        judge_many: JudgeMany,
+        window: float,
+        max_items: int,
+    ):
+        self._judge_one = judge_one
+        self._judge_many = judge_many
+        self._window = window
+        self._max_items = max_items
+        self._pending: dict[Hashable, tuple[Item, asyncio.Future]] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()  # 进行中的发送任务（保留引用直到完成）
+        self._in_flight = 0  # 正在判定的批次数
+        self.batches = 0
+        self.items = 0
+
+    async def judge(
+        self, key: Hashable, content: str, keywords: frozenset[str]
+    ) -> Verdict | None:
+        """判定一项（key 用于批内去重），LLM 未给出判定时返回 None"""
+        entry = self._pending.get(key)
+        if entry is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = ((content, keywords), future)
+            if len(self._pending) >= self._max_items:
+                # 批次已满：立即发送，后续请求进入新的批次
+                if self._flush_task is not None:
+                    self._flush_task.cancel()
+                self._spawn(self._flush(self._take()))
+            elif self._flush_task is None:
+                window = self._window if self._in_flight else 0
+                self._flush_task = self._spawn(self._flush_later(window))
+        else:
+            future = entry[1]
+        return await asyncio.shield(future)
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _take(self) -> list[tuple[Item, asyncio.Future]]:
+        batch, self._pending = list(self._pending.values()), {}
+        self._flush_task = None
+        return batch
+
+    async def _flush_later(self, window: float) -> None:
+        await asyncio.sleep(window)
+        await self._flush(self._take())
+
+    async def _flush(self, batch: list[tuple[Item, asyncio.Future]]) -> None:
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+        self._in_flight += 1
+        try:
+            await self._judge(batch)
+        finally:
+            self._in_flight -= 1
+
+    async def _judge(self, batch: list[tuple[Item, asyncio.Future]]) -> None:
+        verdicts: dict[int, Verdict] = {}
+        if len(batch) > 1:
+            try:
+                verdicts = await self._judge_many([item for item, _ in batch])
+            except Exception as e:
+                logger.warning(f"[Validate:Batch] Batch of {len(batch)} failed: {e}")
+            logger.info(
+                f"[Validate:Batch] Judged {len(verdicts)}/{len(batch)} items in one request"
+            )
+
+        async def settle(index: int, item: Item, future: asyncio.Future) -> None:
+            try:
+                verdict = verdicts.get(index)
+                if verdict is None:
+                    verdict = await self._judge_one(*item)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                return
+            if not future.done():
+                future.set_result(verdict)
+
+        await asyncio.gather(
+            *(settle(i, item, future) for i, (item, future) in enumerate(batch))
+        )
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "items": self.items}
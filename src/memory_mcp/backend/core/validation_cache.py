@@ -0,0 +1,88 @@
+"""语义验证结果缓存 - 持久化在缓存目录中的 accept/reject 判定"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+from ... import file_manager
+
+
+class Verdict(NamedTuple):
+    accepted: bool
+    reason: str | None  # 拒绝原因（accepted 时为 None）
+    at: float  # 判定时间（epoch 秒）
+
+
+def verdict_key(keywords: Iterable[str], content: str, salt: str = "") -> str:
+    """判定的缓存键：排序后的关键词与内容的 SHA256（salt 区分不同的判定标准）"""
+    payload = "\n".join([salt, ",".join(sorted(keywords)), content])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ValidationCache:
+    """有界 LRU + TTL 的判定缓存
+
+    - 超过 ttl 的判定视为不存在；超过 max_entries 时淘汰最久未用的
+    - 文件丢失或损坏时从空开始；修改后由 save() 写回
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float,
+        max_entries: int,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._path = path
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[str, Verdict] = OrderedDict()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        entries = file_manager.load_json_cache(
+            self._path,
+            lambda data: OrderedDict((key, Verdict(*item)) for key, item in data.items()),
+        )
+        if entries is not None:
+            self._entries = entries
+
+    def get(self, key: str) -> Verdict | None:
+        verdict = self._entries.get(key)
+        if verdict is not None and self._clock() - verdict.at > self._ttl:
+            del self._entries[key]
+            self._dirty = True
+            verdict = None
+
+        if verdict is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return verdict
+
+    def put(self, key: str, accepted: bool, reason: str | None = None) -> None:
+        self._entries[key] = Verdict(accepted, reason, self._clock())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    def save(self) -> None:
+        """写回缓存（无修改时跳过）"""
+        if not self._dirty:
+            return
+        file_manager.save_json_cache(
+            self._path, {key: list(verdict) for key, verdict in self._entries.items()}
+        )
+        self._dirty = False
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -2,14 +2,54 @@
 
 import re
 from dataclasses import dataclass
-from typing import Iterable
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, NamedTuple
 
 from anthropic.types import ToolUnionParam
 from rusty_results.prelude import Err, Ok, Result
 
+from ... import file_manager
 from .. import llm
-from ..config import MAX_FILE_SIZE
+from ..config import (
+    EDIT_VALIDATION_CONTEXT_CHARS,
+    EDIT_VALIDATION_MAX_RATIO,
+    MAX_FILE_SIZE,
+    PREVALIDATE_ENABLED,
+    PREVALIDATE_MAX_CJK_RATIO,
+    PREVALIDATE_MAX_CODE_LINES,
+    PREVALIDATE_REJECT_OVERLAP,
+    VALIDATION_BATCH_MAX_ITEMS,
+    VALIDATION_BATCH_WINDOW_SECONDS,
+    VALIDATION_CACHE_MAX_ENTRIES,
+    VALIDATION_CACHE_TTL_SECONDS,
+)
 from ..logger import logger
+from .validation_batcher import ValidationBatcher, Verdict
+from .validation_cache import ValidationCache, verdict_key
+
+# 判定标准（提示词）变化时递增，使旧的缓存判定失效
+SEMANTICS_CRITERIA_VERSION = "1"
+
+# 语义验证结果缓存，由后端启动时 init_validation_cache 初始化；为 None 时不缓存
+validation_cache: ValidationCache | None = None
+
+
+def init_validation_cache(project_root: Path) -> ValidationCache:
+    global validation_cache
+    validation_cache = ValidationCache(
+        file_manager.get_validation_cache_file(project_root),
+        ttl=VALIDATION_CACHE_TTL_SECONDS,
+        max_entries=VALIDATION_CACHE_MAX_ENTRIES,
+    )
+    return validation_cache
+
+
+class ContentEdit(NamedTuple):
+    """一次替换：旧内容中从 start 开始的 old_text 被替换为 new_text"""
+
+    start: int
+    old_text: str
+    new_text: str
 
 
 @dataclass(frozen=True)
@@ -44,15 +84,22 @@ def validate_keywords(keywords: Iterable[str]) -> Result[frozenset[str], Failure
     return Ok(key)
 
 
-def validate_content_size(content: str) -> Result[int, FailureHint]:
-    """验证内容大小（≤ 1000 字，中文按字符计数，英文按单词计数）"""
-    word_count = count_words_mixed(content)
+def validate_content_size(
+    content: str, word_count: int | None = None
+) -> Result[int, FailureHint]:
+    """验证内容大小（≤ 1000 字，中文按字符计数，英文按单词计数）
+
+    Args:
+        word_count: 已知的字数（如增量维护的字数），提供时不再重新计数
+    """
+    if word_count is None:
+        word_count = count_words_mixed(content, limit=MAX_FILE_SIZE)
 
     if word_count > MAX_FILE_SIZE:
-        logger.warning(f"[Validate:Size] Exceeded: {word_count} > {MAX_FILE_SIZE}")
+        logger.warning(f"[Validate:Size] Exceeded: > {MAX_FILE_SIZE}")
         return Err(
             FailureHint(
-                f"内容过长：{word_count} 字，超过限制 {MAX_FILE_SIZE} 字",
+                f"内容过长：超过限制 {MAX_FILE_SIZE} 字",
                 suggestion="将内容拆分为多个较短的记忆",
             )
         )
@@ -60,54 +107,318 @@ def validate_content_size(content: str) -> Result[int, FailureHint]:
     return Ok(word_count)
 
 
-def count_words_mixed(content: str) -> int:
-    """计算中英文混合内容的字数（中文按字符，英文/数字按单词）"""
-    chinese_count = sum(1 for char in content if "\u4e00" <= char <= "\u9fff")
+# 一个中文字符，或前后都不紧邻其他（非中文）单词字符的英文/数字串
+_WORD = re.compile(
+    r"[\u4e00-\u9fff]|(?<![^\W\u4e00-\u9fff])[a-zA-Z0-9]+(?![^\W\u4e00-\u9fff])"
+)
+# 非中文的单词字符：英文单词的边界只可能落在这类字符之外
+_RUN_CHAR = re.compile(r"[^\W\u4e00-\u9fff]")
+
+
+def count_words_mixed(content: str, limit: int | None = None) -> int:
+    """计算中英文混合内容的字数（中文按字符，英文/数字按单词）
+
+    单次扫描；给定 limit 时，字数超过 limit 后立即停止（返回 limit + 1）
+    """
+    if limit is None:
+        return len(_WORD.findall(content))
+
+    count = 0
+    for _ in _WORD.finditer(content):
+        count += 1
+        if count > limit:
+            break
+    return count
+
+
+def splice_word_count(content: str, word_count: int, edit: ContentEdit) -> int:
+    """content（字数为 word_count）应用 edit 后的字数，只重新计数替换处附近
+
+    替换区间向两侧扩展到完整的单词字符串，拼接处前后的英文单词因此被整体重新计数
+    """
+    lo, hi = edit.start, edit.start + len(edit.old_text)
+    while lo > 0 and _RUN_CHAR.match(content, lo - 1):
+        lo -= 1
+    while hi < len(content) and _RUN_CHAR.match(content, hi):
+        hi += 1
+
+    old_region = content[lo:hi]
+    new_region = (
+        content[lo : edit.start]
+        + edit.new_text
+        + content[edit.start + len(edit.old_text) : hi]
+    )
+    return word_count - count_words_mixed(old_region) + count_words_mixed(new_region)
+
+
+_SEMANTICS_CRITERIA = """检查两个方面：
+
+1. **相关性**：内容是否与关键词组高度相关，关键词组能否完整且准确概括记忆内容。
+
+2. **避免冗余**：检查是否存在可以省略的冗余代码片段或引用段落。
+   - 如果某个代码片段或引用段落**已经提供了获取方式**（如源代码位置、URL、文献引用等），那么该代码/段落本身就是冗余的。
+   - 简短的代码示例（1-3行）或关键引用可以保留，但大段代码/长篇引用配上对应的获取方式时，就应该只留获取方式
+"""
+
+
+def _rejection(reason: str) -> FailureHint:
+    return FailureHint(
+        f"内容不符合要求: {reason}",
+        suggestion="如果是相关性问题，可以重命名关键词组或者将不相关内容拆分出来；如果是冗余代码和引用段落，可以将其替换为源代码位置、URL或其他获取方式。",
+    )
+
+
+_CODE_BLOCK = re.compile(r"^(```|~~~)[^\n]*\n(.*?)^\1[ \t]*$", re.MULTILINE | re.DOTALL)
+_CITATION = re.compile(
+    r"https?://\S+"  # URL
+    r"|(?:[\w.-]+/)+[\w.-]+\.\w+"  # 带目录的文件路径
+    r"|\b[\w-]+\.\w{1,5}:\d+"  # file.py:123
+)
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# 本地预验证的统计：直接拒绝 / 交给 LLM
+prevalidation_stats = {"rejected": 0, "ambiguous": 0}
 
-    text_without_chinese = re.sub(r"[\u4e00-\u9fff]", " ", content)
-    words = re.findall(r"\b[a-zA-Z0-9]+\b", text_without_chinese)
-    english_count = len(words)
 
-    return chinese_count + english_count
+def prevalidation_summary() -> dict:
+    return {**prevalidation_stats, "llm_calls_saved": prevalidation_stats["rejected"]}
+
+
+def keyword_overlap(content: str, keywords: Iterable[str]) -> float:
+    """关键词覆盖率：在内容中出现过的关键词占比（内容中的单词以关键词开头即算出现）"""
+    keywords = list(keywords)
+    if not keywords:
+        return 0.0
+    tokens = set(_TOKEN.findall(content.lower()))
+    hits = sum(1 for kw in keywords if any(token.startswith(kw) for token in tokens))
+    return hits / len(keywords)
+
+
+def cited_code_block(content: str) -> int | None:
+    """内容同时包含源码位置/URL 时，返回最长代码块的行数；否则返回 None"""
+    blocks = list(_CODE_BLOCK.finditer(content))
+    if not blocks:
+        return None
+    prose = _CODE_BLOCK.sub("", content)
+    if not _CITATION.search(prose):
+        return None
+    return max(block.group(2).count("\n") for block in blocks)
+
+
+def prevalidate_semantics(content: str, keywords: frozenset[str]) -> str | None:
+    """本地确定性预验证，只拒绝明显不合格的内容
+
+    只出现关键词不能说明内容相关，因此本地从不直接判定合格。
+
+    Returns:
+        拒绝原因；无法确定时返回 None，交给 LLM 判断
+    """
+    code_lines = cited_code_block(content)
+    if code_lines is not None and code_lines > PREVALIDATE_MAX_CODE_LINES:
+        return f"包含 {code_lines} 行的代码块，且已给出源码位置或 URL，代码块本身是冗余的"
+
+    overlap = keyword_overlap(content, keywords)
+    if overlap <= PREVALIDATE_REJECT_OVERLAP:
+        # 中文内容不会出现英文关键词本身，不能据此判断为无关
+        letters = [char for char in content if char.isalpha()]
+        cjk = sum(1 for char in letters if "\u4e00" <= char <= "\u9fff")
+        if letters and cjk / len(letters) < PREVALIDATE_MAX_CJK_RATIO:
+            return f"内容与关键词组 {', '.join(sorted(keywords))} 没有任何共同词"
+
+    return None
+
+
+def _prevalidate(content: str, keywords: frozenset[str]) -> FailureHint | None:
+    """运行本地预验证（已开启时）并计数，明显不合格时返回拒绝提示"""
+    if not PREVALIDATE_ENABLED:
+        return None
+    reason = prevalidate_semantics(content, keywords)
+    if reason is None:
+        prevalidation_stats["ambiguous"] += 1
+        return None
+    prevalidation_stats["rejected"] += 1
+    logger.warning(f"[Validate:Semantics] Pre-rejected for {sorted(keywords)}: {reason}")
+    return _rejection(reason)
+
+
+async def _cached_judgement(
+    key: str, subject: str, judge: Callable[[], Awaitable[Verdict | None]]
+) -> Result[None, FailureHint]:
+    """复用缓存中 key 的判定，没有时调用 judge 并缓存结果（subject 用于日志）"""
+    verdict = validation_cache.get(key) if validation_cache is not None else None
+    if verdict is not None:
+        logger.info(f"[Validate:Semantics] Cache hit for {subject}")
+        accepted, reason = verdict.accepted, verdict.reason
+    else:
+        match await judge():
+            case None:
+                logger.error(f"[Validate:Semantics] LLM timeout for: {subject}")
+                return Err(FailureHint("未知错误导致语义验证失败"))
+            case (accepted, reason):
+                pass
+        if validation_cache is not None:
+            validation_cache.put(key, accepted, reason)
+
+    if accepted:
+        return Ok(None)
+    logger.warning(f"[Validate:Semantics] Rejected {subject}: {reason}")
+    return Err(_rejection(reason or "（未提供原因）"))
 
 
 async def validate_semantics(
     content: str, keywords: frozenset[str]
 ) -> Result[None, FailureHint]:
-    """使用 LLM 验证内容的语义质量（相关性 + 避免冗余的代码片段）"""
-    final_tools: list[ToolUnionParam] = [
-        {
-            "name": "accept",
-            "description": "判定记忆内容合格",
-            "input_schema": {"type": "object", "properties": {}, "required": []},
-        },
-        {
-            "name": "reject",
-            "description": "判定记忆内容不合格",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "reason": {
-                        "type": "string",
-                        "description": "拒绝的具体原因",
-                    }
-                },
-                "required": ["reason"],
+    """验证内容的语义质量
+
+    先做本地预验证，明显不合格的直接拒绝；其余的复用缓存中的判定或交给 LLM
+    """
+    rejection = _prevalidate(content, keywords)
+    if rejection is not None:
+        return Err(rejection)
+
+    key = verdict_key(keywords, content, SEMANTICS_CRITERIA_VERSION)
+    return await _cached_judgement(
+        key, str(sorted(keywords)), lambda: validation_batcher.judge(key, content, keywords)
+    )
+
+
+def edit_excerpt(content: str, edit: ContentEdit) -> str | None:
+    """修改处及前后上下文的片段（修改后的文本用 <edit> 标出）
+
+    修改量相对全文过大、或片段已覆盖全文时返回 None，应改为验证全文
+    """
+    changed = max(len(edit.old_text), len(edit.new_text))
+    if changed > EDIT_VALIDATION_MAX_RATIO * len(content):
+        return None
+
+    start, end = edit.start, edit.start + len(edit.new_text)
+    lo = max(0, start - EDIT_VALIDATION_CONTEXT_CHARS)
+    hi = min(len(content), end + EDIT_VALIDATION_CONTEXT_CHARS)
+    if lo == 0 and hi == len(content):
+        return None
+
+    return "".join(
+        [
+            "……" if lo > 0 else "",
+            content[lo:start],
+            "<edit>",
+            content[start:end],
+            "</edit>",
+            content[end:hi],
+            "……" if hi < len(content) else "",
+        ]
+    )
+
+
+async def validate_semantics_edit(
+    content: str, keywords: frozenset[str], edit: ContentEdit
+) -> Result[None, FailureHint]:
+    """验证部分更新后内容的语义质量：只把修改处附近的片段交给 LLM
+
+    修改前的内容已经通过验证；修改较大时退回 validate_semantics 验证全文。
+    本地预验证仍作用于修改后的全文：它只做廉价的本地检查，而关键词覆盖等规则
+    对截断的片段并不成立
+    """
+    excerpt = edit_excerpt(content, edit)
+    if excerpt is None:
+        return await validate_semantics(content, keywords)
+
+    rejection = _prevalidate(content, keywords)
+    if rejection is not None:
+        return Err(rejection)
+
+    async def judge() -> Verdict | None:
+        logger.info(
+            f"[Validate:Semantics] Checking edit of {sorted(keywords)}: "
+            f"{len(excerpt)}/{len(content)} chars"
+        )
+        return await _judge_semantics_edit(excerpt, keywords)
+
+    key = verdict_key(keywords, excerpt, SEMANTICS_CRITERIA_VERSION + ":edit")
+    return await _cached_judgement(key, f"edit of {sorted(keywords)}", judge)
+
+
+_VERDICT_TOOLS: list[ToolUnionParam] = [
+    {
+        "name": "accept",
+        "description": "判定记忆内容合格",
+        "input_schema": {"type": "object", "properties": {}, "required": []},
+    },
+    {
+        "name": "reject",
+        "description": "判定记忆内容不合格",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "reason": {
+                    "type": "string",
+                    "description": "拒绝的具体原因",
+                }
             },
+            "required": ["reason"],
         },
-    ]
+    },
+]
+
+
+async def _ask_verdict(initial_prompt: str) -> tuple[bool, str | None] | None:
+    """让 LLM 调用 accept / reject 给出判定，未给出判定时返回 None"""
+    result = await llm.small_agent(
+        initial_prompt=initial_prompt,
+        tools=[],
+        final=_VERDICT_TOOLS,
+        maxIter=1,
+        call_class=llm.CallClass.VALIDATION,
+    )
+
+    if result is None:
+        return None
+
+    tool_name, tool_input = result
+    if tool_name == "accept":
+        return True, None
+    elif tool_name == "reject":
+        return False, tool_input.get("reason", "（未提供原因）")
+
+    return None
 
+
+async def _judge_semantics_edit(
+    excerpt: str, keywords: frozenset[str]
+) -> tuple[bool, str | None] | None:
+    """使用 LLM 判断一处修改的语义质量（只看修改处附近的片段）"""
     keywords_str = ", ".join(keywords)
-    initial_prompt = f"""你需要判断给定的记忆内容是否符合质量要求。
+    initial_prompt = f"""你需要判断对一条记忆的修改是否符合质量要求。
 
-检查两个方面：
+下面只给出修改处附近的片段：修改后的文本位于 <edit> 与 </edit> 之间，片段以外的内容已经通过验证。
+结合上下文，只判断修改后的文本是否合格：
 
-1. **相关性**：内容是否与关键词组高度相关，关键词组能否完整且准确概括记忆内容。
+{_SEMANTICS_CRITERIA}
 
-2. **避免冗余**：检查是否存在可以省略的冗余代码片段或引用段落。
-   - 如果某个代码片段或引用段落**已经提供了获取方式**（如源代码位置、URL、文献引用等），那么该代码/段落本身就是冗余的。
-   - 简短的代码示例（1-3行）或关键引用可以保留，但大段代码/长篇引用配上对应的获取方式时，就应该只留获取方式
+关键词组：{keywords_str}
+
+记忆片段：
+{excerpt}
+
+请判断修改是否合格，并调用对应的工具：
+- 如果合格（相关且无冗余），调用 accept
+- 如果不合格，调用 reject 并给出具体原因"""
+
+    return await _ask_verdict(initial_prompt)
+
+
+async def _judge_semantics(
+    content: str, keywords: frozenset[str]
+) -> tuple[bool, str | None] | None:
+    """使用 LLM 判断内容的语义质量（相关性 + 避免冗余的代码片段）
+
+    Returns:
+        (是否合格, 拒绝原因)；LLM 未给出判定时返回 None
+    """
+    keywords_str = ", ".join(keywords)
+    initial_prompt = f"""你需要判断给定的记忆内容是否符合质量要求。
 
+{_SEMANTICS_CRITERIA}
 
 关键词组：{keywords_str}
 
@@ -118,31 +429,102 @@ async def validate_semantics(
 - 如果合格（相关且无冗余），调用 accept
 - 如果不合格，调用 reject 并给出具体原因"""
 
+    return await _ask_verdict(initial_prompt)
+
+
+async def _judge_semantics_batch(
+    items: list[tuple[str, frozenset[str]]],
+) -> dict[int, tuple[bool, str | None]]:
+    """一次 LLM 请求判断多条记忆的语义质量
+
+    Returns:
+        序号 → (是否合格, 拒绝原因)；LLM 漏判或判定格式不对的项不在结果中
+    """
+    final_tools: list[ToolUnionParam] = [
+        {
+            "name": "submit_verdicts",
+            "description": "提交每条记忆的判定结果",
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "verdicts": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "index": {
+                                    "type": "integer",
+                                    "description": "记忆的序号",
+                                },
+                                "accept": {
+                                    "type": "boolean",
+                                    "description": "是否合格",
+                                },
+                                "reason": {
+                                    "type": "string",
+                                    "description": "不合格时的具体原因",
+                                },
+                            },
+                            "required": ["index", "accept"],
+                        },
+                    }
+                },
+                "required": ["verdicts"],
+            },
+        }
+    ]
+
+    sections = "\n\n".join(
+        f"""<memory index="{i}">
+关键词组：{", ".join(keywords)}
+
+记忆内容：
+{content}
+</memory>"""
+        for i, (content, keywords) in enumerate(items)
+    )
+    initial_prompt = f"""你需要逐条判断给定的 {len(items)} 条记忆内容是否符合质量要求，各条独立判断、互不影响。
+
+{_SEMANTICS_CRITERIA}
+
+{sections}
+
+请调用 submit_verdicts，为每一条记忆（按 index）给出判定：
+- 合格（相关且无冗余）：accept 为 true
+- 不合格：accept 为 false，并在 reason 中给出具体原因"""
+
     result = await llm.small_agent(
         initial_prompt=initial_prompt,
         tools=[],
         final=final_tools,
         maxIter=1,
+        call_class=llm.CallClass.VALIDATION,
     )
 
     if result is None:
-        logger.error(f"[Validate:Semantics] LLM timeout for: {sorted(keywords)}")
-        return Err(FailureHint("未知错误导致语义验证失败"))
+        return {}
 
     tool_name, tool_input = result
-    if tool_name == "accept":
-        return Ok(None)
-    elif tool_name == "reject":
-        reason = tool_input.get("reason", "（未提供原因）")
-        logger.warning(
-            f"[Validate:Semantics] Rejected for {sorted(keywords)}: {reason}"
+    if tool_name != "submit_verdicts":
+        return {}
+
+    verdicts: dict[int, tuple[bool, str | None]] = {}
+    for item in tool_input.get("verdicts", []):
+        index, accept = item.get("index"), item.get("accept")
+        if not isinstance(index, int) or not 0 <= index < len(items):
+            continue
+        if not isinstance(accept, bool):
+            continue
+        verdicts[index] = (
+            (True, None) if accept else (False, item.get("reason") or "（未提供原因）")
         )
+    return verdicts
 
-        return Err(
-            FailureHint(
-                f"内容不符合要求: {reason}",
-                suggestion="如果是相关性问题，可以重命名关键词组或者将不相关内容拆分出来；如果是冗余代码和引用段落，可以将其替换为源代码位置、URL或其他获取方式。",
-            )
-        )
 
-    return Err(FailureHint("未知错误"))
+# 并发的语义验证在短时间窗口内合并为一次 LLM 请求
+validation_batcher = ValidationBatcher(
+    _judge_semantics,
+    _judge_semantics_batch,
+    window=VALIDATION_BATCH_WINDOW_SECONDS,
+    max_items=VALIDATION_BATCH_MAX_ITEMS,
+)
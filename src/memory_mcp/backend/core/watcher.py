@@ -0,0 +1,179 @@
+"""目录监视 - 发现 .memories 中由外部（git、编辑器、其他工具）造成的修改"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from ..config import WATCH_DEBOUNCE_SECONDS, WATCH_POLL_INTERVAL_SECONDS
+from ..logger import logger
+
+WATCH_MODES = ("off", "auto", "inotify", "poll")
+
+# inotify 事件（见 <sys/inotify.h>）
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+# 回调参数为发生变化的 memory 名称；None 表示事件丢失，需要全部重新检查
+ChangeCallback = Callable[[set[str] | None], Awaitable[None]]
+
+
+def _memory_name(file_name: str) -> str | None:
+    if file_name.endswith(".md") and not file_name.startswith("."):
+        return file_name[:-3]
+    return None
+
+
+def _open_inotify(directory: Path) -> int | None:
+    """打开监视 directory 的 inotify 描述符（非 Linux 或失败时返回 None）"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(directory), IN_MASK) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+def _snapshot(directory: Path) -> dict[str, tuple[int, int, int]]:
+    """轮询模式：记录每个 memory 文件的 (size, mtime_ns, ino)"""
+    snapshot = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name = _memory_name(entry.name)
+            if name is None:
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[name] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    return snapshot
+
+
+class MemoryWatcher:
+    """监视 memory 目录，把一段时间内变化的文件名合并后交给回调
+
+    - inotify：Linux 上通过 ctypes 调用 libc，事件驱动
+    - poll：定期比较目录快照，用于其他平台或 inotify 不可用时
+    - auto：优先 inotify，不可用时退回 poll
+    - 回调串行执行；自身写入同样会触发事件，由回调方按 revision 识别并忽略
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        on_change: ChangeCallback,
+        mode: str = "auto",
+        debounce: float = WATCH_DEBOUNCE_SECONDS,
+        poll_interval: float = WATCH_POLL_INTERVAL_SECONDS,
+    ):
+        if mode not in WATCH_MODES or mode == "off":
+            raise ValueError(f"无效的监视模式 '{mode}'，可选: auto, inotify, poll")
+        self._directory = directory
+        self._on_change = on_change
+        self._mode = mode
+        self._debounce = debounce
+        self._poll_interval = poll_interval
+        self._fd: int | None = None
+        self._pending: set[str] | None = set()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def mode(self) -> str:
+        """实际使用的监视方式（inotify 或 poll）"""
+        return "inotify" if self._fd is not None else "poll"
+
+    def start(self) -> None:
+        if self._mode in ("auto", "inotify"):
+            self._fd = _open_inotify(self._directory)
+            if self._fd is None and self._mode == "inotify":
+                logger.warning("[Watch] inotify unavailable, falling back to polling")
+
+        if self._fd is not None:
+            asyncio.get_running_loop().add_reader(self._fd, self._read_events)
+            self._task = asyncio.create_task(self._dispatch_loop())
+        else:
+            self._task = asyncio.create_task(self._poll_loop())
+        logger.info(f"[Watch] Watching {self._directory} ({self.mode})")
+
+    async def stop(self) -> None:
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _read_events(self) -> None:
+        try:
+            data = os.read(self._fd, 64 * 1024)  # type: ignore
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            raw_name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self._pending = None
+            elif self._pending is not None:
+                name = _memory_name(os.fsdecode(raw_name))
+                if name is not None:
+                    self._pending.add(name)
+        self._wakeup.set()
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self._debounce)  # 合并 git checkout 等批量修改
+            self._wakeup.clear()
+            names, self._pending = self._pending, set()
+            if names is None or names:
+                await self._notify(names)
+
+    async def _poll_loop(self) -> None:
+        previous = await asyncio.to_thread(_snapshot, self._directory)
+        while True:
+            await asyncio.sleep(self._poll_interval)
+            current = await asyncio.to_thread(_snapshot, self._directory)
+            changed = {
+                name
+                for name in previous.keys() | current.keys()
+                if previous.get(name) != current.get(name)
+            }
+            previous = current
+            if changed:
+                await self._notify(changed)
+
+    async def _notify(self, names: set[str] | None) -> None:
+        try:
+            await self._on_change(names)
+        except Exception as e:
+            logger.error(f"[Watch] Failed to apply changes: {e}", exc_info=True)
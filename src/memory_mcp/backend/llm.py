@@ -1,13 +1,256 @@
 """LLM 交互工具函数"""
 
-import anthropic
-from anthropic import AsyncAnthropic
-from anthropic.types import MessageParam, ToolUnionParam
+import asyncio
+import heapq
+import itertools
+import json
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine, Iterator
+from contextlib import aclosing, contextmanager
+from enum import IntEnum
+from typing import Any, TypeVar
 
-from .config import DEFAULT_MODEL
+import anthropic
+from anthropic import NOT_GIVEN, AsyncAnthropic, NotGiven
+from anthropic.types import (
+    MessageParam,
+    TextBlockParam,
+    ToolChoiceParam,
+    ToolUnionParam,
+    ToolUseBlock,
+)
+
+from .config import (
+    DEFAULT_MODEL,
+    LLM_BACKOFF_BASE_SECONDS,
+    LLM_BACKOFF_MAX_SECONDS,
+    LLM_MAX_IN_FLIGHT,
+    LLM_MAX_RETRIES,
+    LLM_TOKENS_PER_MINUTE,
+    MODEL_ROUTES,
+    PROMPT_CACHING,
+    SMALL_FAST_MODEL,
+    STREAMING,
+)
 from .logger import logger
 
-client = AsyncAnthropic()
+# 重试由 LLMScheduler 统一负责，关闭 SDK 自带的重试
+client = AsyncAnthropic(max_retries=0)
+
+T = TypeVar("T")
+
+
+class CallClass(IntEnum):
+    """LLM 请求类别，值越小优先级越高；使用的模型见 config.MODEL_ROUTES"""
+
+    FAST_RECALL = 0  # 交互式快速查询，用户在等待结果
+    DEEP_RECALL = 1  # 交互式深度查询
+    MEMORIZE = 2  # 后台保存任务
+    VALIDATION = 3  # 写入前的语义验证
+
+
+def select_model(call_class: CallClass) -> str:
+    """按请求类别选择模型（small / default 或具体模型名）"""
+    route = MODEL_ROUTES.get(call_class.name.lower(), "default")
+    return {"small": SMALL_FAST_MODEL, "default": DEFAULT_MODEL}.get(route, route)
+
+
+class LLMScheduler:
+    """全局 LLM 请求调度器
+
+    - 同时进行的请求数不超过 max_in_flight
+    - tokens_per_minute > 0 时用令牌桶限制每分钟的输入 token（按请求大小粗略估计，
+      响应返回后按实际用量校正）
+    - 等待中的请求按 CallClass 优先级放行，同优先级先到先得；队首放不行时后面的也不放行，
+      保证高优先级请求不会被低优先级请求插队
+    - 限流、过载和连接错误按带抖动的指数退避重试；响应带 retry-after 时按其等待，
+      并在这段时间内暂停放行所有请求
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        tokens_per_minute: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._max_in_flight = max_in_flight
+        self._capacity = float(tokens_per_minute)
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._clock = clock
+
+        self._in_flight = 0
+        self._tokens = self._capacity
+        self._refilled_at = clock()
+        self._paused_until = 0.0
+        self._waiters: list[tuple[int, int, float, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self.retries = 0
+        self.rate_limited = 0
+
+    async def acquire(self, call_class: CallClass, tokens: float) -> float:
+        """等待一个请求名额（及令牌桶中的 token），按优先级排队
+
+        Returns:
+            实际从令牌桶中扣除的 token 数（release 时用于校正）
+        """
+        if self._capacity > 0:
+            tokens = min(tokens, self._capacity)  # 超出桶容量的请求等桶满即可放行
+        else:
+            tokens = 0.0
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (call_class, next(self._seq), tokens, future))
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # 已获得名额后才被取消
+            else:
+                self._waiters = [w for w in self._waiters if w[3] is not future]
+                heapq.heapify(self._waiters)
+                self._wake()
+            raise
+        return tokens
+
+    def release(self, estimated: float = 0.0, actual: float | None = None) -> None:
+        """归还名额；actual 为实际用量时按差额校正令牌桶"""
+        self._in_flight -= 1
+        if self._capacity > 0 and actual is not None:
+            self._refill()
+            self._tokens = min(self._capacity, self._tokens - (actual - estimated))
+        self._wake()
+
+    def retry_delay(self, attempt: int, error: Exception) -> float | None:
+        """第 attempt 次尝试失败后的等待时间，不应重试时返回 None"""
+        if attempt >= self._max_retries or not _is_retryable(error):
+            return None
+
+        delay = random.uniform(0, min(self._backoff_max, self._backoff_base * 2**attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, self._backoff_base)
+        if isinstance(error, anthropic.RateLimitError):
+            self.rate_limited += 1
+            self._paused_until = max(self._paused_until, self._clock() + delay)
+        self.retries += 1
+        logger.warning(
+            f"[LLM] {type(error).__name__}, retry {attempt + 1}/{self._max_retries} "
+            f"in {delay:.1f}s"
+        )
+        return delay
+
+    async def run(
+        self,
+        call_class: CallClass,
+        tokens: float,
+        request: Callable[[], Awaitable[T]],
+        usage: Callable[[T], float] | None = None,
+    ) -> T:
+        """在调度下执行 request()，可重试的错误按退避策略重试"""
+        for attempt in itertools.count():
+            charged = await self.acquire(call_class, tokens)
+            actual = None
+            try:
+                result = await request()
+                if usage is not None:
+                    actual = usage(result)
+                return result
+            except anthropic.APIError as e:
+                delay = self.retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            finally:
+                self.release(charged, actual)
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self._capacity,
+            self._tokens + (now - self._refilled_at) * self._capacity / 60,
+        )
+        self._refilled_at = now
+
+    def _wake(self) -> None:
+        """按优先级放行等待中的请求，直到名额或 token 不足"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():  # 已取消
+                heapq.heappop(self._waiters)
+                continue
+            if self._in_flight >= self._max_in_flight:
+                return
+
+            now = self._clock()
+            wait = self._paused_until - now
+            if self._capacity > 0:
+                self._refill()
+                if self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self._capacity)
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._wake)
+                return
+
+            heapq.heappop(self._waiters)
+            self._in_flight += 1
+            self._tokens -= tokens
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+        }
+
+
+def _is_retryable(error: Exception) -> bool:
+    """限流（429）、服务端错误/过载（5xx、529）和连接错误可以重试"""
+    if isinstance(error, (anthropic.RateLimitError, anthropic.APIConnectionError)):
+        return True
+    return isinstance(error, anthropic.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: Exception) -> float | None:
+    if not isinstance(error, anthropic.APIStatusError):
+        return None
+    value = error.response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _estimate_tokens(*parts: Any) -> float:
+    """粗略估计请求的输入 token 数（序列化后每 3 个字符约 1 个 token）"""
+    return len(json.dumps(parts, ensure_ascii=False, default=str)) / 3
+
+
+def _input_tokens(response: anthropic.types.Message) -> float:
+    usage = response.usage
+    return usage.input_tokens + (usage.cache_creation_input_tokens or 0)
+
+
+scheduler = LLMScheduler(
+    max_in_flight=LLM_MAX_IN_FLIGHT,
+    tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+    max_retries=LLM_MAX_RETRIES,
+    backoff_base=LLM_BACKOFF_BASE_SECONDS,
+    backoff_max=LLM_BACKOFF_MAX_SECONDS,
+)
 
 
 class Tool:
@@ -16,6 +259,9 @@ class Tool:
     子类需要重载 execute() 方法来实现具体的工具逻辑。
     """
 
+    # 是否修改 memory：同一轮中写操作与它之前、之后的调用都按模型给出的顺序执行
+    writes: bool = False
+
     def __init__(self, name: str, description: str, input_schema: dict):
         """初始化工具
 
@@ -49,6 +295,14 @@ class Tool:
         """
         return True
 
+    def reserve(self) -> bool:
+        """为一次调用预留额度，返回是否可以执行
+
+        同一轮的调用在并发执行前按原顺序依次预留；有次数限制的子类应在这里计数，
+        这样并发执行的调用也不会超过上限。默认实现：工具可用即可执行。
+        """
+        return self.is_available()
+
     def to_anthropic_tool(self) -> ToolUnionParam:
         """转换为 Anthropic API 需要的工具格式
 
@@ -98,32 +352,104 @@ def _log_conversation_history(messages: list[MessageParam], reason: str) -> None
 
 
 async def continue_conversation(
-    system_prompt: str,
+    system_prompt: str | list[TextBlockParam],
     messages: list[MessageParam],
     tools: list[ToolUnionParam],
-    model: str = DEFAULT_MODEL,
+    model: str | None = None,
     max_tokens: int = 4096,
+    tool_choice: ToolChoiceParam | NotGiven = NOT_GIVEN,
+    call_class: CallClass = CallClass.DEEP_RECALL,
 ) -> anthropic.types.Message:
-    """继续多轮对话
+    """继续多轮对话（经 scheduler 排队、限速和重试）
 
     Args:
-        system_prompt: 系统提示
+        system_prompt: 系统提示（可以是带 cache_control 的文本块列表）
         messages: 消息历史
         tools: 工具定义列表
-        model: 模型名称
+        model: 模型名称（None 时按 call_class 选择）
         max_tokens: 最大 token 数
+        tool_choice: 工具选择策略
+        call_class: 请求类别（决定排队优先级，以及未指定 model 时使用的模型）
 
     Returns:
         LLM 响应对象
     """
-    try:
-        return await client.messages.create(
-            model=model,
-            max_tokens=max_tokens,
-            system=system_prompt,
-            messages=messages,
-            tools=tools,
+    model = model or select_model(call_class)
+    with _logging_api_errors():
+        response = await scheduler.run(
+            call_class,
+            _estimate_tokens(system_prompt, messages, tools),
+            lambda: client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                system=system_prompt,
+                messages=messages,
+                tools=tools,
+                tool_choice=tool_choice,
+            ),
+            usage=_input_tokens,
         )
+    _log_usage(response)
+    return response
+
+
+async def stream_conversation(
+    system_prompt: str | list[TextBlockParam],
+    messages: list[MessageParam],
+    tools: list[ToolUnionParam],
+    model: str | None = None,
+    max_tokens: int = 4096,
+    tool_choice: ToolChoiceParam | NotGiven = NOT_GIVEN,
+    call_class: CallClass = CallClass.DEEP_RECALL,
+) -> AsyncIterator[ToolUseBlock | anthropic.types.Message]:
+    """continue_conversation 的流式版本
+
+    每个 tool_use 块生成完毕时立即产出该块，响应结束后最后产出完整的响应对象。
+    提前结束迭代（用 contextlib.aclosing 包裹）会关闭连接、不再接收剩余内容。
+    整个流式响应期间占用一个 scheduler 名额；只有尚未产出任何块时的失败才会重试。
+    """
+    model = model or select_model(call_class)
+    estimated = _estimate_tokens(system_prompt, messages, tools)
+    with _logging_api_errors():
+        for attempt in itertools.count():
+            charged = await scheduler.acquire(call_class, estimated)
+            response = None
+            started = False
+            try:
+                async with client.messages.stream(
+                    model=model,
+                    max_tokens=max_tokens,
+                    system=system_prompt,
+                    messages=messages,
+                    tools=tools,
+                    tool_choice=tool_choice,
+                ) as stream:
+                    async for event in stream:
+                        if (
+                            event.type == "content_block_stop"
+                            and event.content_block.type == "tool_use"
+                        ):
+                            started = True
+                            yield event.content_block
+                    response = await stream.get_final_message()
+                break
+            except anthropic.APIError as e:
+                delay = None if started else scheduler.retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            finally:
+                scheduler.release(
+                    charged, _input_tokens(response) if response is not None else None
+                )
+            await asyncio.sleep(delay)
+    _log_usage(response)
+    yield response
+
+
+@contextmanager
+def _logging_api_errors() -> Iterator[None]:
+    try:
+        yield
     except anthropic.RateLimitError as e:
         logger.warning(f"[LLM] Rate limited: {e}")
         raise
@@ -135,54 +461,223 @@ async def continue_conversation(
         raise
 
 
+def _log_usage(response: anthropic.types.Message) -> None:
+    usage = response.usage
+    logger.debug(
+        f"[LLM] Usage ({response.model}): input={usage.input_tokens}, "
+        f"cache_read={usage.cache_read_input_tokens or 0}, "
+        f"cache_write={usage.cache_creation_input_tokens or 0}, "
+        f"output={usage.output_tokens}"
+    )
+
+
+# 流式模式下 final 工具到达时仍在执行的工具调用（保留引用直到完成）
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def _tool_message(message: str) -> str:
+    return message
+
+
+class _TurnOrder:
+    """一轮中工具调用的执行顺序
+
+    读操作之间并发执行；写操作等待之前开始的所有调用完成后才执行，
+    之后的调用也要等它完成，因此写操作与其他调用的先后关系和模型给出的顺序一致。
+    """
+
+    def __init__(self):
+        self._started: list[asyncio.Task] = []
+        self._last_write: asyncio.Task | None = None
+
+    def schedule(self, coro: Coroutine[Any, Any, str], writes: bool) -> asyncio.Task:
+        if writes:
+            deps = list(self._started)
+        else:
+            deps = [self._last_write] if self._last_write is not None else []
+        task = asyncio.ensure_future(self._after(deps, coro))
+        self._started.append(task)
+        if writes:
+            self._last_write = task
+        return task
+
+    @staticmethod
+    async def _after(deps: list[asyncio.Task], coro: Coroutine[Any, Any, str]) -> str:
+        if deps:
+            try:
+                await asyncio.wait(deps)
+            except BaseException:
+                coro.close()
+                raise
+        return await coro
+
+
+def _dispatch(call: dict, tool_map: dict[str, Tool], order: _TurnOrder) -> asyncio.Task:
+    """为一次工具调用预留额度并按本轮的执行顺序开始执行（不可执行时结果为错误信息）
+
+    必须按调用在响应中的顺序依次调用，预留顺序即额度分配顺序
+    """
+    tool_name = call["name"]
+    tool = tool_map.get(tool_name)
+    if tool is None:
+        return order.schedule(_tool_message(f"错误：工具 '{tool_name}' 不存在"), False)
+    if not tool.reserve():
+        return order.schedule(_tool_message(f"错误：工具 '{tool_name}' 不可用"), False)
+    return order.schedule(_run_tool(tool, call["input"]), tool.writes)
+
+
+def _detach(tasks: list[asyncio.Task]) -> None:
+    """不再等待这些工具调用的结果，但让它们执行完（避免写操作被中途取消）"""
+    for task in tasks:
+        if not task.done():
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+
+
+async def _run_tool(tool: Tool, tool_input: dict) -> str:
+    """执行一次工具调用，异常转为错误信息"""
+    try:
+        return await tool.execute(tool_input)
+    except Exception as e:
+        return f"工具执行失败: {str(e)}"
+
+
+def _cache_breakpoint(block: dict) -> dict:
+    """返回带缓存断点的块副本（断点之前的请求前缀可被后续请求复用）"""
+    return {**block, "cache_control": {"type": "ephemeral"}}
+
+
+def _tools_desc(tools: list[Tool]) -> str:
+    if not tools:
+        return "无"
+    return "\n".join(f"- {tool.name}: {tool.description}" for tool in tools)
+
+
+def _turn_note(iteration: int, maxIter: int, tools: list[Tool]) -> str:
+    """附在最新用户消息末尾的本轮预算说明（稳定前缀模式）"""
+    if iteration == maxIter - 1:
+        return f"【第 {iteration + 1}/{maxIter} 轮，这是最后一轮，必须调用最终答案工具】"
+
+    note = f"【第 {iteration + 1}/{maxIter} 轮，还剩 {maxIter - iteration - 1} 轮"
+    exhausted = [tool.name for tool in tools if not tool.is_available()]
+    if exhausted:
+        note += f"；以下工具已达到使用上限，不能再调用：{', '.join(exhausted)}"
+    return note + "】"
+
+
+def _with_message_breakpoint(messages: list[MessageParam]) -> list[MessageParam]:
+    """在最新消息的最后一块上设置缓存断点（不修改历史本身）"""
+    last = messages[-1]
+    blocks = list(last["content"])  # type: ignore
+    blocks[-1] = _cache_breakpoint(blocks[-1])
+    return [*messages[:-1], {"role": last["role"], "content": blocks}]  # type: ignore
+
+
 async def small_agent(
     initial_prompt: str,
     tools: list[Tool],
     final: list[ToolUnionParam],
     maxIter: int,
-    model: str = DEFAULT_MODEL,
+    model: str | None = None,
     max_tokens: int = 4096,
+    prompt_caching: bool = PROMPT_CACHING,
+    streaming: bool = STREAMING,
+    call_class: CallClass = CallClass.DEEP_RECALL,
 ) -> tuple[str, dict] | None:
     """小型 Agent 循环：多轮工具调用直到达到 final 工具或超时
 
+    prompt_caching 开启时使用稳定前缀：system 与工具列表在整个循环中逐字节不变，
+    历史消息只追加不修改，并在 system、工具列表和最新消息上设置缓存断点；
+    轮次与工具剩余次数改为附在最新的用户消息末尾，每轮只需为新增的 token 付费。
+
+    streaming 开启时流式接收响应：每个 tool_use 块生成完毕即开始执行，
+    final 工具一到达就立即返回（已开始执行的工具调用在后台执行完，结果丢弃）。
+
     Args:
         initial_prompt: 初始 prompt（用户消息）
         tools: Tool 对象列表（不包括 final 工具）
         final: final 工具列表（Anthropic 工具格式）
         maxIter: 最大迭代轮数
-        model: 模型名称
+        model: 模型名称（None 时按 call_class 选择）
         max_tokens: 最大 token 数
+        prompt_caching: 是否使用稳定前缀（提示词缓存）模式
+        streaming: 是否流式接收响应并提前执行工具
+        call_class: 请求类别（决定使用的模型和在 scheduler 中的排队优先级）
 
     Returns:
         成功时返回 (tool_name, tool_input) 元组，超时返回 None
     """
+    model = model or select_model(call_class)
+    logger.info(f"[Agent] Using {model} for {call_class.name.lower()}")
+
     tool_map = {tool.name: tool for tool in tools}
     final_names = {f["name"] for f in final}
     final_tools_desc = "\n".join(f"- {f['name']}: {f['description']}" for f in final)  # type: ignore
 
-    messages: list[MessageParam] = [{"role": "user", "content": initial_prompt}]
+    messages: list[MessageParam]
+    if prompt_caching:
+        stable_system: list[TextBlockParam] = [
+            _cache_breakpoint(
+                {
+                    "type": "text",
+                    "text": f"""你是一个智能助手，可以使用提供的工具来完成任务。
 
-    for iteration in range(maxIter):
-        # 动态过滤可用工具
-        available_tools = [tool for tool in tools if tool.is_available()]
+你最多有 {maxIter} 轮机会来完成任务。每轮的轮次和工具剩余情况附在最新一条用户消息的末尾。
 
-        # 最后一轮：只提供 final tools
-        if iteration == maxIter - 1:
-            anthropic_tools: list[ToolUnionParam] = final
-            tools_desc = "无"
-        else:
-            anthropic_tools: list[ToolUnionParam] = [
-                tool.to_anthropic_tool() for tool in available_tools
-            ] + final
-            tools_desc = (
-                chr(10).join(
-                    f"- {tool.name}: {tool.description}" for tool in available_tools
-                )
-                if available_tools
-                else "无"
+当你准备好给出最终答案时，调用以下工具之一：
+{final_tools_desc}
+
+可用工具：
+{_tools_desc(tools)}
+""",
+                }
+            )  # type: ignore
+        ]
+        stable_tools: list[ToolUnionParam] = [
+            tool.to_anthropic_tool() for tool in tools
+        ] + final
+        stable_tools[-1] = _cache_breakpoint(stable_tools[-1])  # type: ignore
+        messages = [
+            {"role": "user", "content": [{"type": "text", "text": initial_prompt}]}
+        ]
+    else:
+        messages = [{"role": "user", "content": initial_prompt}]
+
+    for iteration in range(maxIter):
+        if prompt_caching:
+            if messages[-1]["role"] == "assistant":  # 上一轮没有调用工具
+                messages.append({"role": "user", "content": []})
+            messages[-1]["content"].append(  # type: ignore
+                {"type": "text", "text": _turn_note(iteration, maxIter, tools)}
             )
+            request: dict[str, Any] = dict(
+                system_prompt=stable_system,
+                messages=_with_message_breakpoint(messages),
+                tools=stable_tools,
+            )
+            if iteration == maxIter - 1:
+                # 最后一轮只提供 final 工具并强制调用（代价是这一轮的缓存未命中）
+                request["tools"] = final
+                request["tool_choice"] = (
+                    {"type": "tool", "name": final[0]["name"]}
+                    if len(final) == 1
+                    else {"type": "any"}
+                )
+        else:
+            # 动态过滤可用工具
+            available_tools = [tool for tool in tools if tool.is_available()]
+
+            # 最后一轮：只提供 final tools
+            if iteration == maxIter - 1:
+                anthropic_tools: list[ToolUnionParam] = final
+                tools_desc = "无"
+            else:
+                anthropic_tools = [
+                    tool.to_anthropic_tool() for tool in available_tools
+                ] + final
+                tools_desc = _tools_desc(available_tools)
 
-        system_prompt = f"""你是一个智能助手，可以使用提供的工具来完成任务。
+            system_prompt = f"""你是一个智能助手，可以使用提供的工具来完成任务。
 
 你最多有 {maxIter} 轮机会来完成任务。当前是第 {iteration + 1} 轮。
 
@@ -193,47 +688,66 @@ async def small_agent(
 {tools_desc}
 """
 
-        response = await continue_conversation(
-            system_prompt=system_prompt,
-            messages=messages,
-            tools=anthropic_tools,
-            model=model,
-            max_tokens=max_tokens,
-        )
-
-        messages.append({"role": "assistant", "content": response.content})
+            request = dict(
+                system_prompt=system_prompt, messages=messages, tools=anthropic_tools
+            )
 
-        tool_calls = extract_tool_calls(response)
+        if streaming:
+            # 每个 tool_use 块到达时即按顺序预留额度并开始执行
+            running: list[asyncio.Task] = []
+            order = _TurnOrder()
+            async with aclosing(
+                stream_conversation(
+                    **request, model=model, max_tokens=max_tokens, call_class=call_class
+                )
+            ) as events:
+                try:
+                    async for event in events:
+                        if isinstance(event, ToolUseBlock):
+                            if event.name in final_names:
+                                _detach(running)
+                                _log_conversation_history(
+                                    messages, f"completed (final tool: {event.name})"
+                                )
+                                return (event.name, event.input)  # type: ignore
+                            call = {"name": event.name, "input": event.input, "id": event.id}
+                            running.append(_dispatch(call, tool_map, order))
+                        else:
+                            response = event
+                except BaseException:
+                    # 流中途失败：已开始的工具调用在后台执行完
+                    _detach(running)
+                    raise
+            messages.append({"role": "assistant", "content": response.content})
+            tool_calls = extract_tool_calls(response)
+            results = await asyncio.gather(*running)
+        else:
+            response = await continue_conversation(
+                **request, model=model, max_tokens=max_tokens, call_class=call_class
+            )
+            messages.append({"role": "assistant", "content": response.content})
+            tool_calls = extract_tool_calls(response)
+
+            for call in tool_calls:
+                if call["name"] in final_names:
+                    _log_conversation_history(
+                        messages, f"completed (final tool: {call['name']})"
+                    )
+                    return (call["name"], call["input"])
+
+            # 按调用顺序预留额度，再按本轮的执行顺序执行；结果保持原顺序
+            order = _TurnOrder()
+            results = await asyncio.gather(
+                *[_dispatch(call, tool_map, order) for call in tool_calls]
+            )
 
         if not tool_calls:
             continue
 
-        for call in tool_calls:
-            if call["name"] in final_names:
-                _log_conversation_history(
-                    messages, f"completed (final tool: {call['name']})"
-                )
-                return (call["name"], call["input"])
-
-        tool_results = []
-        for call in tool_calls:
-            tool_name = call["name"]
-            tool_input = call["input"]
-
-            tool = tool_map.get(tool_name)
-            if tool is None:
-                result = f"错误：工具 '{tool_name}' 不存在"
-            elif not tool.is_available():
-                result = f"错误：工具 '{tool_name}' 不可用"
-            else:
-                try:
-                    result = await tool.execute(tool_input)
-                except Exception as e:
-                    result = f"工具执行失败: {str(e)}"
-
-            tool_results.append(
-                {"type": "tool_result", "tool_use_id": call["id"], "content": result}
-            )
+        tool_results = [
+            {"type": "tool_result", "tool_use_id": call["id"], "content": result}
+            for call, result in zip(tool_calls, results)
+        ]
 
         messages.append({"role": "user", "content": tool_results})
 
@@ -0,0 +1,64 @@
+"""存储格式迁移 - 在 file 与 sqlite 两种存储后端之间导出 memory"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+from .core.memory_registry import Memory
+from .core.storage import STORAGE_BACKENDS, Storage, open_storage
+
+MIGRATE_BATCH_SIZE = 500  # 每批读取并写入的 memory 数（目标为 sqlite 时一批一个事务）
+
+
+async def migrate(source: Storage, target: Storage) -> int:
+    """把 source 中的全部 memory 复制到 target（保留版本号），返回复制的条数
+
+    target 必须为空；source 不做修改。
+    """
+    if target.scan():
+        raise ValueError("目标存储中已有 memory，请先清空目标存储")
+
+    stored = source.scan()
+    for start in range(0, len(stored), MIGRATE_BATCH_SIZE):
+        batch = stored[start : start + MIGRATE_BATCH_SIZE]
+        memories = [Memory(s.keywords, source, s.version, s.revision) for s in batch]
+        contents = await asyncio.gather(*(memory.load() for memory in memories))
+        await target.write_many(
+            [
+                (memory.keywords, content, memory.version)
+                for memory, content in zip(memories, contents)
+            ]
+        )
+    target.flush()
+    return len(stored)
+
+
+def main():
+    """迁移命令入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrate memories between storage backends")
+    parser.add_argument("--project", type=Path, required=True)
+    parser.add_argument("--from", dest="source", choices=STORAGE_BACKENDS, required=True)
+    parser.add_argument("--to", dest="target", choices=STORAGE_BACKENDS, required=True)
+    args = parser.parse_args()
+
+    if args.source == args.target:
+        parser.error("--from 与 --to 不能相同")
+
+    source = open_storage(args.project, args.source)
+    target = open_storage(args.project, args.target)
+    try:
+        count = asyncio.run(migrate(source, target))
+    except ValueError as e:
+        print(f"Migration failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        source.close()
+        target.close()
+
+    print(f"Migrated {count} memories from {args.source} to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,14 @@ from pathlib import Path
 from aiohttp import web
 
 from ..file_manager import get_cache_dir
-from .config import AUTO_SHUTDOWN_CHECK_INTERVAL_SECONDS, AUTO_SHUTDOWN_IDLE_SECONDS
+from . import llm
+from .config import (
+    AUTO_SHUTDOWN_CHECK_INTERVAL_SECONDS,
+    AUTO_SHUTDOWN_IDLE_SECONDS,
+    WARMUP_ENABLED,
+    WATCH_MODE,
+)
+from .core import validators
 from .core.memory_registry import MemoryRegistry
 from .lock import BackendLock
 from .logger import logger, setup_logger
@@ -37,6 +44,7 @@ class BackendServer:
 
         self._shutdown_event = asyncio.Event()
         self._shutdown_task: asyncio.Task | None = None
+        self._warmup_task: asyncio.Task | None = None
 
     async def handle_recall(self, request: web.Request) -> web.Response:
         """处理 recall 请求"""
@@ -85,6 +93,13 @@ class BackendServer:
         finally:
             self.active_tasks -= 1
 
+    async def _warm_up(self):
+        """后台预热任务（失败不影响正常服务）"""
+        try:
+            await self.registry.warm_up()
+        except Exception as e:
+            logger.error(f"Warm-up failed: {e}", exc_info=True)
+
     async def handle_health(self, request: web.Request) -> web.Response:
         """健康检查"""
 
@@ -94,6 +109,13 @@ class BackendServer:
                 "status": "healthy",
                 "active_tasks": self.active_tasks,
                 "log_path": str(log_path),
+                "list_cache": self.registry.list_cache_stats,
+                "content_cache": self.registry.content_cache_stats,
+                "warmup": self.registry.warmup_stats,
+                "validation_cache": self.validation_cache.stats(),
+                "validation_batches": validators.validation_batcher.stats(),
+                "prevalidation": validators.prevalidation_summary(),
+                "llm": llm.scheduler.stats(),
             }
         )
 
@@ -187,7 +209,9 @@ class BackendServer:
         try:
             logger.info(f"Starting backend for project: {self.project_root}")
 
+            self.validation_cache = validators.init_validation_cache(self.project_root)
             self.registry = MemoryRegistry(self.project_root)
+            watcher = self.registry.watch(WATCH_MODE) if WATCH_MODE != "off" else None
             app = self.create_app()
             runner = web.AppRunner(app)
             await runner.setup()
@@ -203,9 +227,17 @@ class BackendServer:
             self.last_activity = asyncio.get_event_loop().time()
 
             self._shutdown_task = asyncio.create_task(self.auto_shutdown_monitor())
+            if WARMUP_ENABLED:
+                self._warmup_task = asyncio.create_task(self._warm_up())
 
             await self._shutdown_event.wait()
             logger.info("Shutting down gracefully...")
+            if self._warmup_task is not None:
+                self._warmup_task.cancel()
+            if watcher is not None:
+                await watcher.stop()
+            self.registry.close()
+            self.validation_cache.save()
 
         except Exception as e:
             logger.error(f"Failed to start backend: {e}")
@@ -3,7 +3,7 @@
 from anthropic.types import ToolUnionParam
 
 from ..core.memory_registry import MemoryRegistry
-from ..llm import small_agent
+from ..llm import CallClass, small_agent
 from ..logger import logger
 from .memory_tools import (
     CreateMemoryTool,
@@ -66,6 +66,7 @@ async def memorize_memory(content: str, registry: MemoryRegistry):
             tools=[list_tool, read_tool, create_tool, update_tool],
             final=final_tools,
             maxIter=50,
+            call_class=CallClass.MEMORIZE,
         )
 
         if result is None:
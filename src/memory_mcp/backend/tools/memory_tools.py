@@ -2,6 +2,7 @@
 
 from rusty_results.prelude import Err, Ok
 
+from ..config import LIST_PAGE_SIZE
 from ..core.memory_registry import MemoryRegistry
 from ..llm import Tool
 
@@ -12,7 +13,7 @@ class ListMemoriesTool(Tool):
     def __init__(self, registry: MemoryRegistry):
         super().__init__(
             name="list_memories",
-            description="列出与关键词匹配的记忆，每个记忆用一组关键词作为唯一标识。",
+            description="列出与关键词匹配的记忆，每个记忆用一组关键词作为唯一标识。也可以按内容全文检索（mode=content）。",
             input_schema={
                 "type": "object",
                 "properties": {
@@ -20,7 +21,20 @@ class ListMemoriesTool(Tool):
                         "type": "array",
                         "items": {"type": "string"},
                         "description": "用来查询的关键词列表，每个关键词由小写字母和数字组成，且至少包含一个字母。如果不提供关键词，则列出所有记忆。",
-                    }
+                    },
+                    "mode": {
+                        "type": "string",
+                        "enum": ["keywords", "content"],
+                        "description": "检索方式：keywords（默认）匹配记忆的关键词组；content 在记忆内容中全文检索，并返回命中片段。",
+                    },
+                    "query": {
+                        "type": "string",
+                        "description": "content 模式下的检索文本（可包含中文）。不提供时使用 keywords。",
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "翻页游标：传入上一页结果给出的 cursor 获取下一页（无需再提供 keywords）。",
+                    },
                 },
                 "required": [],
             },
@@ -28,23 +42,54 @@ class ListMemoriesTool(Tool):
         self.registry = registry
 
     async def execute(self, tool_input: dict) -> str:
+        if tool_input.get("mode") == "content":
+            return await self._search_content(tool_input)
+
         keywords: list[str] = tool_input.get("keywords", None)  # type: ignore
         if keywords:
             keywords_str = ", ".join(sorted(keywords))
         else:
             keywords_str = ""
-        results = self.registry.list(keywords) if keywords else self.registry.list()
+        cursor = tool_input.get("cursor") or None
+
+        match self.registry.list(
+            keywords or None, limit=LIST_PAGE_SIZE, cursor=cursor
+        ):
+            case Ok(page):
+                pass
+            case Err(e):
+                error_msg = f"列出({keywords_str})的记忆失败: {e.message}"
+                if e.suggestion:
+                    error_msg += f"\n建议: {e.suggestion}"
+                return error_msg
 
-        if not results:
+        if not page.items:
             return f"未找到匹配({keywords_str})的记忆"
 
-        output = f"找到匹配({keywords_str}) {len(results)} 个记忆:\n"
-        for idx, kw_set in enumerate(results[:10], start=1):
+        output = f"找到匹配({keywords_str}) {page.total} 个记忆:\n"
+        for idx, kw_set in enumerate(page.items, start=page.offset + 1):
             keywords_str = ", ".join(sorted(kw_set))
             output += f"{idx}. {keywords_str}\n"
 
-        if len(results) > 10:
-            output += f"... 还有 {len(results) - 10} 个"
+        if page.next_cursor:
+            remaining = page.total - page.offset - len(page.items)
+            output += f'... 还有 {remaining} 个，传入 cursor="{page.next_cursor}" 查看下一页'
+
+        return output
+
+    async def _search_content(self, tool_input: dict) -> str:
+        query = tool_input.get("query") or " ".join(tool_input.get("keywords", []))
+        if not query.strip():
+            return "content 模式需要提供 query 或 keywords"
+
+        hits = await self.registry.search_content(query, limit=10)
+        if not hits:
+            return f"未找到内容匹配({query})的记忆"
+
+        output = f"找到内容匹配({query})的 {len(hits)} 个记忆:\n"
+        for idx, hit in enumerate(hits, start=1):
+            keywords_str = ", ".join(sorted(hit.keywords))
+            output += f"{idx}. {keywords_str}\n   > {hit.snippet}\n"
 
         return output
 
@@ -73,7 +118,7 @@ class ReadMemoryTool(Tool):
     async def execute(self, tool_input: dict) -> str:
         keywords = tool_input.get("keywords", [])
         keywords_str = ", ".join(sorted(keywords))
-        match self.registry.read(keywords):
+        match await self.registry.read(keywords):
             case Ok((keywords, content, version)):
                 keywords_str = ", ".join(sorted(keywords))
                 return f"""关键词组：{keywords_str}
@@ -91,6 +136,8 @@ class ReadMemoryTool(Tool):
 class CreateMemoryTool(Tool):
     """创建新的 memory"""
 
+    writes = True
+
     def __init__(self, registry: MemoryRegistry):
         super().__init__(
             name="create_memory",
@@ -132,6 +179,8 @@ class CreateMemoryTool(Tool):
 class UpdateMemoryTool(Tool):
     """更新现有 memory"""
 
+    writes = True
+
     def __init__(self, registry: MemoryRegistry):
         super().__init__(
             name="update_memory",
@@ -182,6 +231,8 @@ class UpdateMemoryTool(Tool):
 class ReassignMemoryTool(Tool):
     """重命名 memory 的 keywords"""
 
+    writes = True
+
     def __init__(self, registry: MemoryRegistry):
         super().__init__(
             name="reassign_memory",
@@ -241,17 +292,19 @@ class LimitedListMemoriesTool(ListMemoriesTool):
         self.max_calls = max_calls
         self.call_count = 0
 
-        self.description = f"列出与关键词匹配的记忆（最多可调用 {max_calls} 次），每个记忆用一组关键词作为唯一标识。"
-
-    async def execute(self, tool_input: dict) -> str:
-        """执行搜索并递增计数器"""
-        self.call_count += 1
-        return await super().execute(tool_input)
+        self.description = f"列出与关键词匹配的记忆（最多可调用 {max_calls} 次），每个记忆用一组关键词作为唯一标识。也可以按内容全文检索（mode=content）。"
 
     def is_available(self) -> bool:
         """检查是否已达到调用次数上限"""
         return self.call_count < self.max_calls
 
+    def reserve(self) -> bool:
+        """预留一次调用并递增计数器（已达上限时返回 False）"""
+        if not self.is_available():
+            return False
+        self.call_count += 1
+        return True
+
 
 class LimitedReadMemoryTool(ReadMemoryTool):
     """带次数限制的 read_memory 工具"""
@@ -268,11 +321,13 @@ class LimitedReadMemoryTool(ReadMemoryTool):
 
         self.description = f"读取指定记忆的内容（最多可读取 {max_reads} 篇）"
 
-    async def execute(self, tool_input: dict) -> str:
-        """执行读取并递增计数器"""
-        self.read_count += 1
-        return await super().execute(tool_input)
-
     def is_available(self) -> bool:
         """检查是否已达到读取次数上限"""
         return self.read_count < self.max_reads
+
+    def reserve(self) -> bool:
+        """预留一次读取并递增计数器（已达上限时返回 False）"""
+        if not self.is_available():
+            return False
+        self.read_count += 1
+        return True
@@ -10,7 +10,7 @@ from memory_mcp.backend.config import (
 )
 
 from ..core.memory_registry import MemoryRegistry
-from ..llm import small_agent
+from ..llm import CallClass, small_agent
 from ..logger import logger
 from .memory_tools import (
     LimitedListMemoriesTool,
@@ -109,6 +109,7 @@ async def deep_recall_memory(interest: str, registry: MemoryRegistry) -> str:
 
 提示：
 - list_memories 返回的是按匹配度排序的结果
+- 关键词找不到时，可以用 list_memories 的 content 模式在记忆内容中全文检索
 - read_memory 需要提供每个记忆唯一的关键词组
 - 如果没有相关内容，返回空数组"""
 
@@ -117,6 +118,7 @@ async def deep_recall_memory(interest: str, registry: MemoryRegistry) -> str:
             tools=[list_tool, read_tool],
             final=final_tools,
             maxIter=DEFAULT_MAX_ITER,
+            call_class=CallClass.DEEP_RECALL,
         )
 
         if result is None:
@@ -190,7 +192,7 @@ async def fast_recall_memory(interest: str, registry: MemoryRegistry) -> str:
 2. **每条信息必须标注来源**：source 字段必须是关键词数组，格式为 ["keyword1", "keyword2", ...]
 
 处理流程：
-1. 精心设计关键词，调用 list_memories 搜索
+1. 精心设计关键词，调用 list_memories 搜索（关键词不确定时可用 content 模式按内容检索）
 2. 阅读最相关的最多 {FAST_RECALL_MAX_READ} 篇记忆
 3. 提取相关信息并标注来源
 4. 如果没有相关内容，返回空数组
@@ -201,6 +203,7 @@ async def fast_recall_memory(interest: str, registry: MemoryRegistry) -> str:
             tools=[list_tool, read_tool],
             final=final_tools,
             maxIter=FAST_RECALL_MAX_ITER,  # 更小的迭代次数
+            call_class=CallClass.FAST_RECALL,
         )
 
         if result is None:
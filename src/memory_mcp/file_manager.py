@@ -1,7 +1,35 @@
 """文件管理器 - 负责文件系统 I/O 操作"""
 
+import asyncio
+import functools
 import hashlib
+import itertools
+import json
+import logging
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, TypeVar
+
+# 与 backend.logger 中的 logger 同名（backend.logger 依赖本模块，不能反向导入）
+logger = logging.getLogger("memory-mcp")
+
+T = TypeVar("T")
+
+# 文件 I/O 专用线程池：有界，避免阻塞事件循环，也不占用默认线程池
+IO_MAX_WORKERS = 4
+_io_executor = ThreadPoolExecutor(
+    max_workers=IO_MAX_WORKERS, thread_name_prefix="memory-io"
+)
+
+# 写入持久化级别：
+# - none: 原子替换但不 fsync（进程崩溃安全，掉电可能丢失最近的写入）
+# - batch: 组提交，一批中各文件并行 fsync，共享目录 fsync；提交进行期间到达的写入进入下一批
+# - per-write: 每次写入都 fsync 文件和目录
+DURABILITY_MODES = ("none", "batch", "per-write")
+
+_tmp_counter = itertools.count()
 
 
 def get_cache_dir(project_root: Path) -> Path:
@@ -16,6 +44,21 @@ def get_lock_file(project_root: Path) -> Path:
     return cache_dir / "backend.lock"
 
 
+def get_manifest_file(project_root: Path) -> Path:
+    cache_dir = get_cache_dir(project_root)
+    return cache_dir / "manifest.json"
+
+
+def get_access_stats_file(project_root: Path) -> Path:
+    cache_dir = get_cache_dir(project_root)
+    return cache_dir / "access.json"
+
+
+def get_validation_cache_file(project_root: Path) -> Path:
+    cache_dir = get_cache_dir(project_root)
+    return cache_dir / "validation_cache.json"
+
+
 def ensure_dir(dir: Path) -> Path:
     dir.mkdir(exist_ok=True)
     return dir
@@ -24,12 +67,213 @@ def ensure_dir(dir: Path) -> Path:
 def list_markdown_names(project_root: Path) -> list[str]:
     memories_dir = ensure_dir(project_root)
 
-    return [file_path.stem for file_path in memories_dir.glob("*.md")]
+    # 单次 os.scandir 遍历，不对每个文件调用 stat
+    with os.scandir(memories_dir) as entries:
+        return [
+            entry.name[:-3]
+            for entry in entries
+            if entry.name.endswith(".md") and not entry.name.startswith(".")
+        ]
 
 
 def read_file(file_path: Path) -> str:
     return file_path.read_text(encoding="utf-8")
 
 
-def write_file(file_path: Path, content: str) -> None:
-    file_path.write_text(content, encoding="utf-8")
+def load_json_cache(path: Path, parse: Callable[[Any], T]) -> T | None:
+    """读取缓存目录中的 JSON 文件，用 parse 转换
+
+    这类文件只是缓存：不存在时返回 None；无法读取或解析时记录警告并返回 None，
+    调用方从空状态开始
+    """
+    try:
+        return parse(json.loads(path.read_text(encoding="utf-8")))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"[Cache] Ignoring unreadable {path}: {e}")
+        return None
+
+
+def save_json_cache(path: Path, data: Any) -> None:
+    """原子写回缓存目录中的 JSON 文件"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_file(path, json.dumps(data, ensure_ascii=False))
+
+
+def write_file(file_path: Path, content: str, fsync: bool = False) -> None:
+    """原子写入：先写同目录下的临时文件，再重命名覆盖目标文件"""
+    tmp_path = _write_temp(file_path, content, fsync)
+    try:
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        _remove_quietly(tmp_path)
+        raise
+    if fsync:
+        _fsync_dir(file_path.parent)
+
+
+def _write_temp(file_path: Path, content: str, fsync: bool) -> Path:
+    # 以 . 开头且不以 .md 结尾，不会被 list_markdown_names 当作 memory
+    tmp_path = file_path.with_name(
+        f".{file_path.name}.{os.getpid()}.{next(_tmp_counter)}.tmp"
+    )
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+    except BaseException:
+        _remove_quietly(tmp_path)
+        raise
+    return tmp_path
+
+
+def _fsync_file(file_path: Path) -> None:
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dir(dir_path: Path) -> None:
+    """让目录中的重命名持久化（Windows 不支持对目录 fsync）"""
+    if os.name == "nt":
+        return
+    _fsync_file(dir_path)
+
+
+def _remove_quietly(file_path: Path) -> None:
+    try:
+        file_path.unlink()
+    except OSError:
+        pass
+
+
+def _rename_batch(
+    renames: list[tuple[Path, Path | BaseException]],
+) -> list[BaseException | None]:
+    """按顺序把已 fsync 的临时文件重命名为目标文件，每个目录只 fsync 一次
+
+    Args:
+        renames: (目标文件, 临时文件或写临时文件时的异常)
+
+    Returns:
+        每个写入的结果（None 表示成功），单个写入失败不影响同批的其他写入
+    """
+    results: list[BaseException | None] = [
+        tmp if isinstance(tmp, BaseException) else None for _, tmp in renames
+    ]
+    pending = [i for i, result in enumerate(results) if result is None]
+    try:
+        while pending:
+            i = pending.pop(0)
+            file_path, tmp_path = renames[i]
+            try:
+                os.replace(tmp_path, file_path)  # type: ignore[arg-type]
+            except Exception as e:
+                results[i] = e
+                _remove_quietly(tmp_path)  # type: ignore[arg-type]
+    except BaseException:
+        for i in pending:
+            _remove_quietly(renames[i][1])  # type: ignore[arg-type]
+        raise
+
+    committed = [i for i, result in enumerate(results) if result is None]
+    for dir_path in {renames[i][0].parent for i in committed}:
+        try:
+            _fsync_dir(dir_path)
+        except Exception as e:
+            for i in committed:
+                if renames[i][0].parent == dir_path:
+                    results[i] = e
+    return results
+
+
+class _GroupCommit:
+    """组提交：一次提交进行期间到达的写入排队，合并进下一次提交
+
+    - 没有提交在进行时，写入在本轮事件循环结束后立即提交，不额外等待
+    - 一批中各临时文件的写入和 fsync 在 I/O 线程池中并行执行，
+      之后按调用顺序重命名（同一文件的多次写入最后一次生效），每个目录只 fsync 一次
+    - 每个调用者只拿到自己那次写入的结果
+    """
+
+    def __init__(self):
+        self._pending: list[tuple[Path, str, asyncio.Future]] = []
+        self._flush_task: asyncio.Task | None = None
+
+    async def commit(self, file_path: Path, content: str) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((file_path, content, future))
+        if self._flush_task is None:
+            self._flush_task = loop.create_task(self._flush())
+        await future
+
+    async def _flush(self) -> None:
+        try:
+            await asyncio.sleep(0)  # 同一轮事件循环中到达的写入一起提交
+            while self._pending:
+                batch, self._pending = self._pending, []
+                await self._commit(batch)
+        finally:
+            self._flush_task = None
+
+    async def _commit(self, batch: list[tuple[Path, str, asyncio.Future]]) -> None:
+        try:
+            tmp_paths = await asyncio.gather(
+                *(_run_io(_write_temp, path, content, True) for path, content, _ in batch),
+                return_exceptions=True,
+            )
+            results = await _run_io(
+                _rename_batch, [(path, tmp) for (path, _, _), tmp in zip(batch, tmp_paths)]
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), error in zip(batch, results):
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+
+_group_commit = _GroupCommit()
+
+
+async def _run_io(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_io_executor, func, *args)
+
+
+async def aread_file(file_path: Path) -> str:
+    return await _run_io(read_file, file_path)
+
+
+async def awrite_file(
+    file_path: Path, content: str, durability: str = "none"
+) -> None:
+    """原子写入文件，durability 见 DURABILITY_MODES"""
+    if durability == "batch":
+        await _group_commit.commit(file_path, content)
+    elif durability in ("none", "per-write"):
+        await _run_io(write_file, file_path, content, durability == "per-write")
+    else:
+        raise ValueError(
+            f"未知的持久化级别 '{durability}'，可选: {', '.join(DURABILITY_MODES)}"
+        )
+
+
+async def aunlink(file_path: Path) -> None:
+    await _run_io(functools.partial(file_path.unlink, missing_ok=True))
+
+
+async def astat(file_path: Path) -> os.stat_result:
+    return await _run_io(os.stat, file_path)
@@ -0,0 +1,36 @@
+"""测试公共配置"""
+
+import pytest
+from rusty_results.prelude import Ok
+
+from memory_mcp.backend.config import MEMORIES_DIR_NAME
+from memory_mcp.backend.core import memory_registry
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path_factory, monkeypatch):
+    """把 HOME 指向临时目录，避免缓存目录（~/.memory-mcp）写入真实用户目录"""
+    home = tmp_path_factory.mktemp("home")
+    monkeypatch.setenv("HOME", str(home))
+    return home
+
+
+@pytest.fixture
+def accept_semantics(monkeypatch):
+    """跳过语义验证（不调用 LLM），所有内容都视为合格"""
+
+    async def accept(content, keywords, edit=None):
+        return Ok(None)
+
+    monkeypatch.setattr(memory_registry, "validate_semantics", accept)
+    monkeypatch.setattr(memory_registry, "validate_semantics_edit", accept)
+
+
+@pytest.fixture
+def memories_dir(tmp_path, request):
+    """<tmp_path>/.memories，预置测试模块 MEMORY_FILES（文件名 → 内容）中的文件"""
+    memories_dir = tmp_path / MEMORIES_DIR_NAME
+    memories_dir.mkdir()
+    for name, content in getattr(request.module, "MEMORY_FILES", {}).items():
+        (memories_dir / name).write_text(content, encoding="utf-8")
+    return memories_dir
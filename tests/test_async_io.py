@@ -0,0 +1,178 @@
+"""测试 memory 文件的异步读写"""
+
+import asyncio
+import time
+
+import pytest
+
+from memory_mcp import file_manager
+from memory_mcp.backend.config import MEMORIES_DIR_NAME
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    memories_dir = tmp_path / MEMORIES_DIR_NAME
+    memories_dir.mkdir()
+    (memories_dir / "api.md").write_text("接口设计", encoding="utf-8")
+    return MemoryRegistry(tmp_path)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_read_once(registry, monkeypatch):
+    """同一 memory 的并发加载共享一次文件读取"""
+    reads = []
+    read_file = file_manager.read_file
+
+    def counting_read(path):
+        reads.append(path)
+        return read_file(path)
+
+    monkeypatch.setattr(file_manager, "read_file", counting_read)
+    memory = registry._memories[frozenset(["api"])]
+
+    contents = await asyncio.gather(*(memory.load() for _ in range(8)))
+
+    assert contents == ["接口设计"] * 8
+    assert len(reads) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_load(registry):
+    """一个等待者被取消时，其他等待者仍能拿到内容"""
+    memory = registry._memories[frozenset(["api"])]
+
+    first = asyncio.create_task(memory.load())
+    second = asyncio.create_task(memory.load())
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "接口设计"
+    assert memory.is_loaded
+
+
+class TestAtomicWrite:
+    """测试原子写入与组提交"""
+
+    @pytest.mark.asyncio
+    async def test_batch_shares_fsync(self, tmp_path, monkeypatch):
+        """同一窗口内的写入各自 fsync 临时文件，共享一次目录 fsync"""
+        synced = []
+        fsync = file_manager.os.fsync
+
+        def counting_fsync(fd):
+            synced.append(fd)
+            fsync(fd)
+
+        monkeypatch.setattr(file_manager.os, "fsync", counting_fsync)
+        paths = [tmp_path / f"m{i}.md" for i in range(5)]
+
+        await asyncio.gather(
+            *(file_manager.awrite_file(p, p.stem, "batch") for p in paths)
+        )
+
+        assert [p.read_text() for p in paths] == [p.stem for p in paths]
+        assert len(synced) == len(paths) + 1
+        assert sorted(p.name for p in tmp_path.iterdir()) == sorted(p.name for p in paths)
+
+    @pytest.mark.asyncio
+    async def test_last_write_in_batch_wins(self, tmp_path):
+        path = tmp_path / "m.md"
+        await asyncio.gather(
+            *(file_manager.awrite_file(path, str(i), "batch") for i in range(10))
+        )
+        assert path.read_text() == "9"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("durability", ["none", "batch", "per-write"])
+    async def test_failed_write_keeps_old_content(self, tmp_path, monkeypatch, durability):
+        """重命名失败时原文件保持不变，也不留下临时文件"""
+        path = tmp_path / "m.md"
+        path.write_text("old")
+
+        def fail_replace(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(file_manager.os, "replace", fail_replace)
+        with pytest.raises(OSError):
+            await file_manager.awrite_file(path, "new", durability)
+
+        assert path.read_text() == "old"
+        assert list(tmp_path.iterdir()) == [path]
+
+    @pytest.mark.asyncio
+    async def test_writes_during_commit_form_next_batch(self, tmp_path, monkeypatch):
+        """提交进行期间到达的写入合并进下一批；空闲时的写入立即提交"""
+        batches = []
+        rename_batch = file_manager._rename_batch
+
+        def slow_rename(renames):
+            batches.append(sorted(path.name for path, _ in renames))
+            time.sleep(0.05)
+            return rename_batch(renames)
+
+        monkeypatch.setattr(file_manager, "_rename_batch", slow_rename)
+        first = asyncio.create_task(file_manager.awrite_file(tmp_path / "a.md", "a", "batch"))
+        while not batches:
+            await asyncio.sleep(0.001)
+        await asyncio.gather(
+            first,
+            *(file_manager.awrite_file(tmp_path / f"{n}.md", n, "batch") for n in "bcd"),
+        )
+
+        assert batches == [["a.md"], ["b.md", "c.md", "d.md"]]
+
+    @pytest.mark.asyncio
+    async def test_batch_failure_is_per_write(self, tmp_path, monkeypatch):
+        """同批中一个文件重命名失败，只有它的调用者得到异常"""
+        replace = file_manager.os.replace
+        bad = tmp_path / "bad.md"
+
+        def flaky_replace(src, dst):
+            if dst == bad:
+                raise OSError("disk full")
+            replace(src, dst)
+
+        monkeypatch.setattr(file_manager.os, "replace", flaky_replace)
+        paths = [tmp_path / "a.md", bad, tmp_path / "b.md"]
+
+        results = await asyncio.gather(
+            *(file_manager.awrite_file(p, p.stem, "batch") for p in paths),
+            return_exceptions=True,
+        )
+
+        assert results[0] is None and results[2] is None
+        assert isinstance(results[1], OSError)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["a.md", "b.md"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_durability(self, tmp_path):
+        with pytest.raises(ValueError):
+            await file_manager.awrite_file(tmp_path / "m.md", "x", "always")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_deletes(registry):
+    """并发删除同一 memory：只有一个成功，另一个得到“不存在”而不是异常"""
+    version = (await registry.read(["api"])).unwrap().version
+
+    results = await asyncio.gather(
+        registry.delete(["api"], version), registry.delete(["api"], version)
+    )
+
+    assert sorted(r.is_ok for r in results) == [False, True]
+    assert not registry.has_memory(["api"])
+
+
+@pytest.mark.asyncio
+async def test_update_after_concurrent_delete(registry, tmp_path, accept_semantics):
+    """删除先拿到锁时，等待中的 update 失败且不会把文件写回"""
+    version = (await registry.read(["api"])).unwrap().version
+
+    delete, update = await asyncio.gather(
+        registry.delete(["api"], version),
+        registry.update(["api"], "接口", "REST 接口", version),
+    )
+
+    assert delete.is_ok and update.is_err
+    assert not (tmp_path / MEMORIES_DIR_NAME / "api.md").exists()
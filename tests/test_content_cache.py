@@ -0,0 +1,108 @@
+"""测试 memory 内容的字节预算缓存"""
+
+import sys
+
+import pytest
+
+from memory_mcp.backend.config import MEMORIES_DIR_NAME
+from memory_mcp.backend.core import memory_registry
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+
+
+def _make_registry(tmp_path, monkeypatch, max_bytes):
+    memories_dir = tmp_path / MEMORIES_DIR_NAME
+    memories_dir.mkdir()
+    for name in ("alpha", "beta", "gamma"):
+        (memories_dir / f"{name}.md").write_text(name * 50)
+    monkeypatch.setattr(memory_registry, "CONTENT_CACHE_MAX_BYTES", max_bytes)
+    return MemoryRegistry(tmp_path)
+
+
+@pytest.mark.asyncio
+async def test_evicts_least_recently_used(tmp_path, monkeypatch):
+    budget = sys.getsizeof("alpha" * 50) * 2
+    registry = _make_registry(tmp_path, monkeypatch, budget)
+
+    await registry.read(["alpha"])
+    await registry.read(["beta"])
+    await registry.read(["alpha"])
+    await registry.read(["gamma"])
+
+    memories = registry._memories
+    assert memories[frozenset(["alpha"])].is_loaded
+    assert memories[frozenset(["gamma"])].is_loaded
+    assert not memories[frozenset(["beta"])].is_loaded
+
+    stats = registry.content_cache_stats
+    assert stats["bytes"] <= budget
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+
+
+@pytest.mark.asyncio
+async def test_evicted_content_reloads(tmp_path, monkeypatch):
+    registry = _make_registry(tmp_path, monkeypatch, 1)
+
+    first = (await registry.read(["alpha"])).unwrap()
+    await registry.read(["beta"])
+    assert not registry._memories[frozenset(["alpha"])].is_loaded
+
+    again = (await registry.read(["alpha"])).unwrap()
+    assert again == first
+
+
+@pytest.mark.asyncio
+async def test_update_survives_reads_during_write(tmp_path, monkeypatch, accept_semantics):
+    """写入等待期间其他读取不会淘汰正在写入的 memory，update 返回新内容"""
+    registry = _make_registry(tmp_path, monkeypatch, 1)
+    version = (await registry.read(["alpha"])).unwrap().version
+
+    write = registry._storage.write
+
+    async def write_then_read(keywords, content, version):
+        revision = await write(keywords, content, version)
+        await registry.read(["beta"])  # 预算只够一项，但 alpha 正在写入
+        return revision
+
+    monkeypatch.setattr(registry._storage, "write", write_then_read)
+    updated = (await registry.update(["alpha"], "alpha" * 50, "new", version)).unwrap()
+
+    assert updated.content == "new"
+    assert registry._memories[frozenset(["alpha"])].is_loaded
+    assert (await registry.read(["alpha"])).unwrap() == updated
+
+
+@pytest.mark.asyncio
+async def test_reload_before_write_lands_keeps_new_content(
+    tmp_path, monkeypatch, accept_semantics
+):
+    """写入落盘前 memory 被淘汰并重新读取时，不会加载写入前的旧文件"""
+    registry = _make_registry(tmp_path, monkeypatch, 1)
+    old_version = (await registry.read(["alpha"])).unwrap().version
+
+    write = registry._storage.write
+
+    async def read_then_write(keywords, content, version):
+        await registry.read(["beta"])  # 预算只够一项
+        await registry.read(["alpha"])  # 旧文件仍在磁盘上
+        return await write(keywords, content, version)
+
+    monkeypatch.setattr(registry._storage, "write", read_then_write)
+    updated = (await registry.update(["alpha"], "alpha" * 50, "new", old_version)).unwrap()
+    monkeypatch.setattr(registry._storage, "write", write)
+
+    assert (await registry.read(["alpha"])).unwrap() == updated
+    assert (await registry.update(["alpha"], "new", "stale", old_version)).is_err
+    assert (tmp_path / MEMORIES_DIR_NAME / "alpha.md").read_text() == "new"
+
+
+@pytest.mark.asyncio
+async def test_version_check_load_is_accounted(tmp_path, monkeypatch):
+    """版本号检查加载的内容计入缓存预算，之后可以被淘汰"""
+    registry = _make_registry(tmp_path, monkeypatch, 1)
+    alpha = registry._memories[frozenset(["alpha"])]
+
+    assert (await registry.delete(["alpha"], "stale")).is_err
+    assert alpha.is_loaded and alpha in registry._content_cache
+
+    await registry.read(["beta"])
+    assert not alpha.is_loaded
@@ -0,0 +1,70 @@
+"""测试记忆内容的 BM25 全文索引"""
+
+import pytest
+
+from memory_mcp.backend.core.content_index import ContentIndex, make_snippet, tokenize
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+
+
+class TestTokenize:
+    """测试分词"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("Hello World 42", ["hello", "world", "42"]),
+        ("数据库设计", ["数据", "据库", "库设", "设计"]),
+        ("用 redis 做缓存", ["用", "redis", "做缓", "缓存"]),
+        ("!@#", []),
+    ])
+    def test_tokenize(self, text, expected):
+        assert tokenize(text) == expected
+
+
+class TestContentIndex:
+    """测试 BM25 检索与增量维护"""
+
+    def test_ranking(self):
+        index = ContentIndex()
+        index.add(frozenset(["a"]), "redis cache eviction policy")
+        index.add(frozenset(["b"]), "postgres connection pool")
+        index.add(frozenset(["c"]), "redis redis cluster setup")
+
+        ranked = [key for key, _ in index.search("redis", limit=10)]
+        assert ranked == [frozenset(["c"]), frozenset(["a"])]
+
+    def test_replace_and_remove(self):
+        index = ContentIndex()
+        key = frozenset(["a"])
+        index.add(key, "redis cache")
+        index.add(key, "postgres pool")
+
+        assert index.search("redis", limit=10) == []
+        assert [k for k, _ in index.search("postgres", limit=10)] == [key]
+
+        index.remove(key)
+        assert len(index) == 0
+        assert index.search("postgres", limit=10) == []
+
+    def test_snippet_centers_on_hit(self):
+        text = "x " * 100 + "needle here" + " y" * 100
+        snippet = make_snippet(text, ["needle"], width=30)
+        assert "needle" in snippet
+        assert snippet.startswith("…") and snippet.endswith("…")
+
+
+@pytest.mark.asyncio
+async def test_registry_search_follows_writes(tmp_path, memories_dir, accept_semantics):
+    """registry 在 create/delete 后同步更新全文索引"""
+    (memories_dir / "deploy.md").write_text("部署使用 docker compose", encoding="utf-8")
+
+    registry = MemoryRegistry(tmp_path)
+    hits = await registry.search_content("docker")
+    assert [hit.keywords for hit in hits] == [frozenset(["deploy"])]
+    assert "docker" in hits[0].snippet
+
+    snapshot = (await registry.create(["cache"], "缓存使用 redis")).unwrap()
+    assert [hit.keywords for hit in await registry.search_content("redis")] == [
+        frozenset(["cache"])
+    ]
+
+    await registry.delete(["cache"], snapshot.version)
+    assert await registry.search_content("redis") == []
@@ -0,0 +1,78 @@
+"""测试部分更新只验证修改处附近的片段"""
+
+import pytest
+
+from memory_mcp.backend.config import MEMORIES_DIR_NAME
+from memory_mcp.backend.core import validators
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+from memory_mcp.backend.core.validators import ContentEdit, edit_excerpt
+
+HEAD = "HEAD " + "a" * 2000
+TAIL = "b" * 2000 + " TAIL"
+
+
+class TestEditExcerpt:
+    def test_small_edit_keeps_bounded_context(self):
+        content = HEAD + "new text" + TAIL
+        excerpt = edit_excerpt(content, ContentEdit(len(HEAD), "old", "new text"))
+
+        assert "<edit>new text</edit>" in excerpt
+        assert "HEAD" not in excerpt and "TAIL" not in excerpt
+        assert len(excerpt) < 1000
+
+    def test_large_edit_falls_back(self):
+        content = "x" * 100 + "y" * 60
+        assert edit_excerpt(content, ContentEdit(100, "z", "y" * 60)) is None
+
+    def test_short_document_falls_back(self):
+        content = "short note about api"
+        assert edit_excerpt(content, ContentEdit(0, "long", "short")) is None
+
+
+@pytest.mark.asyncio
+async def test_update_sends_only_excerpt(tmp_path, monkeypatch):
+    prompts = []
+
+    async def fake_agent(initial_prompt, tools, final, maxIter, **kwargs):
+        prompts.append(initial_prompt)
+        return "accept", {}
+
+    monkeypatch.setattr(validators.llm, "small_agent", fake_agent)
+    monkeypatch.setattr(validators, "PREVALIDATE_ENABLED", False)
+    monkeypatch.setattr(validators, "validation_cache", None)
+
+    memories_dir = tmp_path / MEMORIES_DIR_NAME
+    memories_dir.mkdir()
+    (memories_dir / "api.md").write_text(HEAD + " old " + TAIL)
+    registry = MemoryRegistry(tmp_path)
+
+    version = (await registry.read(["api"])).unwrap().version
+    snapshot = (await registry.update(["api"], " old ", " new ", version)).unwrap()
+
+    assert snapshot.content == HEAD + " new " + TAIL
+    assert len(prompts) == 1
+    assert "<edit> new </edit>" in prompts[0]
+    assert "HEAD" not in prompts[0] and "TAIL" not in prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_edit_runs_prevalidation_on_full_content(monkeypatch):
+    """部分更新同样先做本地预验证（作用于全文），明显不合格时不调用 LLM"""
+    prompts = []
+
+    async def fake_agent(initial_prompt, tools, final, maxIter, **kwargs):
+        prompts.append(initial_prompt)
+        return "accept", {}
+
+    monkeypatch.setattr(validators.llm, "small_agent", fake_agent)
+    monkeypatch.setattr(validators, "validation_cache", None)
+
+    code = "\n".join(f"line_{i} = {i}" for i in range(30))
+    insert = f" 见 src/api/app.py:1\n```python\n{code}\n```\n"
+    content = "api " + HEAD + insert + TAIL
+    edit = ContentEdit(len("api " + HEAD), "", insert)
+
+    result = await validators.validate_semantics_edit(content, frozenset(["api"]), edit)
+
+    assert "代码块" in result.unwrap_err().message
+    assert prompts == []
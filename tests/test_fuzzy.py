@@ -0,0 +1,93 @@
+"""测试关键词模糊匹配（BK-tree）及 registry 的拼写纠错"""
+
+import random
+
+import pytest
+
+from memory_mcp.backend.config import FUZZY_MATCH_THRESHOLD, MEMORIES_DIR_NAME
+from memory_mcp.backend.core.fuzzy import BKTree, levenshtein, similarity
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+
+
+class TestLevenshtein:
+    """测试编辑距离"""
+
+    @pytest.mark.parametrize("a,b,expected", [
+        ("", "", 0),
+        ("abc", "", 3),
+        ("kitten", "sitting", 3),
+        ("database", "databse", 1),
+        ("config", "config", 0),
+    ])
+    def test_distance(self, a, b, expected):
+        assert levenshtein(a, b) == expected
+        assert levenshtein(b, a) == expected
+
+
+class TestBKTree:
+    """测试 BK-tree 检索与暴力扫描一致"""
+
+    def test_closest_same_as_brute_force(self):
+        rng = random.Random(7)
+        words = {
+            "".join(rng.choices("abcde", k=rng.randint(3, 9))) for _ in range(300)
+        }
+        tree = BKTree()
+        for word in words:
+            tree.add(word)
+
+        for _ in range(100):
+            query = "".join(rng.choices("abcde", k=rng.randint(3, 9)))
+            candidates = [
+                (-similarity(query, w), w)
+                for w in words
+                if similarity(query, w) >= FUZZY_MATCH_THRESHOLD
+            ]
+            expected = min(candidates)[1] if candidates else None
+            assert tree.closest(query, FUZZY_MATCH_THRESHOLD) == expected
+
+    def test_removed_words_not_returned(self):
+        tree = BKTree()
+        tree.add("migration")
+        tree.add("migrations")
+        assert tree.closest("migraton", 0.8) == "migration"
+
+        tree.remove("migration")
+        assert tree.closest("migraton", 0.8) == "migrations"
+
+        tree.remove("migrations")
+        assert tree.closest("migraton", 0.8) is None
+
+        tree.add("migration")
+        assert tree.closest("migraton", 0.8) == "migration"
+
+
+class TestRegistryFuzzy:
+    """测试 registry 的拼写纠错"""
+
+    @pytest.fixture
+    def registry(self, tmp_path):
+        memories_dir = tmp_path / MEMORIES_DIR_NAME
+        memories_dir.mkdir()
+        (memories_dir / "database-migration.md").write_text("x")
+        (memories_dir / "api.md").write_text("y")
+        return MemoryRegistry(tmp_path)
+
+    @pytest.mark.asyncio
+    async def test_read_auto_corrects(self, registry):
+        snapshot = (await registry.read(["databse", "migration"])).unwrap()
+        assert snapshot.keywords == frozenset(["database", "migration"])
+
+    @pytest.mark.asyncio
+    async def test_delete_suggests_instead_of_correcting(self, registry):
+        error = (await registry.delete(["databse", "migration"], "00000000")).unwrap_err()
+        assert error.message == "Memory 不存在"
+        assert "database, migration" in error.suggestion
+
+    def test_list_corrects_unmatched_keyword(self, registry):
+        assert registry.list(["migrtion"]).unwrap().items == [frozenset(["database", "migration"])]
+
+    @pytest.mark.asyncio
+    async def test_short_keywords_not_corrected(self, registry):
+        """短关键词的一个字符差异达不到阈值"""
+        assert (await registry.read(["apo"])).is_err
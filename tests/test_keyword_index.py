@@ -0,0 +1,131 @@
+"""测试关键词倒排索引与 MemoryRegistry.list 的一致性"""
+
+import random
+
+import pytest
+
+from memory_mcp.backend.config import MEMORIES_DIR_NAME
+from memory_mcp.backend.core import matcher
+from memory_mcp.backend.core.keyword_index import KeywordIndex
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+
+VOCAB = [
+    "api", "apis", "rapid", "design", "designer", "config", "configuration",
+    "db", "database", "cache", "cached", "test", "testing", "latest", "a1",
+    "auth", "oauth", "token", "tokenizer", "log", "logger", "blog",
+]
+
+
+def _linear_list(keys: list[frozenset[str]], query: list[str]) -> list[frozenset[str]]:
+    """原始实现：遍历所有 memory 打分后稳定排序"""
+    scored = []
+    for key in keys:
+        score = matcher.score_match(query, key)
+        if score > 0:
+            scored.append((key, score))
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [key for key, _ in scored]
+
+
+def _random_keys(rng: random.Random, count: int) -> list[frozenset[str]]:
+    keys: dict[frozenset[str], None] = {}
+    while len(keys) < count:
+        keys[frozenset(rng.sample(VOCAB, rng.randint(1, 4)))] = None
+    return list(keys)
+
+
+class TestKeywordIndex:
+    """测试索引的候选检索"""
+
+    @pytest.mark.parametrize("query", ["a", "ap", "api", "apis", "ig", "fig", "zzz", "config"])
+    def test_matching_keywords(self, query):
+        """候选关键词与暴力子串检查一致"""
+        index = KeywordIndex()
+        for kw in VOCAB:
+            index.add(frozenset([kw]))
+
+        assert index.matching_keywords(query) == {kw for kw in VOCAB if query in kw}
+
+    def test_remove_drops_unused_keywords(self):
+        """最后一个使用者被移除后，关键词不再被检索到"""
+        index = KeywordIndex()
+        index.add(frozenset(["api", "design"]))
+        index.add(frozenset(["api"]))
+
+        index.remove(frozenset(["api", "design"]))
+        assert index.matching_keywords("sign") == set()
+        assert index.candidates(["api"]) == {frozenset(["api"])}
+
+        index.remove(frozenset(["api"]))
+        assert index.matching_keywords("api") == set()
+        assert len(index) == 0
+
+    def test_empty_query_keyword(self):
+        """空查询词不产生候选（score_match 中贡献为 0）"""
+        index = KeywordIndex()
+        index.add(frozenset(["api"]))
+        assert index.candidates([""]) == set()
+
+
+class TestRegistryList:
+    """测试 list 与线性扫描结果完全一致"""
+
+    def test_same_as_linear_scan(self, tmp_path):
+        rng = random.Random(0)
+        keys = _random_keys(rng, 120)
+        memories_dir = tmp_path / MEMORIES_DIR_NAME
+        memories_dir.mkdir()
+        for key in keys:
+            (memories_dir / ("-".join(sorted(key)) + ".md")).write_text("x")
+
+        registry = MemoryRegistry(tmp_path)
+        loaded = list(registry._memories.keys())
+
+        for _ in range(50):
+            query = sorted(rng.sample(VOCAB + ["a", "ig", "to", "zz"], rng.randint(1, 3)))
+            assert registry.list(query).unwrap().items == _linear_list(loaded, query)
+
+    @pytest.mark.asyncio
+    async def test_index_follows_delete(self, tmp_path):
+        memories_dir = tmp_path / MEMORIES_DIR_NAME
+        memories_dir.mkdir()
+        (memories_dir / "api-design.md").write_text("x")
+        (memories_dir / "api.md").write_text("y")
+
+        registry = MemoryRegistry(tmp_path)
+        version = (await registry.read(["api"])).unwrap().version
+        await registry.delete(["api"], version)
+
+        assert registry.list(["api"]).unwrap().items == [frozenset(["api", "design"])]
+
+    def test_pages_concatenate_to_full_list(self, tmp_path):
+        """分页结果依次拼接等于完整结果"""
+        rng = random.Random(1)
+        memories_dir = tmp_path / MEMORIES_DIR_NAME
+        memories_dir.mkdir()
+        for key in _random_keys(rng, 80):
+            (memories_dir / ("-".join(sorted(key)) + ".md")).write_text("x")
+        registry = MemoryRegistry(tmp_path)
+
+        for query in (["a"], ["api", "log"], None):
+            full = registry.list(query).unwrap().items
+            pages = []
+            page = registry.list(query, limit=7).unwrap()
+            while True:
+                assert page.total == len(full)
+                pages.extend(page.items)
+                if page.next_cursor is None:
+                    break
+                page = registry.list(limit=7, cursor=page.next_cursor).unwrap()
+            assert pages == full
+
+    def test_cursor_rejects_other_query(self, tmp_path):
+        memories_dir = tmp_path / MEMORIES_DIR_NAME
+        memories_dir.mkdir()
+        for name in ("api", "api-design", "api-test"):
+            (memories_dir / f"{name}.md").write_text("x")
+        registry = MemoryRegistry(tmp_path)
+
+        cursor = registry.list(["api"], limit=1).unwrap().next_cursor
+        assert registry.list(["design"], limit=1, cursor=cursor).is_err
+        assert registry.list(["api"], limit=1, cursor="not-a-cursor").is_err
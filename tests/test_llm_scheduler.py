@@ -0,0 +1,122 @@
+"""测试全局 LLM 请求调度器"""
+
+import asyncio
+from types import SimpleNamespace
+
+import anthropic
+import pytest
+
+from memory_mcp.backend import llm
+from memory_mcp.backend.config import DEFAULT_MODEL, SMALL_FAST_MODEL
+from memory_mcp.backend.llm import CallClass, LLMScheduler, select_model
+
+
+def _scheduler(**kwargs) -> LLMScheduler:
+    options = dict(
+        max_in_flight=1,
+        tokens_per_minute=0,
+        max_retries=3,
+        backoff_base=0.01,
+        backoff_max=0.05,
+    )
+    options.update(kwargs)
+    return LLMScheduler(**options)
+
+
+def _error(cls, status: int, headers: dict | None = None) -> anthropic.APIStatusError:
+    response = SimpleNamespace(status_code=status, headers=headers or {}, request=None)
+    return cls("error", response=response, body=None)
+
+
+@pytest.mark.asyncio
+async def test_priority_order():
+    """名额释放后按优先级放行：recall 先于 memorize 先于 validation"""
+    scheduler = _scheduler()
+    await scheduler.acquire(CallClass.MEMORIZE, 0)
+    order = []
+
+    async def request(call_class: CallClass):
+        await scheduler.acquire(call_class, 0)
+        order.append(call_class)
+        scheduler.release()
+
+    tasks = [
+        asyncio.create_task(request(c))
+        for c in (CallClass.VALIDATION, CallClass.MEMORIZE, CallClass.DEEP_RECALL)
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["waiting"] == 3
+
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    assert order == [CallClass.DEEP_RECALL, CallClass.MEMORIZE, CallClass.VALIDATION]
+
+
+@pytest.mark.asyncio
+async def test_retry_respects_retry_after():
+    scheduler = _scheduler()
+    attempts = []
+
+    async def request():
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) == 1:
+            raise _error(anthropic.RateLimitError, 429, {"retry-after": "0.1"})
+        return "ok"
+
+    assert await scheduler.run(CallClass.FAST_RECALL, 0, request) == "ok"
+    assert attempts[1] - attempts[0] >= 0.1
+    assert scheduler.stats() == {"in_flight": 0, "waiting": 0, "retries": 1, "rate_limited": 1}
+
+
+@pytest.mark.asyncio
+async def test_gives_up_on_client_errors_and_after_max_retries():
+    scheduler = _scheduler(max_retries=2)
+    calls = 0
+
+    async def bad_request():
+        nonlocal calls
+        calls += 1
+        raise _error(anthropic.BadRequestError, 400)
+
+    with pytest.raises(anthropic.BadRequestError):
+        await scheduler.run(CallClass.FAST_RECALL, 0, bad_request)
+    assert calls == 1
+
+    async def overloaded():
+        nonlocal calls
+        calls += 1
+        raise _error(anthropic.InternalServerError, 529)
+
+    calls = 0
+    with pytest.raises(anthropic.InternalServerError):
+        await scheduler.run(CallClass.VALIDATION, 0, overloaded)
+    assert calls == 3
+    assert scheduler.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_delays_requests():
+    """令牌桶耗尽后，按补充速度等待"""
+    scheduler = _scheduler(max_in_flight=10, tokens_per_minute=60000)  # 1000 token/s
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    for _ in range(2):
+        await scheduler.acquire(CallClass.FAST_RECALL, 30000)
+    assert loop.time() - start < 0.05
+
+    await scheduler.acquire(CallClass.FAST_RECALL, 100)
+    assert loop.time() - start >= 0.09
+
+
+def test_model_routing(monkeypatch):
+    """验证与快速查询默认使用小模型，路由可以改为具体模型名"""
+    assert select_model(CallClass.VALIDATION) == SMALL_FAST_MODEL
+    assert select_model(CallClass.FAST_RECALL) == SMALL_FAST_MODEL
+    assert select_model(CallClass.DEEP_RECALL) == DEFAULT_MODEL
+    assert select_model(CallClass.MEMORIZE) == DEFAULT_MODEL
+
+    monkeypatch.setitem(llm.MODEL_ROUTES, "memorize", "claude-custom")
+    monkeypatch.setitem(llm.MODEL_ROUTES, "validation", "default")
+    assert select_model(CallClass.MEMORIZE) == "claude-custom"
+    assert select_model(CallClass.VALIDATION) == DEFAULT_MODEL
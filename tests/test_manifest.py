@@ -0,0 +1,96 @@
+"""测试 memory 清单（加速启动的元数据缓存）"""
+
+import json
+
+import pytest
+
+from memory_mcp.backend.core import file_storage
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+from memory_mcp.file_manager import get_manifest_file
+
+
+MEMORY_FILES = {"api-design.md": "x", "cache.md": "y", "Bad-Name.md": "z"}
+
+
+def test_manifest_written_on_first_load(tmp_path, memories_dir):
+    MemoryRegistry(tmp_path)
+
+    data = json.loads(get_manifest_file(tmp_path).read_text())
+    assert set(data["entries"]) == {"api-design", "cache"}
+    assert data["entries"]["api-design"]["keywords"] == ["api", "design"]
+    assert data["entries"]["cache"]["size"] == 1
+
+
+def test_known_files_not_reparsed(tmp_path, memories_dir, monkeypatch):
+    """第二次启动只解析新文件"""
+    MemoryRegistry(tmp_path)
+    (memories_dir / "new.md").write_text("n")
+
+    parsed = []
+    original = file_storage.extract_keywords_from_filename
+
+    def spy(name):
+        parsed.append(name)
+        return original(name)
+
+    monkeypatch.setattr(file_storage, "extract_keywords_from_filename", spy)
+    registry = MemoryRegistry(tmp_path)
+
+    assert sorted(parsed) == ["Bad-Name", "new"]
+    assert registry.has_memory(["api", "design"])
+    assert registry.has_memory(["new"])
+
+
+def test_external_delete_dropped(tmp_path, memories_dir):
+    MemoryRegistry(tmp_path)
+    (memories_dir / "cache.md").unlink()
+
+    registry = MemoryRegistry(tmp_path)
+
+    assert not registry.has_memory(["cache"])
+    data = json.loads(get_manifest_file(tmp_path).read_text())
+    assert set(data["entries"]) == {"api-design"}
+
+
+def test_corrupted_manifest_ignored(tmp_path, memories_dir):
+    manifest_file = get_manifest_file(tmp_path)
+    manifest_file.parent.mkdir(parents=True)
+    manifest_file.write_text("{not json")
+
+    registry = MemoryRegistry(tmp_path)
+
+    assert registry.has_memory(["cache"])
+    assert "cache" in json.loads(manifest_file.read_text())["entries"]
+
+
+@pytest.mark.asyncio
+async def test_version_check_without_reading_content(tmp_path, memories_dir, monkeypatch):
+    """清单中记录的版本号在文件未变时直接可用，不读取内容"""
+    registry = MemoryRegistry(tmp_path)
+    version = (await registry.read(["cache"])).unwrap().version
+    registry.flush()
+
+    def fail_read(path):
+        raise AssertionError(f"unexpected read: {path}")
+
+    monkeypatch.setattr(file_storage.file_manager, "read_file", fail_read)
+    registry = MemoryRegistry(tmp_path)
+
+    assert (await registry.delete(["cache"], version)).is_ok
+    assert not (memories_dir / "cache.md").exists()
+
+
+@pytest.mark.asyncio
+async def test_stale_version_recomputed_after_external_edit(tmp_path, memories_dir):
+    """文件被外部修改后，持久化的版本号失效并重新计算"""
+    registry = MemoryRegistry(tmp_path)
+    old_version = (await registry.read(["cache"])).unwrap().version
+    registry.flush()
+
+    (memories_dir / "cache.md").write_text("changed externally")
+    registry = MemoryRegistry(tmp_path)
+
+    snapshot = (await registry.read(["cache"])).unwrap()
+    assert snapshot.content == "changed externally"
+    assert snapshot.version != old_version
+    assert (await registry.delete(["cache"], old_version)).is_err
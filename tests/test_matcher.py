@@ -0,0 +1,90 @@
+"""测试 matcher 打分函数与批量打分引擎"""
+
+import random
+
+import pytest
+
+from memory_mcp.backend.config import MEMORIES_DIR_NAME
+from memory_mcp.backend.core import matcher
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+
+VOCAB = [
+    "api", "apis", "rapid", "design", "config", "configuration", "db",
+    "database", "cache", "test", "latest", "auth", "oauth", "token", "log",
+    "blog", "a1", "v2",
+]
+
+
+class TestScoreMatch:
+    """测试参考实现"""
+
+    def test_substring_weight(self):
+        """命中权重为 len(query)/len(keyword)"""
+        assert matcher.score_match(["api"], frozenset(["apis"])) == pytest.approx(0.75)
+
+    def test_no_match(self):
+        assert matcher.score_match(["zzz"], frozenset(["api"])) == 0
+
+
+class TestScoreMatchIdf:
+    """测试 IDF 加权打分"""
+
+    def test_idf_decreases_with_frequency(self):
+        assert matcher.idf(1, 100) > matcher.idf(10, 100) > matcher.idf(100, 100) > 0
+
+    def test_common_keyword_weighs_less(self):
+        weights = {"api": 0.5, "billing": 2.0}
+        assert matcher.score_match_idf(
+            ["api", "billing"], frozenset(["billing"]), weights.__getitem__
+        ) > matcher.score_match_idf(
+            ["api", "billing"], frozenset(["api"]), weights.__getitem__
+        )
+
+    def test_unknown_scorer(self):
+        with pytest.raises(ValueError):
+            matcher.select_scorer("nope")
+
+
+def test_registry_idf_ranking(tmp_path):
+    """常见关键词（api）的命中排在罕见关键词（billing）之后"""
+    memories_dir = tmp_path / MEMORIES_DIR_NAME
+    memories_dir.mkdir()
+    for name in ("api-cache", "api-log", "api-db", "billing"):
+        (memories_dir / f"{name}.md").write_text("x")
+
+    query = ["api", "billing"]
+    substring = MemoryRegistry(tmp_path, scorer="substring").list(query).unwrap()
+    weighted = MemoryRegistry(tmp_path, scorer="idf").list(query).unwrap()
+
+    assert weighted.items[0] == frozenset(["billing"])
+    assert set(weighted.items) == set(substring.items)
+
+
+@pytest.mark.skipif(matcher.np is None, reason="需要 numpy")
+class TestKeywordTable:
+    """测试向量化引擎与 score_match 等价"""
+
+    def test_equivalent_to_score_match(self):
+        rng = random.Random(42)
+        keys = list(
+            {frozenset(rng.sample(VOCAB, rng.randint(1, 4))): None for _ in range(300)}
+        )
+        table = matcher.KeywordTable(keys)
+
+        for _ in range(50):
+            query = rng.sample(VOCAB + ["a", "ig", "zz", "o"], rng.randint(1, 4))
+            expected = [matcher.score_match(query, key) for key in keys]
+            assert table.scores(query).tolist() == pytest.approx(expected)
+
+            ranked = [(key, s) for key, s in zip(keys, expected) if s > 0]
+            ranked.sort(key=lambda x: x[1], reverse=True)
+            assert set(table.rank(query)) == {key for key, _ in ranked}
+
+    def test_duplicate_query_keywords(self):
+        """重复的查询词会重复计分"""
+        table = matcher.KeywordTable([frozenset(["api", "design"])])
+        assert table.scores(["api", "api"])[0] == pytest.approx(2.0)
+
+    def test_empty_table(self):
+        table = matcher.KeywordTable([])
+        assert table.rank(["api"]) == []
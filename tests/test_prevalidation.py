@@ -0,0 +1,90 @@
+"""测试语义验证的本地预验证"""
+
+import pytest
+
+from memory_mcp.backend.core import validators
+
+CODE = "\n".join(f"line_{i} = {i}" for i in range(30))
+
+
+class TestPrevalidate:
+    def test_long_code_with_citation_rejected(self):
+        content = f"缓存实现见 src/cache/lru.py:42\n\n```python\n{CODE}\n```\n"
+        reason = validators.prevalidate_semantics(content, frozenset(["cache"]))
+        assert "代码块" in reason
+
+    def test_long_code_without_citation_is_ambiguous(self):
+        content = f"cache notes\n\n```python\n{CODE}\n```\n"
+        assert validators.prevalidate_semantics(content, frozenset(["cache"])) is None
+
+    def test_no_overlap_rejected_only_for_non_cjk(self):
+        keywords = frozenset(["auth", "token"])
+        assert validators.prevalidate_semantics(
+            "Deploy the frontend with npm run build.", keywords
+        ) is not None
+        assert validators.prevalidate_semantics("登录凭证在一小时后过期，需要刷新。", keywords) is None
+
+    @pytest.mark.parametrize(
+        "content, keywords",
+        [
+            ("今天天气很好, 和 redis 无关的闲聊, 我午饭吃了面条", ["redis"]),
+            (
+                "> Python is a programming language that lets you work quickly.\n" * 60
+                + "https://www.python.org/about/",
+                ["python"],
+            ),
+            (
+                "Auth tokens expire after one hour; refresh them via the tokenizer service.",
+                ["auth", "token"],
+            ),
+        ],
+    )
+    def test_full_overlap_is_not_accepted(self, content, keywords):
+        """出现全部关键词不代表内容合格，仍交给 LLM 判断"""
+        assert validators.prevalidate_semantics(content, frozenset(keywords)) is None
+
+    def test_partial_overlap_is_ambiguous(self):
+        content = "Auth is handled by the gateway."
+        assert validators.prevalidate_semantics(content, frozenset(["auth", "token"])) is None
+
+
+@pytest.fixture
+def fake_agent(monkeypatch):
+    """记录 LLM 调用，并拒绝提到“闲聊”的内容"""
+    calls = []
+
+    async def agent(initial_prompt, tools, final, maxIter, **kwargs):
+        calls.append(initial_prompt)
+        if "闲聊" in initial_prompt:
+            return "reject", {"reason": "与关键词无关"}
+        return "accept", {}
+
+    monkeypatch.setattr(validators.llm, "small_agent", agent)
+    monkeypatch.setattr(validators, "validation_cache", None)
+    monkeypatch.setattr(validators, "prevalidation_stats", {"rejected": 0, "ambiguous": 0})
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_only_clear_rejections_skip_llm(fake_agent):
+    """只有明显不合格的内容不调用 LLM，并计入节省的调用次数"""
+    keywords = frozenset(["auth", "token"])
+    assert (await validators.validate_semantics("auth token rotation", keywords)).is_ok
+    assert (await validators.validate_semantics("unrelated deploy notes", keywords)).is_err
+    assert (await validators.validate_semantics("auth via gateway", keywords)).is_ok
+
+    assert len(fake_agent) == 2
+    assert validators.prevalidation_summary() == {
+        "rejected": 1,
+        "ambiguous": 2,
+        "llm_calls_saved": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_irrelevant_content_mentioning_keywords_reaches_llm(fake_agent):
+    """提到关键词的无关内容仍由 LLM 判断并被拒绝"""
+    content = "今天天气很好, 和 redis 无关的闲聊, 我午饭吃了面条"
+
+    assert (await validators.validate_semantics(content, frozenset(["redis"]))).is_err
+    assert len(fake_agent) == 1
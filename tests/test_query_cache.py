@@ -0,0 +1,48 @@
+"""测试 list 查询结果缓存"""
+
+import pytest
+
+from memory_mcp.backend.config import MEMORIES_DIR_NAME
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+from memory_mcp.backend.core.query_cache import QueryCache
+
+
+class TestQueryCache:
+    """测试 LRU 与 generation 失效"""
+
+    def test_lru_eviction(self):
+        cache = QueryCache(max_entries=2)
+        cache.put("a", 0, 1)
+        cache.put("b", 0, 2)
+        cache.get("a", 0)
+        cache.put("c", 0, 3)
+
+        assert cache.get("b", 0) is None
+        assert cache.get("a", 0) == 1
+        assert cache.get("c", 0) == 3
+
+    def test_generation_invalidates(self):
+        cache = QueryCache(max_entries=8)
+        cache.put("a", 0, 1)
+        assert cache.get("a", 1) is None
+        assert cache.stats() == {"size": 0, "hits": 0, "misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_registry_list_cache(tmp_path):
+    """重复查询命中缓存，删除后失效"""
+    memories_dir = tmp_path / MEMORIES_DIR_NAME
+    memories_dir.mkdir()
+    (memories_dir / "api-design.md").write_text("x")
+    (memories_dir / "api.md").write_text("y")
+    registry = MemoryRegistry(tmp_path)
+
+    first = registry.list(["design", "api"]).unwrap().items
+    assert registry.list(["api", "design"]).unwrap().items == first
+    assert registry.list_cache_stats["hits"] == 1
+
+    version = (await registry.read(["api"])).unwrap().version
+    await registry.delete(["api"], version)
+
+    assert registry.list(["api", "design"]).unwrap().items == [frozenset(["api", "design"])]
+    assert registry.list_cache_stats["misses"] == 2
@@ -0,0 +1,312 @@
+"""测试 small_agent 的稳定前缀（提示词缓存）模式"""
+
+import asyncio
+import copy
+from types import SimpleNamespace
+
+import pytest
+from anthropic.types import Message, ToolUseBlock, Usage
+
+from memory_mcp.backend import llm
+
+
+class EchoTool(llm.Tool):
+    def __init__(self, max_calls: int):
+        super().__init__("echo", "回显输入", {"type": "object", "properties": {}})
+        self.max_calls = max_calls
+        self.calls = 0
+
+    async def execute(self, tool_input: dict) -> str:
+        self.calls += 1
+        return "ok"
+
+    def is_available(self) -> bool:
+        return self.calls < self.max_calls
+
+
+FINAL = [{"name": "done", "description": "完成", "input_schema": {"type": "object"}}]
+
+
+def _tool_use(name: str, index: int) -> Message:
+    return Message(
+        id=f"msg_{index}",
+        type="message",
+        role="assistant",
+        model="test",
+        content=[ToolUseBlock(type="tool_use", id=f"tu_{index}", name=name, input={})],
+        stop_reason="tool_use",
+        stop_sequence=None,
+        usage=Usage(input_tokens=1, output_tokens=1),
+    )
+
+
+def _strip_cache_control(value):
+    if isinstance(value, dict):
+        return {k: _strip_cache_control(v) for k, v in value.items() if k != "cache_control"}
+    if isinstance(value, list):
+        return [_strip_cache_control(v) for v in value]
+    if hasattr(value, "model_dump"):
+        return value.model_dump(exclude_none=True)
+    return value
+
+
+@pytest.mark.asyncio
+async def test_stable_prefix(monkeypatch):
+    requests = []
+    replies = iter([_tool_use("echo", 0), _tool_use("echo", 1), _tool_use("done", 2)])
+
+    async def create(**kwargs):
+        requests.append(copy.deepcopy(kwargs))
+        return next(replies)
+
+    monkeypatch.setattr(llm, "client", SimpleNamespace(messages=SimpleNamespace(create=create)))
+
+    result = await llm.small_agent(
+        "任务",
+        [EchoTool(max_calls=1)],
+        FINAL,
+        maxIter=5,
+        prompt_caching=True,
+        streaming=False,
+    )
+
+    assert result == ("done", {})
+    assert len(requests) == 3
+    # system 与工具列表逐字节不变，且都带缓存断点
+    assert all(r["system"] == requests[0]["system"] for r in requests)
+    assert all(r["tools"] == requests[0]["tools"] for r in requests)
+    assert requests[0]["system"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert requests[0]["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+
+    # 每次请求的消息都是上一次请求的延续，断点设在最新消息上
+    for prev, cur in zip(requests, requests[1:]):
+        prev_messages = _strip_cache_control(prev["messages"])
+        cur_messages = _strip_cache_control(cur["messages"])
+        assert cur_messages[: len(prev_messages)] == prev_messages
+        assert cur["messages"][-1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+
+    # 轮次与工具剩余情况在最新的用户消息中
+    last_note = requests[2]["messages"][-1]["content"][-1]["text"]
+    assert "第 3/5 轮" in last_note and "echo" in last_note
+    assert "当前是第" not in requests[0]["system"][0]["text"]
+
+
+@pytest.mark.asyncio
+async def test_last_round_forces_final(monkeypatch):
+    """最后一轮只提供 final 工具并强制调用，模型无法再选择普通工具"""
+    requests = []
+
+    async def create(**kwargs):
+        requests.append(copy.deepcopy(kwargs))
+        choice = kwargs.get("tool_choice")
+        if isinstance(choice, dict) and choice["type"] == "tool":
+            return _tool_use(choice["name"], len(requests))
+        return _tool_use("echo", len(requests))  # 模型总是倾向于继续调用普通工具
+
+    monkeypatch.setattr(llm, "client", SimpleNamespace(messages=SimpleNamespace(create=create)))
+
+    result = await llm.small_agent(
+        "任务", [EchoTool(max_calls=5)], FINAL, maxIter=2, prompt_caching=True, streaming=False
+    )
+
+    assert result == ("done", {})
+    assert [tool["name"] for tool in requests[-1]["tools"]] == ["done"]
+    assert requests[-1]["tool_choice"] == {"type": "tool", "name": "done"}
+    assert requests[0]["tools"][0]["name"] == "echo"
+    assert not isinstance(requests[0].get("tool_choice"), dict)
+
+
+class SlowTool(llm.Tool):
+    def __init__(self, name: str, max_calls: int, writes: bool = False, log: list | None = None):
+        super().__init__(name, "慢工具", {"type": "object", "properties": {}})
+        self.max_calls = max_calls
+        self.writes = writes
+        self.log = log if log is not None else []
+        self.reserved = 0
+        self.running = 0
+        self.peak = 0
+
+    def reserve(self) -> bool:
+        if self.reserved >= self.max_calls:
+            return False
+        self.reserved += 1
+        return True
+
+    async def execute(self, tool_input: dict) -> str:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.log.append(("start", self.name, tool_input["i"]))
+        await asyncio.sleep(0.05 * (3 - tool_input["i"] % 3))  # 先开始的后完成
+        self.log.append(("end", self.name, tool_input["i"]))
+        self.running -= 1
+        return f"{self.name}-{tool_input['i']}"
+
+
+def _multi_tool_use(calls: list[tuple[str, dict]], index: int) -> Message:
+    return Message(
+        id=f"msg_{index}",
+        type="message",
+        role="assistant",
+        model="test",
+        content=[
+            ToolUseBlock(type="tool_use", id=f"tu_{index}_{i}", name=name, input=tool_input)
+            for i, (name, tool_input) in enumerate(calls)
+        ],
+        stop_reason="tool_use",
+        stop_sequence=None,
+        usage=Usage(input_tokens=1, output_tokens=1),
+    )
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_run_concurrently(monkeypatch):
+    """同一轮的多个读调用并发执行，写调用逐个执行，结果保持原顺序，次数上限仍然生效"""
+    requests = []
+    calls = [("read", {"i": i}) for i in range(5)] + [("write", {"i": i}) for i in range(3)]
+    replies = iter([_multi_tool_use(calls, 0), _tool_use("done", 1)])
+
+    async def create(**kwargs):
+        requests.append(copy.deepcopy(kwargs))
+        return next(replies)
+
+    monkeypatch.setattr(llm, "client", SimpleNamespace(messages=SimpleNamespace(create=create)))
+    read = SlowTool("read", max_calls=4)
+    write = SlowTool("write", max_calls=10, writes=True)
+
+    start = asyncio.get_running_loop().time()
+    result = await llm.small_agent("任务", [read, write], FINAL, maxIter=3, streaming=False)
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert result == ("done", {})
+    results = [block["content"] for block in requests[1]["messages"][-1]["content"][:-1]]
+    assert results == [
+        "read-0", "read-1", "read-2", "read-3", "错误：工具 'read' 不可用",
+        "write-0", "write-1", "write-2",
+    ]
+    assert read.peak == 4 and write.peak == 1
+    assert elapsed < 0.6  # 读操作并发约 0.45 秒，全部串行需要 0.75 秒
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("streaming", [False, True])
+async def test_writes_ordered_with_other_calls(monkeypatch, streaming):
+    """写操作在之前的调用完成后才开始，之后的调用（包括其他写工具）等它完成"""
+    calls = [("read", {"i": 0}), ("create", {"i": 1}), ("update", {"i": 2}), ("read", {"i": 3})]
+    replies = [_multi_tool_use(calls, 0), _tool_use("done", 1)]
+
+    async def create(**kwargs):
+        return replies.pop(0)
+
+    monkeypatch.setattr(
+        llm,
+        "client",
+        SimpleNamespace(
+            messages=SimpleNamespace(
+                create=create, stream=lambda **kwargs: FakeStream(replies.pop(0), 0, 0)
+            )
+        ),
+    )
+    log = []
+    tools = [
+        SlowTool("read", max_calls=5, log=log),
+        SlowTool("create", max_calls=5, writes=True, log=log),
+        SlowTool("update", max_calls=5, writes=True, log=log),
+    ]
+
+    result = await llm.small_agent("任务", tools, FINAL, maxIter=3, streaming=streaming)
+
+    assert result == ("done", {})
+    assert log == [
+        ("start", "read", 0), ("end", "read", 0),
+        ("start", "create", 1), ("end", "create", 1),
+        ("start", "update", 2), ("end", "update", 2),
+        ("start", "read", 3), ("end", "read", 3),
+    ]
+
+
+class FakeStream:
+    """按间隔逐个产出 content_block_stop 事件，最后还要等待 tail 秒才结束"""
+
+    def __init__(self, message: Message, interval: float, tail: float):
+        self.message = message
+        self.interval = interval
+        self.tail = tail
+        self.closed = False
+        self.finished = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+
+    async def _events(self):
+        for index, block in enumerate(self.message.content):
+            await asyncio.sleep(self.interval)
+            yield SimpleNamespace(type="content_block_stop", index=index, content_block=block)
+        await asyncio.sleep(self.tail)
+        self.finished = True
+
+    def __aiter__(self):
+        return self._events()
+
+    async def get_final_message(self) -> Message:
+        return self.message
+
+
+@pytest.mark.asyncio
+async def test_streaming_dispatches_early(monkeypatch):
+    """tool_use 块一到达就开始执行；final 工具到达后立即返回，不等响应结束"""
+    started = []
+    streams = [
+        FakeStream(_multi_tool_use([("read", {"i": 0}), ("read", {"i": 1})], 0), 0.01, 0.3),
+        FakeStream(_multi_tool_use([("done", {}), ("read", {"i": 2})], 1), 0.01, 5),
+    ]
+    stream_iter = iter(streams)
+
+    def stream(**kwargs):
+        return next(stream_iter)
+
+    monkeypatch.setattr(llm, "client", SimpleNamespace(messages=SimpleNamespace(stream=stream)))
+
+    class RecordingTool(SlowTool):
+        async def execute(self, tool_input: dict) -> str:
+            started.append((tool_input["i"], streams[0].finished))
+            return await super().execute(tool_input)
+
+    start = asyncio.get_running_loop().time()
+    result = await llm.small_agent(
+        "任务", [RecordingTool("read", max_calls=5)], FINAL, maxIter=3, streaming=True
+    )
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert result == ("done", {})
+    assert started == [(0, False), (1, False)]  # 在第一个响应结束前就已开始执行
+    assert streams[1].closed and not streams[1].finished
+    assert elapsed < 1
+
+
+class FailingStream(FakeStream):
+    """产出所有块之后连接中断"""
+
+    async def _events(self):
+        async for event in super()._events():
+            yield event
+        raise RuntimeError("connection reset")
+
+
+@pytest.mark.asyncio
+async def test_stream_failure_keeps_started_tools(monkeypatch):
+    """流在工具开始执行后失败：错误向上抛出，已开始的工具调用在后台执行完"""
+    stream = FailingStream(_multi_tool_use([("read", {"i": 0})], 0), 0.01, 0)
+    monkeypatch.setattr(
+        llm, "client", SimpleNamespace(messages=SimpleNamespace(stream=lambda **kwargs: stream))
+    )
+    monkeypatch.setattr(llm, "_background_tasks", set())
+    read = SlowTool("read", max_calls=5)
+
+    with pytest.raises(RuntimeError):
+        await llm.small_agent("任务", [read], FINAL, maxIter=3, streaming=True)
+
+    assert len(llm._background_tasks) == 1
+    assert await asyncio.gather(*llm._background_tasks) == ["read-0"]
@@ -0,0 +1,116 @@
+"""测试存储后端与格式迁移"""
+
+import pytest
+
+from memory_mcp import file_manager
+from memory_mcp.backend.config import MEMORIES_DIR_NAME
+from memory_mcp.backend.core.file_storage import FileStorage
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+from memory_mcp.backend.core.storage import open_storage
+from memory_mcp.backend.migrate import migrate
+
+
+pytestmark = pytest.mark.usefixtures("accept_semantics")
+
+
+@pytest.fixture
+def sqlite_registry(tmp_path):
+    registry = MemoryRegistry(tmp_path, storage=open_storage(tmp_path, "sqlite"))
+    yield registry
+    registry.close()
+
+
+class TestSQLiteStorage:
+    """测试 sqlite 后端的读写"""
+
+    @pytest.mark.asyncio
+    async def test_write_read_delete(self, tmp_path, sqlite_registry):
+        created = (await sqlite_registry.create(["api", "design"], "接口设计")).unwrap()
+        updated = (
+            await sqlite_registry.update(["api", "design"], "接口", "REST 接口", created.version)
+        ).unwrap()
+        await sqlite_registry.create(["cache"], "缓存")
+        sqlite_registry.close()
+
+        registry = MemoryRegistry(tmp_path, storage=open_storage(tmp_path, "sqlite"))
+        assert registry.list().unwrap().items != []
+        snapshot = (await registry.read(["design", "api"])).unwrap()
+        assert snapshot == updated
+
+        assert (await registry.delete(["cache"], "00000000")).is_err
+        version = (await registry.read(["cache"])).unwrap().version
+        assert (await registry.delete(["cache"], version)).is_ok
+        registry.close()
+
+        registry = MemoryRegistry(tmp_path, storage=open_storage(tmp_path, "sqlite"))
+        assert not registry.has_memory(["cache"])
+        registry.close()
+
+    @pytest.mark.asyncio
+    async def test_stored_version_checked_by_revision(self, tmp_path, sqlite_registry):
+        """重启后版本检查只查询 revision，不读取内容"""
+        version = (await sqlite_registry.create(["api"], "接口")).unwrap().version
+        sqlite_registry.close()
+
+        registry = MemoryRegistry(tmp_path, storage=open_storage(tmp_path, "sqlite"))
+        memory = registry._memories[frozenset(["api"])]
+        assert (await memory.check_version(version)).is_ok
+        assert not memory.is_loaded
+        registry.close()
+
+
+@pytest.mark.asyncio
+async def test_migrate_round_trip(tmp_path):
+    """file → sqlite → file 保留内容和版本号"""
+    memories_dir = tmp_path / "src" / MEMORIES_DIR_NAME
+    memories_dir.mkdir(parents=True)
+    for i in range(7):
+        (memories_dir / f"notes-topic{i}.md").write_text(f"内容 {i}", encoding="utf-8")
+    (memories_dir / "Bad-Name.md").write_text("skip")
+
+    source = MemoryRegistry(tmp_path / "src")
+    expected = {
+        key: await source._snapshot(memory) for key, memory in source._memories.items()
+    }
+
+    file_src = open_storage(tmp_path / "src", "file")
+    sqlite_dst = open_storage(tmp_path / "src", "sqlite")
+    assert await migrate(file_src, sqlite_dst) == 7
+    with pytest.raises(ValueError):
+        await migrate(file_src, sqlite_dst)
+
+    (tmp_path / "dst").mkdir()
+    file_dst = open_storage(tmp_path / "dst", "file")
+    assert await migrate(sqlite_dst, file_dst) == 7
+    sqlite_dst.close()
+
+    for backend_root, backend in ((tmp_path / "src", "sqlite"), (tmp_path / "dst", "file")):
+        registry = MemoryRegistry(backend_root, storage=open_storage(backend_root, backend))
+        actual = {
+            key: await registry._snapshot(memory)
+            for key, memory in registry._memories.items()
+        }
+        assert actual == expected
+        registry.close()
+
+
+@pytest.mark.asyncio
+async def test_file_write_many_is_one_group_commit(tmp_path, monkeypatch):
+    """文件后端的批量写入并发提交，batch 模式下合并为一次组提交"""
+    batches = []
+    rename_batch = file_manager._rename_batch
+
+    def counting_rename(renames):
+        batches.append(len(renames))
+        return rename_batch(renames)
+
+    monkeypatch.setattr(file_manager, "_rename_batch", counting_rename)
+    (tmp_path / MEMORIES_DIR_NAME).mkdir()
+    storage = FileStorage(tmp_path, durability="batch")
+    items = [(frozenset([f"topic{i}"]), f"内容 {i}", f"v{i}") for i in range(5)]
+
+    await storage.write_many(items + [(frozenset(["topic0"]), "最新内容", "v5")])
+
+    assert batches == [5]
+    assert storage._path(frozenset(["topic0"])).read_text(encoding="utf-8") == "最新内容"
+    assert storage._path(frozenset(["topic4"])).read_text(encoding="utf-8") == "内容 4"
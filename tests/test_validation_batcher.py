@@ -0,0 +1,136 @@
+"""测试语义验证批处理"""
+
+import asyncio
+
+import pytest
+
+from memory_mcp.backend.core import validators
+from memory_mcp.backend.core.validation_batcher import ValidationBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_validations_share_one_request(monkeypatch):
+    """并发的验证合并为一次请求，判定按序号交还各调用方"""
+    calls = []
+
+    async def fake_agent(initial_prompt, tools, final, maxIter, **kwargs):
+        calls.append([tool["name"] for tool in final])
+        return (
+            "submit_verdicts",
+            {
+                "verdicts": [
+                    {"index": 0, "accept": True},
+                    {"index": 1, "accept": False, "reason": "冗余代码"},
+                    {"index": 2, "accept": True},
+                ]
+            },
+        )
+
+    monkeypatch.setattr(validators.llm, "small_agent", fake_agent)
+    monkeypatch.setattr(validators, "PREVALIDATE_ENABLED", False)
+    monkeypatch.setattr(validators, "validation_cache", None)
+
+    results = await asyncio.gather(
+        validators.validate_semantics("a", frozenset(["api"])),
+        validators.validate_semantics("b", frozenset(["db"])),
+        validators.validate_semantics("c", frozenset(["log"])),
+    )
+
+    assert calls == [["submit_verdicts"]]
+    assert results[0].is_ok and results[2].is_ok
+    assert "冗余代码" in results[1].unwrap_err().message
+
+
+@pytest.mark.asyncio
+async def test_missing_verdicts_fall_back_to_single():
+    """批量判定漏掉的项单独判定，相同的项只判定一次"""
+    single = []
+
+    async def judge_one(content, keywords):
+        single.append(content)
+        return False, "无关"
+
+    async def judge_many(items):
+        return {0: (True, None)}
+
+    batcher = ValidationBatcher(judge_one, judge_many, window=0.01, max_items=8)
+    results = await asyncio.gather(
+        batcher.judge("a", "a", frozenset(["x"])),
+        batcher.judge("b", "b", frozenset(["y"])),
+        batcher.judge("b", "b", frozenset(["y"])),
+    )
+
+    assert results == [(True, None), (False, "无关"), (False, "无关")]
+    assert single == ["b"]
+    assert batcher.stats() == {"batches": 1, "items": 2}
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_immediately():
+    """批次满员时立即发送，后续请求进入下一批"""
+    batches = []
+
+    async def judge_one(content, keywords):
+        batches.append([content])
+        return True, None
+
+    async def judge_many(items):
+        batches.append([content for content, _ in items])
+        return {i: (True, None) for i in range(len(items))}
+
+    batcher = ValidationBatcher(judge_one, judge_many, window=0.01, max_items=2)
+    await asyncio.gather(
+        *(batcher.judge(c, c, frozenset(["x"])) for c in ("a", "b", "c", "d", "e"))
+    )
+
+    assert batches == [["a", "b"], ["c", "d"], ["e"]]
+
+
+@pytest.mark.asyncio
+async def test_lone_validation_skips_window():
+    """没有批次在判定中时，单个请求不等待窗口"""
+
+    async def judge_one(content, keywords):
+        return True, None
+
+    async def judge_many(items):
+        raise AssertionError("不应批量判定")
+
+    batcher = ValidationBatcher(judge_one, judge_many, window=10, max_items=8)
+    result = await asyncio.wait_for(batcher.judge("a", "a", frozenset(["x"])), 1)
+
+    assert result == (True, None)
+    assert not batcher._tasks
+
+
+@pytest.mark.asyncio
+async def test_arrivals_during_judgement_are_batched():
+    """有批次在判定中时，之后到达的请求在窗口内合并为一批"""
+    batches = []
+    release = asyncio.Event()
+
+    async def judge_one(content, keywords):
+        batches.append([content])
+        await release.wait()
+        return True, None
+
+    async def judge_many(items):
+        batches.append([content for content, _ in items])
+        return {i: (True, None) for i in range(len(items))}
+
+    batcher = ValidationBatcher(judge_one, judge_many, window=0.05, max_items=8)
+    first = asyncio.create_task(batcher.judge("a", "a", frozenset(["x"])))
+    await asyncio.sleep(0.01)
+    assert batches == [["a"]]
+
+    later = asyncio.gather(
+        batcher.judge("b", "b", frozenset(["x"])),
+        batcher.judge("c", "c", frozenset(["x"])),
+    )
+    await asyncio.sleep(0.02)
+    assert batches == [["a"]]  # 仍在窗口内
+    await later
+    release.set()
+    await first
+
+    assert batches == [["a"], ["b", "c"]]
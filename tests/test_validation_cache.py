@@ -0,0 +1,67 @@
+"""测试语义验证结果缓存"""
+
+import pytest
+
+from memory_mcp.backend.core import validators
+from memory_mcp.backend.core.validation_cache import ValidationCache, verdict_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestValidationCache:
+    def test_key_ignores_keyword_order(self):
+        assert verdict_key(["b", "a"], "x") == verdict_key(["a", "b"], "x")
+        assert verdict_key(["a", "b"], "x") != verdict_key(["a", "b"], "y")
+        assert verdict_key(["a"], "x", "1") != verdict_key(["a"], "x", "2")
+
+    def test_ttl_and_eviction(self, tmp_path):
+        clock = FakeClock()
+        cache = ValidationCache(tmp_path / "v.json", ttl=60, max_entries=2, clock=clock)
+        cache.put("a", True)
+        cache.put("b", False, "off topic")
+        cache.get("a")
+        cache.put("c", True)  # 淘汰最久未用的 b
+
+        assert cache.get("b") is None
+        assert cache.get("a").accepted
+        clock.now += 61
+        assert cache.get("a") is None
+        assert cache.stats() == {"size": 1, "hits": 2, "misses": 2}
+
+    def test_persisted(self, tmp_path):
+        path = tmp_path / "v.json"
+        cache = ValidationCache(path, ttl=60, max_entries=10)
+        cache.put("a", False, "冗余代码")
+        cache.save()
+
+        reloaded = ValidationCache(path, ttl=60, max_entries=10)
+        assert reloaded.get("a")[:2] == (False, "冗余代码")
+
+
+@pytest.mark.asyncio
+async def test_repeat_validation_skips_llm(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_agent(initial_prompt, tools, final, maxIter, **kwargs):
+        calls.append(initial_prompt)
+        return ("reject", {"reason": "无关"}) if "bad" in initial_prompt else ("accept", {})
+
+    monkeypatch.setattr(validators.llm, "small_agent", fake_agent)
+    monkeypatch.setattr(validators, "PREVALIDATE_ENABLED", False)
+    monkeypatch.setattr(validators, "validation_cache", None)
+    validators.init_validation_cache(tmp_path)
+
+    keywords = frozenset(["api", "design"])
+    assert (await validators.validate_semantics("good", keywords)).is_ok
+    assert (await validators.validate_semantics("good", frozenset(["design", "api"]))).is_ok
+    first = (await validators.validate_semantics("bad", keywords)).unwrap_err()
+    second = (await validators.validate_semantics("bad", keywords)).unwrap_err()
+
+    assert first == second
+    assert len(calls) == 2
@@ -0,0 +1,98 @@
+"""测试启动预热与访问统计"""
+
+import asyncio
+import sys
+
+import pytest
+
+from memory_mcp.backend.core import memory_registry
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+
+
+MEMORY_FILES = {
+    f"{name}.md": f"{name} notes " * 20 for name in ("alpha", "beta", "gamma", "delta")
+}
+
+
+@pytest.mark.asyncio
+async def test_warm_up_loads_and_indexes(tmp_path, memories_dir):
+    registry = MemoryRegistry(tmp_path)
+    assert registry.warmup_stats["state"] == "off"
+
+    await registry.warm_up()
+
+    assert registry.warmup_stats == {"state": "done", "loaded": 4, "total": 4}
+    assert all(memory.is_loaded for memory in registry._memories.values())
+    assert registry._content_index is not None
+    assert len(await registry.search_content("gamma")) == 1
+
+
+@pytest.mark.asyncio
+async def test_warm_up_prefers_frequently_read(tmp_path, memories_dir, monkeypatch):
+    """预算有限时优先加载历史读取次数多的 memory"""
+    registry = MemoryRegistry(tmp_path)
+    for _ in range(3):
+        await registry.read(["gamma"])
+    registry.flush()
+
+    budget = sys.getsizeof("gamma notes " * 20)
+    monkeypatch.setattr(memory_registry, "CONTENT_CACHE_MAX_BYTES", budget)
+    monkeypatch.setattr(memory_registry, "WARMUP_BATCH_SIZE", 1)
+    registry = MemoryRegistry(tmp_path)
+    await registry.warm_up()
+
+    loaded = {key for key, memory in registry._memories.items() if memory.is_loaded}
+    assert loaded == {frozenset(["gamma"])}
+    assert len(await registry.search_content("notes")) == 4
+
+
+@pytest.mark.asyncio
+async def test_writes_during_index_build_are_kept(tmp_path, memories_dir, monkeypatch):
+    """构建全文索引期间删除的 memory 不会留在索引中"""
+    registry = MemoryRegistry(tmp_path)
+    peek = memory_registry.Memory.peek
+
+    async def slow_peek(memory):
+        if memory.name == "alpha" and registry.has_memory(["beta"]):
+            version = (await registry.read(["beta"])).unwrap().version
+            await registry.delete(["beta"], version)
+        return await peek(memory)
+
+    monkeypatch.setattr(memory_registry.Memory, "peek", slow_peek)
+    hits = await registry.search_content("beta")
+
+    assert hits == []
+    assert not registry.has_memory(["beta"])
+
+
+@pytest.mark.asyncio
+async def test_index_build_keeps_concurrent_reads(tmp_path, memories_dir, monkeypatch):
+    """建立全文索引与读取同时进行时，读取到的内容不会被索引构建丢弃"""
+    registry = MemoryRegistry(tmp_path)
+    memory = registry._memories[frozenset(["alpha"])]
+    storage_read = memory._storage.read
+
+    async def slow_read(keywords):
+        await asyncio.sleep(0.05)
+        return await storage_read(keywords)
+
+    monkeypatch.setattr(memory._storage, "read", slow_read)
+    search = asyncio.create_task(registry.search_content("alpha"))
+    await asyncio.sleep(0.01)  # 索引构建正在读取 alpha
+    assert (await registry.read(["alpha"])).is_ok
+
+    # 缓存记账中的 memory 必须确实持有内容
+    assert memory in registry._content_cache and memory.is_loaded
+    assert len(await search) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_warm_up_is_not_left_loading(tmp_path, memories_dir):
+    registry = MemoryRegistry(tmp_path)
+    task = asyncio.create_task(registry.warm_up())
+    await asyncio.sleep(0)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert registry.warmup_stats["state"] == "failed"
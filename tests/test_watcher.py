@@ -0,0 +1,95 @@
+"""测试外部修改的增量刷新与目录监视"""
+
+import asyncio
+
+import pytest
+
+from memory_mcp.backend.core import watcher
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+from memory_mcp.backend.core.watcher import MemoryWatcher
+
+
+MEMORY_FILES = {"api-design.md": "接口设计", "cache.md": "缓存"}
+
+
+async def _wait_until(predicate, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+class TestRefresh:
+    """测试 registry.refresh 只更新受影响的 memory"""
+
+    @pytest.mark.asyncio
+    async def test_external_create_modify_delete(self, tmp_path, memories_dir):
+        registry = MemoryRegistry(tmp_path)
+        await registry.search_content("缓存")
+        old = (await registry.read(["api", "design"])).unwrap()
+
+        (memories_dir / "deploy.md").write_text("部署 docker")
+        (memories_dir / "api-design.md").write_text("接口设计 v2")
+        (memories_dir / "cache.md").unlink()
+        await registry.refresh({"deploy", "api-design", "cache"})
+
+        assert registry.has_memory(["deploy"])
+        assert not registry.has_memory(["cache"])
+        assert registry.list(["cache"]).unwrap().items == []
+        snapshot = (await registry.read(["api", "design"])).unwrap()
+        assert snapshot.content == "接口设计 v2"
+        assert snapshot.version != old.version
+        assert [hit.keywords for hit in await registry.search_content("docker")] == [
+            frozenset(["deploy"])
+        ]
+
+    @pytest.mark.asyncio
+    async def test_own_writes_ignored(self, tmp_path, memories_dir, accept_semantics):
+        registry = MemoryRegistry(tmp_path)
+        version = (await registry.read(["cache"])).unwrap().version
+        await registry.update(["cache"], "缓存", "缓存 redis", version)
+        await registry.create(["deploy"], "部署")
+
+        await registry.refresh(None)
+
+        memory = registry._memories[frozenset(["cache"])]
+        assert memory.is_loaded
+        assert memory.content == "缓存 redis"
+        assert registry._memories[frozenset(["deploy"])].is_loaded
+
+    @pytest.mark.asyncio
+    async def test_refresh_does_not_save_manifest(self, tmp_path, memories_dir, monkeypatch):
+        """刷新不在事件循环中写清单，清单由 flush() 写回"""
+        registry = MemoryRegistry(tmp_path)
+        saves = []
+        monkeypatch.setattr(registry._storage, "flush", lambda: saves.append(True))
+
+        (memories_dir / "deploy.md").write_text("部署")
+        await registry.refresh({"deploy"})
+        assert saves == []
+
+        registry.flush()
+        assert saves == [True]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["poll", "inotify"])
+async def test_watcher_applies_changes(tmp_path, memories_dir, mode):
+    if mode == "inotify" and watcher._open_inotify(memories_dir) is None:
+        pytest.skip("inotify unavailable")
+
+    registry = MemoryRegistry(tmp_path)
+    memory_watcher = MemoryWatcher(
+        memories_dir, registry.refresh, mode, debounce=0.01, poll_interval=0.05
+    )
+    memory_watcher.start()
+    assert memory_watcher.mode == mode
+    try:
+        await asyncio.sleep(0.1)  # 等待轮询建立初始快照
+        (memories_dir / "deploy.md").write_text("部署")
+        (memories_dir / "cache.md").unlink()
+        await _wait_until(
+            lambda: registry.has_memory(["deploy"]) and not registry.has_memory(["cache"])
+        )
+    finally:
+        await memory_watcher.stop()
@@ -0,0 +1,67 @@
+"""测试单次扫描字数统计与增量字数维护"""
+
+import random
+import re
+
+import pytest
+
+from memory_mcp.backend.config import MAX_FILE_SIZE
+from memory_mcp.backend.core.memory_registry import MemoryRegistry
+from memory_mcp.backend.core.validators import (
+    ContentEdit,
+    count_words_mixed,
+    splice_word_count,
+    validate_content_size,
+)
+
+ALPHABET = ["a", "b", "Z", "1", "9", "_", "é", " ", "\n", "-", ".", "中", "文", "，"]
+
+
+def _reference_count(content: str) -> int:
+    """原始实现：中文逐字计数，再把中文替换为空格后匹配英文单词"""
+    chinese_count = sum(1 for char in content if "\u4e00" <= char <= "\u9fff")
+    text_without_chinese = re.sub(r"[\u4e00-\u9fff]", " ", content)
+    return chinese_count + len(re.findall(r"\b[a-zA-Z0-9]+\b", text_without_chinese))
+
+
+def _random_text(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def test_same_as_reference():
+    rng = random.Random(0)
+    for _ in range(500):
+        content = _random_text(rng, rng.randint(0, 40))
+        assert count_words_mixed(content) == _reference_count(content), content
+
+
+def test_early_exit():
+    content = "word " * (MAX_FILE_SIZE * 100)
+    assert count_words_mixed(content, limit=MAX_FILE_SIZE) == MAX_FILE_SIZE + 1
+    assert validate_content_size(content).is_err
+    assert validate_content_size("一二三").unwrap() == 3
+
+
+def test_splice_matches_full_count():
+    """拼接处前后的英文单词合并/拆开时，增量结果与全量计数一致"""
+    rng = random.Random(1)
+    for _ in range(500):
+        content = _random_text(rng, rng.randint(1, 40))
+        start = rng.randint(0, len(content))
+        end = rng.randint(start, len(content))
+        edit = ContentEdit(start, content[start:end], _random_text(rng, rng.randint(0, 6)))
+        updated = content[:start] + edit.new_text + content[end:]
+
+        spliced = splice_word_count(content, count_words_mixed(content), edit)
+        assert spliced == count_words_mixed(updated), (content, edit)
+
+
+@pytest.mark.asyncio
+async def test_update_keeps_word_count(tmp_path, memories_dir, accept_semantics):
+    registry = MemoryRegistry(tmp_path)
+
+    created = (await registry.create(["api"], "rest api 接口")).unwrap()
+    updated = (await registry.update(["api"], "api", "apis v2", created.version)).unwrap()
+
+    memory = registry._memories[frozenset(["api"])]
+    assert memory._word_count == (updated.version, count_words_mixed(updated.content))